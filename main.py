@@ -30,12 +30,19 @@ _ = header_container.title("Rug Pulled")
 if len(ss["selected_workflows"]) == 0:
     ss["results_repos"] = {}
     
-stats, gantts = st.tabs(["Statistics", "Gantt Charts"])
+# Unlike st.tabs, only the body of the selected view is run
+view = body_container.segmented_control(
+    "View",
+    ["Statistics", "Gantt Charts"],
+    key="active_view",
+    label_visibility="collapsed",
+)
 
 if len(ss["selected_workflows"]) > 0:
-    with stats:
-        make_rug_pulls_component()
-    with gantts:
-        make_gantt_charts()
+    match view:
+        case "Gantt Charts":
+            make_gantt_charts()
+        case _:
+            make_rug_pulls_component()
 else:
     st.write("Please select at least one workflow")
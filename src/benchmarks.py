@@ -0,0 +1,276 @@
+from time import perf_counter
+from typing import Any, Callable
+
+from numpy.random import default_rng
+from pandas import DataFrame, Timestamp, to_timedelta
+
+from tests.conftest import make_workflow
+
+from .helpers.charts import histogram, scatter
+from .helpers.compute import _compute_workflow_trends, compute_dependencies
+from .helpers.detect import _encode_vulnerable_deps
+from .helpers.figures import FigureCache, figure_from_json, figure_key
+from .helpers.trends import build_trend
+from .models.neo import Dependency, Workflow
+
+
+def _time(func: Callable[[], Any], repeat: int = 3) -> float:
+    timings: list[float] = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+
+    return min(timings)
+
+
+def _new_vulnerable_deps_dict(workflow: Workflow) -> list[int]:
+    counts: list[int] = []
+    vuln_prev_dependencies: dict[str, Dependency] = {}
+
+    for commit in workflow.commits.values():
+        vuln_indirect_deps = {
+            key: dep
+            for key, dep in commit.dependencies["indirect"].items()
+            if len(dep.vulnerabilities) > 0
+        }
+
+        for name in commit.dependencies["direct"].keys():
+            current_action_vulns = {
+                key: dep
+                for key, dep in vuln_indirect_deps.items()
+                if dep.parent == name
+            }
+            prev_action_vulns = {
+                key: dep
+                for key, dep in vuln_prev_dependencies.items()
+                if dep.parent == name
+            }
+            new_vulnerable_deps = {
+                key: dep
+                for key, dep in current_action_vulns.items()
+                if key not in prev_action_vulns
+            }
+
+            counts.append(len(new_vulnerable_deps))
+
+        vuln_prev_dependencies = vuln_indirect_deps
+
+    return counts
+
+
+def _new_vulnerable_deps_bitset(workflow: Workflow) -> list[int]:
+    counts: list[int] = []
+    ids: dict[str, int] = {}
+    prev_masks: dict[str, int] = {}
+
+    for commit in workflow.commits.values():
+        masks = _encode_vulnerable_deps(commit.dependencies["indirect"], ids)
+
+        for name in commit.dependencies["direct"].keys():
+            new_mask = masks.get(name, 0) & ~prev_masks.get(name, 0)
+            counts.append(new_mask.bit_count())
+
+        prev_masks = masks
+
+    return counts
+
+
+def _bench_bitsets():
+    print("commits  actions  deps  dict (s)  bitset (s)  speedup")
+
+    for commits, actions, dependencies in [(1000, 10, 50), (2000, 10, 200), (5000, 20, 100)]:
+        workflow = make_workflow(commits, actions, dependencies)
+
+        if _new_vulnerable_deps_dict(workflow) != _new_vulnerable_deps_bitset(workflow):
+            raise Exception("The dict-based and bitset-based paths disagree")
+
+        old = _time(lambda: _new_vulnerable_deps_dict(workflow))
+        new = _time(lambda: _new_vulnerable_deps_bitset(workflow))
+
+        print(
+            f"{commits:>7}  {actions:>7}  {dependencies:>4}  {old:>8.3f}"
+            + f"  {new:>10.3f}  {old / new:>6.1f}x"
+        )
+
+
+def _compute_dependencies_lists(workflow: Workflow) -> dict[str, list[Any]]:
+    series: dict[str, list[Any]] = {
+        "dates": [],
+        "direct": [],
+        "direct_vuln": [],
+        "direct_dev": [],
+        "direct_dev_vuln": [],
+        "direct_opt": [],
+        "direct_opt_vuln": [],
+        "indirect": [],
+        "indirect_vuln": [],
+    }
+
+    for commit in workflow.commits.values():
+        series["dates"].append(commit.date)
+
+        indirect_deps = commit.dependencies["indirect"].values()
+        vuln_indirect_deps = list(
+            filter(lambda el: len(el.vulnerabilities) > 0, indirect_deps)
+        )
+
+        for subtype in ["direct", "direct_dev", "direct_opt", "indirect"]:
+            series[subtype].append(
+                len(list(filter(lambda el: el.subtype == subtype, indirect_deps)))
+            )
+            series[f"{subtype}_vuln"].append(
+                len(list(filter(lambda el: el.subtype == subtype, vuln_indirect_deps)))
+            )
+
+    return series
+
+
+def _bench_dependencies():
+    print("commits  deps  lists (s)  single pass (s)  speedup")
+
+    for commits, actions, dependencies in [(1000, 10, 50), (5000, 10, 50), (10000, 5, 40)]:
+        workflow = make_workflow(commits, actions, dependencies)
+        old_series = _compute_dependencies_lists(workflow)
+        new_series = compute_dependencies(workflow)
+
+        for key, values in old_series.items():
+            if key != "dates" and list(new_series[key]) != values:
+                raise Exception(f"The `{key}` series differ")
+
+        old = _time(lambda: _compute_dependencies_lists(workflow))
+        new = _time(lambda: compute_dependencies(workflow))
+
+        print(
+            f"{commits:>7}  {actions * dependencies:>4}  {old:>9.3f}"
+            + f"  {new:>15.3f}  {old / new:>6.1f}x"
+        )
+
+
+def _bench_trends():
+    print("commits  new  scratch (s)  incremental (s)  speedup")
+
+    for commits, new_commits in [(2000, 10), (5000, 10), (10000, 50)]:
+        workflow = make_workflow(commits + new_commits, 5, 40)
+        shas = list(workflow.commits.keys())
+        history = Workflow("", {sha: workflow.commits[sha] for sha in shas[:commits]})
+        timings: list[float] = []
+
+        # Updating changes the trend, so every run starts from a fresh history
+        for _ in range(3):
+            trend = build_trend(history)
+            start = perf_counter()
+            trend.update(workflow)
+            timings.append(perf_counter() - start)
+
+        expected = _compute_workflow_trends(workflow)
+
+        for key, value in trend.result().items():
+            if abs(value - expected[key]) > 1e-9:
+                raise Exception(f"The `{key}` trends differ")
+
+        old = _time(lambda: _compute_workflow_trends(workflow))
+        new = min(timings)
+
+        print(
+            f"{commits:>7}  {new_commits:>3}  {old:>11.3f}"
+            + f"  {new:>15.4f}  {old / new:>6.1f}x"
+        )
+
+
+def _make_rug_pulls(size: int, seed: int = 0) -> DataFrame:
+    rand = default_rng(seed)
+
+    return DataFrame(
+        {
+            "date": Timestamp(2020, 1, 1)
+            + to_timedelta(rand.integers(0, 5 * 365, size), unit="D"),
+            "ttx": rand.gamma(1.5, 20, size).round(),
+            "fix_actor": rand.choice(["Workflow", "Action"], size),
+        }
+    )
+
+
+def _bench_charts():
+    print("rows     chart      client (KB)  server (KB)  client (s)  server (s)")
+
+    colors = {"Workflow": "#072955", "Action": "#E02B33"}
+
+    for size in [10_000, 100_000, 1_000_000]:
+        df = _make_rug_pulls(size)
+
+        for chart, make in [
+            (
+                "histogram",
+                lambda server: histogram(
+                    df, "ttx", "fix_actor", colors, {}, {}, 100, server=server
+                ),
+            ),
+            (
+                "scatter",
+                lambda server: scatter(
+                    df, "date", "ttx", "fix_actor", colors, {}, {}, server=server
+                ),
+            ),
+        ]:
+            # The serialized figure is what Streamlit sends to the browser
+            sizes = [len(make(server).to_json()) / 1024 for server in [False, True]]
+            old = _time(lambda: make(False).to_json(), repeat=1)
+            new = _time(lambda: make(True).to_json(), repeat=1)
+
+            print(
+                f"{size:>9}  {chart:<9}  {sizes[0]:>11.0f}  {sizes[1]:>11.0f}"
+                + f"  {old:>10.3f}  {new:>10.3f}"
+            )
+
+
+def _bench_figure_cache():
+    print("rows     figures  cold (s)  warm (s)  speedup")
+
+    colors = {"Workflow": "#072955", "Action": "#E02B33"}
+
+    for size in [10_000, 100_000, 1_000_000]:
+        df = _make_rug_pulls(size)
+        builders = {
+            f"{chart}_{server}": make
+            for server in [False, True]
+            for chart, make in [
+                (
+                    "histogram",
+                    lambda server=server: histogram(
+                        df, "ttx", "fix_actor", colors, {}, {}, 100, server=server
+                    ),
+                ),
+                (
+                    "scatter",
+                    lambda server=server: scatter(
+                        df, "date", "ttx", "fix_actor", colors, {}, {}, server=server
+                    ),
+                ),
+            ]
+        }
+
+        # Streamlit serializes the figure it is given, so both paths end with it
+        def render(cache: FigureCache) -> None:
+            for figure_id, build in builders.items():
+                spec = cache.get_or_build(figure_key(figure_id, size, ()), build)
+                figure_from_json(spec).to_json(validate=False)
+
+        old = _time(lambda: render(FigureCache()), repeat=1)
+        cache = FigureCache()
+        render(cache)
+        new = _time(lambda: render(cache))
+
+        print(
+            f"{size:>9}  {len(builders):>7}  {old:>8.3f}  {new:>8.3f}"
+            + f"  {old / new:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    _bench_bitsets()
+    _bench_dependencies()
+    _bench_trends()
+    _bench_charts()
+    _bench_figure_cache()
@@ -1,33 +1,34 @@
-import streamlit as st
+from typing import Callable
 
-from random import randint
+import streamlit as st
 
 from ..init.callbacks import change_page
 
 
 ss = st.session_state
 
-def make_paging_component(pages: int, key: str) -> None:
+def make_paging_component(pages: int, key: str, position: str = "top") -> None:
+    # Stable keys let the widgets keep their identity across fragment reruns
     paging_container = st.container(
-        horizontal=True, 
-        vertical_alignment="center", 
+        horizontal=True,
+        vertical_alignment="center",
         horizontal_alignment="center",
-        key=randint(0, 100000),
+        key=f"{key}_{position}",
     )
-    
+
     _ = paging_container.button(
         label=":material/first_page:",
         disabled=ss[key] == 1,
         on_click=change_page,
         kwargs={"key": key, "where": 0},
-        key=randint(0, 100000),
+        key=f"{key}_{position}_first",
     )
     _ = paging_container.button(
         label=":material/keyboard_arrow_left:",
         disabled=ss[key] == 1,
         on_click=change_page,
         kwargs={"key": key, "where": 1},
-        key=randint(0, 100000),
+        key=f"{key}_{position}_previous",
     )
     _ = paging_container.html(f"""
         <div style='display: flex; justify-content: center; align-content: center'>
@@ -42,12 +43,22 @@ def make_paging_component(pages: int, key: str) -> None:
         disabled=ss[key] == pages,
         on_click=change_page,
         kwargs={"key": key, "where": 2},
-        key=randint(0, 100000),
+        key=f"{key}_{position}_next",
     )
     _ = paging_container.button(
         label=":material/last_page:",
         disabled=ss[key] == pages,
         on_click=change_page,
         kwargs={"key": key, "where": 3, "max_pages": pages},
-        key=randint(0, 100000),
+        key=f"{key}_{position}_last",
     )
+
+
+@st.fragment
+def make_paged_component(
+    pages: int, key: str, render: Callable[[int], None]
+) -> None:
+    # Changing the page only reruns this fragment, not the whole app
+    make_paging_component(pages, key, "top")
+    render(ss[key])
+    make_paging_component(pages, key, "bottom")
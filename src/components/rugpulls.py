@@ -1,15 +1,59 @@
-from math import ceil
-from os.path import abspath, dirname, join
+from os.path import abspath, dirname, isfile, join
+from typing import Any, Callable
 
 import plotly.express as ex
 import streamlit as st
+from dotenv import dotenv_values
 from numpy import where
-from pandas import DataFrame, concat, read_csv
+from pandas import DataFrame, read_csv
+from plotly.graph_objects import Bar, Box, Figure
 from plotly.io import write_image
+from plotly.subplots import make_subplots
+from streamlit.delta_generator import DeltaGenerator
 
 from ..components.metrics import make_metrics_components
-from ..components.paging import make_paging_component
-from ..helpers.compute import compute_rug_pulls
+from ..components.paging import make_paged_component
+from ..helpers.charts import (
+    GANTT_COMPACT_ROWS,
+    GANTT_MAX_SHAPES,
+    GANTT_OTHERS,
+    histogram,
+    merge_intervals,
+    scatter,
+)
+from ..helpers.compute import (
+    COMMIT_DATES_PATH,
+    compute_date_counts,
+    compute_gantt_page,
+    compute_gantt_pages,
+)
+from ..helpers.data import data_version
+from ..helpers.dates import (
+    COMMIT_DATE_COUNTS_PATH,
+    RUG_PULL_DATE_COUNTS_PATH,
+    date_quartiles,
+)
+from ..helpers.figures import (
+    FIGURE_CACHE_DISK_ENTRIES,
+    FigureCache,
+    figure_from_json,
+    figure_key,
+)
+from ..helpers.sql import (
+    RUG_PULLS_FILTERS,
+    dataset_version,
+    get_cvss_stats,
+    get_duration_stats,
+    get_group_stats,
+    get_rug_pull_counts,
+    get_rug_pulls_page,
+    get_rug_pulls_pages,
+    get_vulnerability_rows,
+    query,
+)
+from ..init.callbacks import change_page
+
+ss = st.session_state
 
 GRAPH_COLORS = {
     "workflow": "#072955",
@@ -20,20 +64,37 @@ GRAPH_COLORS = {
     "commit": "#008DFF",
     "rugpull": "#D73034",
 }
+TTX_COLORS = {
+    "Workflow": GRAPH_COLORS["workflow"],
+    "Action": GRAPH_COLORS["action"],
+}
+OVA_COLORS = {
+    "dep_fixable": GRAPH_COLORS["dependency"],
+    "fixable": GRAPH_COLORS["fixable"],
+    "unfixable": GRAPH_COLORS["unfixable"],
+}
+TTPF_COLORS = {
+    "dep_fixable": GRAPH_COLORS["dependency"],
+    "fixable": GRAPH_COLORS["fixable"],
+}
+RUG_PULLS_FILTER_LABELS = {
+    "all": "All",
+    "fixed": "Fixed",
+    "not_fixed": "Not Fixed",
+    "fixable": "Fixable",
+    "dep_fixable": "Fixable Deps.",
+    "unfixable": "Not Fixable",
+}
+DATASET_STATS_PATH = join(dirname(abspath(__file__)), "../../data/dataset_stats.csv")
+ACTIONS_PATH = join(dirname(abspath(__file__)), "../../data/actions.csv")
+ACTIONS_VERSIONS_PATH = join(
+    dirname(abspath(__file__)), "../../data/actions_versions.csv"
+)
 
 
-def _make_rug_pulls_metrics(rug_pulls: DataFrame) -> None:
-    fixed = rug_pulls[rug_pulls["fix_category"] == "fixed"]
-    not_fixed = rug_pulls[rug_pulls["fix_category"] != "fixed"]
-    fixable = not_fixed[not_fixed["fix_category"] == "fixable"]
-    fixable_deps = not_fixed[not_fixed["fix_category"] == "dep_fixable"]
-    not_fixable = not_fixed[not_fixed["fix_category"] == "unfixable"]
-
-    per_repo = rug_pulls.groupby(by=["repo"]).size()
-    per_workflow = rug_pulls.groupby(by=["repo", "workflow"]).size()
-    per_commit = rug_pulls.groupby(by=["repo", "workflow", "hash"]).size()
-    per_action = rug_pulls.groupby(by=["action"]).size()
-    per_action_version = rug_pulls.groupby(by=["action", "version"]).size()
+def _make_rug_pulls_metrics() -> None:
+    counts = get_rug_pull_counts()
+    stats = get_group_stats()
 
     make_metrics_components(
         labels=[
@@ -44,69 +105,23 @@ def _make_rug_pulls_metrics(rug_pulls: DataFrame) -> None:
             "# RP Actions",
             "# RP Action Versions",
         ],
-        values=[
-            int(len(rug_pulls)),
-            len(rug_pulls.groupby(["repo"])),
-            len(rug_pulls.groupby(["repo", "workflow"])),
-            len(rug_pulls.groupby(["repo", "workflow", "hash"])),
-            len(rug_pulls.groupby(["action"])),
-            len(rug_pulls.groupby(["action", "version"])),
-        ],
+        values=[counts["total"], *[int(groups) for groups in stats["groups"]]],
     )
 
     st.dataframe(
         DataFrame(
             {
-                "element": [
-                    "repository",
-                    "workflow",
-                    "commit",
-                    "action",
-                    "action version",
-                ],
-                "min": [
-                    int(per_repo.min()),
-                    int(per_workflow.min()),
-                    int(per_commit.min()),
-                    int(per_action.min()),
-                    int(per_action_version.min()),
-                ],
-                "max": [
-                    int(per_repo.max()),
-                    int(per_workflow.max()),
-                    int(per_commit.max()),
-                    int(per_action.max()),
-                    int(per_action_version.max()),
-                ],
-                "mean": [
-                    round(float(per_repo.mean()), 2),
-                    round(float(per_workflow.mean()), 2),
-                    round(float(per_commit.mean()), 2),
-                    round(float(per_action.mean()), 2),
-                    round(float(per_action_version.mean()), 2),
-                ],
-                "median": [
-                    int(per_repo.median()),
-                    int(per_workflow.median()),
-                    int(per_commit.median()),
-                    int(per_action.median()),
-                    int(per_action_version.median()),
-                ],
-                "stdev": [
-                    round(float(per_repo.std()), 2),
-                    round(float(per_workflow.std()), 2),
-                    round(float(per_commit.std()), 2),
-                    round(float(per_action.std()), 2),
-                    round(float(per_action_version.std()), 2),
-                ],
+                "element": list(stats.index),
+                "min": [int(x) for x in stats["min"]],
+                "max": [int(x) for x in stats["max"]],
+                "mean": [round(float(x), 2) for x in stats["mean"]],
+                "median": [int(x) for x in stats["median"]],
+                "stdev": [round(float(x), 2) for x in stats["stdev"]],
             }
         ),
         hide_index=True,
     )
 
-    workflow_maint = fixed[fixed["fix_actor"] == "Workflow"]
-    action_maint = fixed[fixed["fix_actor"] == "Action"]
-
     make_metrics_components(
         labels=[
             "# Fixed",
@@ -118,13 +133,13 @@ def _make_rug_pulls_metrics(rug_pulls: DataFrame) -> None:
             "% By Action Maint.",
         ],
         values=[
-            len(fixed),
-            round(len(fixed) * 100 / len(rug_pulls), 2),
+            counts["fixed"],
+            round(counts["fixed"] * 100 / counts["total"], 2),
             "",
-            len(workflow_maint),
-            round(len(workflow_maint) * 100 / len(rug_pulls), 2),
-            len(action_maint),
-            round(len(action_maint) * 100 / len(rug_pulls), 2),
+            counts["fixed_workflow"],
+            round(counts["fixed_workflow"] * 100 / counts["total"], 2),
+            counts["fixed_action"],
+            round(counts["fixed_action"] * 100 / counts["total"], 2),
         ],
         colors=["green", "green", "", "green", "green", "green", "green"],
     )
@@ -140,13 +155,13 @@ def _make_rug_pulls_metrics(rug_pulls: DataFrame) -> None:
             "% Fixable Deps.",
         ],
         values=[
-            len(not_fixed),
-            round(len(not_fixed) * 100 / len(rug_pulls), 2),
+            counts["not_fixed"],
+            round(counts["not_fixed"] * 100 / counts["total"], 2),
             "",
-            len(fixable),
-            round(len(fixable) * 100 / len(rug_pulls), 2),
-            len(fixable_deps),
-            round(len(fixable_deps) * 100 / len(rug_pulls), 2),
+            counts["fixable"],
+            round(counts["fixable"] * 100 / counts["total"], 2),
+            counts["dep_fixable"],
+            round(counts["dep_fixable"] * 100 / counts["total"], 2),
         ],
         colors=["red", "red", "", "orange", "orange", "orange", "orange"],
     )
@@ -157,300 +172,264 @@ def _make_rug_pulls_metrics(rug_pulls: DataFrame) -> None:
             "% Not Fixable",
         ],
         values=[
-            len(not_fixable),
-            round(len(not_fixable) * 100 / len(rug_pulls), 2),
+            counts["unfixable"],
+            round(counts["unfixable"] * 100 / counts["total"], 2),
         ],
         colors=["gray", "gray"],
     )
 
 
-def make_rug_pulls_component() -> None:
-    rug_pulled_workflows_title = st.container(
-        horizontal=True,
-        vertical_alignment="center",
-    )
-    rug_pulled_workflows_title.write("#### Rug-Pulled Actions")
-    _ = rug_pulled_workflows_title.text(
-        body="",
-        help="Rug-pulled workflow commits are those commits where the maintainers of"
-        + " the used Actions upgrade/downgrade their versions. By doing so, they introduce"
-        + " vulnerabilities in the workflow. Workflow maintainers do not introduce these"
-        + " vulnerabilities directly.",
+def _statistics_version() -> tuple[Any, ...]:
+    return (
+        dataset_version(),
+        *[
+            data_version(filepath)
+            for filepath in [
+                DATASET_STATS_PATH,
+                ACTIONS_PATH,
+                ACTIONS_VERSIONS_PATH,
+                COMMIT_DATE_COUNTS_PATH,
+                COMMIT_DATES_PATH,
+                RUG_PULL_DATE_COUNTS_PATH,
+            ]
+            if isfile(filepath)
+        ],
     )
 
-    st.write("##### Statistics")
 
-    rug_pulls = compute_rug_pulls()
-    fixed_df = rug_pulls[rug_pulls["fix_category"] == "fixed"]
-    not_fixed_df = rug_pulls[rug_pulls["fix_category"] != "fixed"]
-    dataset = read_csv(join(dirname(abspath(__file__)), "../../data/dataset_stats.csv"))
+@st.cache_resource(show_spinner=False)
+def _get_figure_cache() -> FigureCache:
+    env = dotenv_values(join(dirname(abspath(__file__)), "../../.env"))
 
-    make_metrics_components(
-        labels=[
-            "# Repositories",
-            "# Workflows",
-            "# Commits",
-            "# Actions",
-            "# Action Versions",
-            "# Dependencies",
-            "# Dependency Versions",
-            "# Vulnerabilities",
-        ],
-        values=[
-            int(dataset[dataset["element"] == "repository"]["total"]),
-            int(dataset[dataset["element"] == "workflow"]["total"]),
-            int(dataset[dataset["element"] == "commit (per workflow)"]["total"]),
-            int(dataset[dataset["element"] == "action (per commit)"]["unique"]),
-            int(dataset[dataset["element"] == "action version (per commit)"]["unique"]),
-            int(dataset[dataset["element"] == "dependency (per action)"]["unique"]),
-            int(
-                dataset[dataset["element"] == "dependency version (per action)"][
-                    "unique"
-                ]
-            ),
-            int(dataset[dataset["element"] == "vulnerability (per commit)"]["unique"]),
-        ],
+    return FigureCache(
+        directory=env.get("FIGURE_CACHE_DIR"),
+        max_disk_entries=int(
+            env.get("FIGURE_CACHE_DISK_ENTRIES") or FIGURE_CACHE_DISK_ENTRIES
+        ),
     )
 
-    st.dataframe(dataset.drop("unique", axis=1), hide_index=True)
-    _make_rug_pulls_metrics(rug_pulls)
 
-    # ===========================
+def _plot(
+    container: DeltaGenerator,
+    figure_id: str,
+    build: Callable[[], Figure],
+    *params: Any,
+    key: str | None = None,
+) -> None:
+    # Repeated views reuse the serialized figure, without querying the data or
+    # building the figure again
+    spec = _get_figure_cache().get_or_build(
+        figure_key(figure_id, _statistics_version(), params), build
+    )
 
-    st.write("##### Plots")
+    container.plotly_chart(figure_from_json(spec), key=key)
 
-    fixed = rug_pulls[rug_pulls["fix_category"] == "fixed"]
-    not_fixed = rug_pulls[rug_pulls["fix_category"] != "fixed"]
-    fixable = not_fixed_df[not_fixed_df["fix_category"] != "unfixable"]
-    not_fixable = not_fixed[not_fixed["fix_category"] == "unfixable"]
 
-    make_metrics_components(
-        labels=[
-            "Min. TTX (days)",
-            "Max. TTX (days)",
-            "Med. TTX (days)",
-            "MTTX (days)",
-            "Std. TTX (days)",
-        ],
-        values=[
-            int(fixed["ttx"].min() if len(fixed["ttx"]) > 0 else 0),
-            int(fixed["ttx"].max() if len(fixed["ttx"]) > 0 else 0),
-            int(fixed["ttx"].median() if len(fixed["ttx"]) > 0 else 0),
-            round(fixed["ttx"].mean(), 2) if len(fixed["ttx"]) > 0 else 0,
-            round(fixed["ttx"].std(), 2) if len(fixed["ttx"]) > 0 else 0,
-        ],
+def _load_fixed() -> DataFrame:
+    return query(
+        "SELECT date, ttx, fix_actor FROM rug_pulls"
+        + f' WHERE {RUG_PULLS_FILTERS["fixed"]} ORDER BY date, "#"'
     )
 
-    make_metrics_components(
-        labels=[
-            "Min. TTPF (days)",
-            "Max. TTPF (days)",
-            "Med. TTPF (days)",
-            "MTTPF (days)",
-            "Std. TTPF (days)",
-        ],
-        values=[
-            int(fixable["ttpf"].min()) if len(fixable["ttpf"]) > 0 else 0,
-            int(fixable["ttpf"].max()) if len(fixable["ttpf"]) > 0 else 0,
-            int(fixable["ttpf"].median()) if len(fixable["ttpf"]) > 0 else 0,
-            round(fixable["ttpf"].mean(), 2) if len(fixable["ttpf"]) > 0 else 0,
-            round(fixable["ttpf"].std(), 2) if len(fixable["ttpf"]) > 0 else 0,
-        ],
-    )
 
-    make_metrics_components(
-        labels=[
-            "Min. OVA (days)",
-            "Max. OVA (days)",
-            "Med. OVA (days)",
-            "MOVA (days)",
-            "Std. OVA (days)",
-        ],
-        values=[
-            int(not_fixed["elapsed"].dropna().min())
-            if len(not_fixed["elapsed"].dropna()) > 0
-            else 0,
-            int(not_fixed["elapsed"].dropna().max())
-            if len(not_fixed["elapsed"].dropna()) > 0
-            else 0,
-            int(not_fixed["elapsed"].dropna().median())
-            if len(not_fixed["elapsed"].dropna()) > 0
-            else 0,
-            round(not_fixed["elapsed"].dropna().mean(), 2)
-            if len(not_fixed["elapsed"].dropna()) > 0
-            else 0,
-            round(not_fixed["elapsed"].dropna().std(), 2)
-            if len(not_fixed["elapsed"].dropna()) > 0
-            else 0,
-        ],
+def _load_not_fixed() -> DataFrame:
+    return query(
+        "SELECT date, elapsed, ttpf, fix_category FROM rug_pulls"
+        + f' WHERE {RUG_PULLS_FILTERS["not_fixed"]} ORDER BY date, "#"'
     )
 
-    cols_o2 = st.columns(3)
 
-    figo21 = ex.histogram(
-        fixed_df.sort_values(by="date"),
+def _load_ttpf() -> DataFrame:
+    not_fixed_df = _load_not_fixed()
+
+    return not_fixed_df[not_fixed_df["fix_category"] != "unfixable"]
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _load_actions_stats(
+    version: tuple[Any, ...],
+) -> tuple[DataFrame, DataFrame, DataFrame]:
+    actions_popularity = read_csv(ACTIONS_PATH)
+
+    actions_popularity = actions_popularity.sort_values(by="action").set_index("action")
+    action_versions = read_csv(ACTIONS_VERSIONS_PATH).set_index("action")
+    actions_rugpulls = query(
+        """
+        SELECT action, count(*) AS value, count(DISTINCT date) AS date
+        FROM rug_pulls
+        GROUP BY action
+        ORDER BY action
+        """
+    ).set_index("action")
+    merged = (
+        actions_rugpulls[["value"]]
+        .merge(actions_popularity, left_index=True, right_index=True, how="outer")
+        .merge(actions_rugpulls[["date"]], left_index=True, right_index=True, how="outer")
+        .merge(action_versions, left_index=True, right_index=True, how="outer")
+        .reset_index()
+        .rename(
+            columns={
+                "count": "uses",
+                "value": "rug pulls",
+                "action_d": "versions",
+                "date": "rp versions",
+            }
+        )
+    ).fillna(0)
+
+    added_freqs = DataFrame(merged.groupby(by=["rug pulls", "uses"]).size())
+    freqs1 = merged.merge(
+        added_freqs, left_on=["rug pulls", "uses"], right_index=True, how="outer"
+    ).rename(columns={0: "count"})
+
+    added_freqs = DataFrame(merged.groupby(by=["rp versions", "versions"]).size())
+    freqs = merged.merge(
+        added_freqs, left_on=["rp versions", "versions"], right_index=True, how="outer"
+    ).rename(columns={0: "count"})
+
+    return merged, freqs1, freqs
+
+
+def _make_ttx_histogram(server: bool) -> Figure:
+    figo21 = histogram(
+        _load_fixed(),
         x="ttx",
         color="fix_actor",
-        title="TTX (overall)",
+        colors=TTX_COLORS,
+        names={"Workflow": "TTXw", "Action": "TTXa"},
+        labels={"ttx": "TTX", "fix_actor": "Actor"},
         nbins=100,
-        color_discrete_map={
-            "Workflow": GRAPH_COLORS["workflow"],
-            "Action": GRAPH_COLORS["action"],
-        },
-        labels={
-            "ttx": "TTX",
-            "fix_actor": "Actor",
-        },
-        marginal="box",
+        title="TTX (overall)",
         barmode="overlay",
+        server=server,
     )
-    figo21.data[0].name = "TTXw"
-    figo21.data[2].name = "TTXa"
     figo21.update_layout(yaxis_title="rug pull count")
 
-    figo21a = ex.scatter(
-        fixed_df.sort_values(by="date"),
+    return figo21.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def _make_ttx_scatter(server: bool) -> Figure:
+    figo21a = scatter(
+        _load_fixed(),
         x="date",
         y="ttx",
         color="fix_actor",
-        color_discrete_map={
-            "Workflow": GRAPH_COLORS["workflow"],
-            "Action": GRAPH_COLORS["action"],
-        },
-        labels={
-            "fix_actor": "Actor",
-        },
+        colors=TTX_COLORS,
+        names={"Workflow": "TTXw", "Action": "TTXa"},
+        labels={"fix_actor": "Actor"},
+        server=server,
     )
-
-    figo21a.data[0].name = "TTXw"
-    figo21a.data[1].name = "TTXa"
     figo21a.update_layout(yaxis_title="TTX")
 
-    figo22 = ex.histogram(
-        not_fixed_df.sort_values(by="date"),
+    return figo21a.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def _make_ova_histogram(server: bool) -> Figure:
+    figo22 = histogram(
+        _load_not_fixed(),
         x="elapsed",
-        title="OVA (overall)",
-        labels={
-            "elapsed": "OVA",
-            "fix_category": "Type",
-        },
         color="fix_category",
+        colors=OVA_COLORS,
+        names={"dep_fixable": "OVAj", "fixable": "OVAa", "unfixable": "OVAu"},
+        labels={"elapsed": "OVA", "fix_category": "Type"},
         nbins=100,
-        color_discrete_map={
-            "dep_fixable": GRAPH_COLORS["dependency"],
-            "fixable": GRAPH_COLORS["fixable"],
-            "unfixable": GRAPH_COLORS["unfixable"],
-        },
-        marginal="box",
+        title="OVA (overall)",
         barmode="overlay",
+        server=server,
     )
-    figo22.data[0].name = "OVAj"
-    figo22.data[2].name = "OVAa"
-    figo22.data[4].name = "OVAu"
     figo22.update_layout(yaxis_title="rug pull count")
 
-    figo22a = ex.scatter(
-        not_fixed_df.sort_values(by="date"),
+    return figo22.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def _make_ova_scatter(server: bool) -> Figure:
+    figo22a = scatter(
+        _load_not_fixed(),
         x="date",
         y="elapsed",
-        labels={
-            "elapsed": "ova",
-            "fix_category": "Type",
-        },
         color="fix_category",
-        color_discrete_map={
-            "dep_fixable": GRAPH_COLORS["dependency"],
-            "fixable": GRAPH_COLORS["fixable"],
-            "unfixable": GRAPH_COLORS["unfixable"],
-        },
+        colors=OVA_COLORS,
+        names={"dep_fixable": "OVAj", "fixable": "OVAa", "unfixable": "OVAu"},
+        labels={"elapsed": "ova", "fix_category": "Type"},
+        server=server,
     )
-
-    figo22a.data[0].name = "OVAj"
-    figo22a.data[1].name = "OVAa"
-    figo22a.data[2].name = "OVAu"
     figo22a.update_layout(yaxis_title="OVA")
 
-    figo23 = ex.histogram(
-        not_fixed_df[not_fixed_df["fix_category"] != "unfixable"].sort_values(
-            by="date"
-        ),
+    return figo22a.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def _make_ttpf_histogram(server: bool) -> Figure:
+    figo23 = histogram(
+        _load_ttpf(),
         x="ttpf",
-        title="TTPF (overall)",
         color="fix_category",
+        colors=TTPF_COLORS,
+        names={"dep_fixable": "TTPFj", "fixable": "TTPFa"},
+        labels={"ttpf": "TTPF", "fix_category": "Type"},
         nbins=100,
-        color_discrete_map={
-            "dep_fixable": GRAPH_COLORS["dependency"],
-            "fixable": GRAPH_COLORS["fixable"],
-        },
-        labels={
-            "ttpf": "TTPF",
-            "fix_category": "Type",
-        },
-        marginal="box",
+        title="TTPF (overall)",
         barmode="overlay",
+        server=server,
     )
-    figo23.data[0].name = "TTPFj"
-    figo23.data[2].name = "TTPFa"
     figo23.update_layout(yaxis_title="rug pull count")
 
-    figo23a = ex.scatter(
-        not_fixed_df[not_fixed_df["fix_category"] != "unfixable"].sort_values(
-            by="date"
-        ),
+    return figo23.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+
+def _make_ttpf_scatter(server: bool) -> Figure:
+    figo23a = scatter(
+        _load_ttpf(),
         x="date",
         y="ttpf",
         color="fix_category",
-        color_discrete_map={
-            "dep_fixable": GRAPH_COLORS["dependency"],
-            "fixable": GRAPH_COLORS["fixable"],
-        },
-        labels={
-            "fix_category": "Type",
-        },
+        colors=TTPF_COLORS,
+        names={"dep_fixable": "TTPFj", "fixable": "TTPFa"},
+        labels={"fix_category": "Type"},
+        server=server,
     )
-
-    figo23a.data[0].name = "TTPFj"
-    figo23a.data[1].name = "TTPFa"
     figo23a.update_layout(yaxis_title="TTPF")
 
-    figo21.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    figo21a.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    figo22.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    figo22a.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    figo23.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    figo23a.update_layout(
+    return figo23a.update_layout(
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
 
-    cols_o2[0].plotly_chart(figo21)
-    cols_o2[0].plotly_chart(figo21a)
-    cols_o2[2].plotly_chart(figo22)
-    cols_o2[2].plotly_chart(figo22a)
-    cols_o2[1].plotly_chart(figo23)
-    cols_o2[1].plotly_chart(figo23a)
 
-    rug_pulls_mod = rug_pulls.copy()
-    rug_pulls_mod["fix_category"] = (
-        rug_pulls_mod["fix_category"] + " " + rug_pulls_mod["fix_actor"].fillna("")
+def _make_years_box() -> Figure:
+    rug_pulls_mod = query(
+        """
+        SELECT
+            fix_category || ' ' || coalesce(fix_actor, '') AS fix_category,
+            year(date) AS year,
+            elapsed
+        FROM rug_pulls
+        ORDER BY "#"
+        """
     )
-    rug_pulls_mod["year"] = rug_pulls["date"].apply(lambda x: x.year)
-    rug_pulls_mod["days"] = rug_pulls["ttx"].fillna(rug_pulls["elapsed"])
 
     histo_years = ex.box(
         rug_pulls_mod,
         x="year",
         y="elapsed",
         color="fix_category",
+        category_orders={
+            "fix_category": [
+                "unfixable ",
+                "fixed Workflow",
+                "fixed Action",
+                "fixable ",
+                "dep_fixable ",
+            ]
+        },
         orientation="v",
         color_discrete_map={
             "unfixable ": GRAPH_COLORS["unfixable"],
@@ -479,99 +458,118 @@ def make_rug_pulls_component() -> None:
 
     # write_image(histo_years, "./years-histo.pdf", format="pdf", width=800)
 
-    st.plotly_chart(histo_years)
+    return histo_years
 
-    # ===========================
 
-    deps_df = rug_pulls.explode("vulns_list")
-    deps_df["vulns_list"] = deps_df["vulns_list"].apply(
-        lambda x: x.split("@v.")[1].split(" - ")[1]
+def _make_dependency_types_histogram(barnorm: str | None) -> Figure:
+    direct_indirect = query(
+        """
+        SELECT date, subtype AS type
+        FROM (
+            SELECT DISTINCT rug_pull, dependency, subtype
+            FROM rug_pull_vulnerabilities
+        ) AS deps
+        JOIN rug_pulls ON rug_pulls."#" = deps.rug_pull
+        ORDER BY date, rug_pull, dependency
+        """
     )
-    direct_indirect = deps_df[["date", "vulns_list"]].rename(
-        columns={"vulns_list": "type"}
+
+    return ex.histogram(
+        direct_indirect.sort_values(by="date"),
+        x="date",
+        color="type",
+        barnorm=barnorm,
+        color_discrete_map={
+            "direct": "blue",
+            "indirect": "lightblue",
+            "direct_dev": "red",
+        },
     )
 
-    fig2 = ex.histogram(rug_pulls, x="action", title="# of Rug Pulls per Action")
-    fig2 = fig2.update_xaxes(categoryorder="total descending")
 
-    commit_dates = read_csv(
-        join(dirname(abspath(__file__)), "../../data/commit_dates.csv")
-    )
-    commit_dates["date"] = commit_dates["date"].astype("datetime64[s]")
-    commit_dates["type"] = ["commit" for _ in range(len(commit_dates))]
-    rug_pull_dates = DataFrame(
-        {
-            "date": rug_pulls["date"],
-            "type": ["rug pull" for _ in range(len(rug_pulls["date"]))],
-        }
+def _make_dates_histogram(frequency: str) -> Figure:
+    date_counts = compute_date_counts()
+    counts = date_counts[date_counts["frequency"] == frequency]
+    # The box plots are drawn from the quartiles of the daily counts
+    daily = date_counts[date_counts["frequency"] == "day"]
+
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02
     )
 
-    df = concat([commit_dates, rug_pull_dates])
+    for date_type in ["commit", "rug pull"]:
+        color = GRAPH_COLORS["commit" if date_type == "commit" else "rugpull"]
+        type_counts = counts[counts["type"] == date_type]
 
-    actions_popularity = read_csv(
-        join(dirname(abspath(__file__)), "../../data/actions.csv")
-    )
+        if len(type_counts) == 0:
+            continue
 
-    actions_popularity = actions_popularity.sort_values(by="action").set_index("action")
-    action_versions = read_csv(
-        join(dirname(abspath(__file__)), "../../data/actions_versions.csv")
-    ).set_index("action")
-    rp_action_versions = (
-        rug_pulls[["action", "date"]].drop_duplicates().groupby(by="action").count()
-    )
-    actions_rugpulls = (
-        DataFrame([rug_pulls["action"].value_counts().rename("rps")])
-        .melt()
-        .set_index("action")
-        .sort_values(by="action")
-    )
-    merged = (
-        actions_rugpulls.merge(
-            actions_popularity, left_index=True, right_index=True, how="outer"
+        quartiles = date_quartiles(daily[daily["type"] == date_type])
+
+        fig.add_trace(
+            Bar(
+                x=type_counts["date"],
+                y=type_counts["count"],
+                name=date_type,
+                legendgroup=date_type,
+                marker_color=color,
+                opacity=0.5,
+            ),
+            row=2,
+            col=1,
         )
-        .merge(rp_action_versions, left_index=True, right_index=True, how="outer")
-        .merge(action_versions, left_index=True, right_index=True, how="outer")
-        .reset_index()
-        .rename(
-            columns={
-                "count": "uses",
-                "value": "rug pulls",
-                "action_d": "versions",
-                "date": "rp versions",
-            }
+        fig.add_trace(
+            Box(
+                y=[date_type],
+                **{key: [value] for key, value in quartiles.items()},
+                orientation="h",
+                name=date_type,
+                legendgroup=date_type,
+                showlegend=False,
+                marker_color=color,
+            ),
+            row=1,
+            col=1,
         )
-    ).fillna(0)
 
-    added_freqs = DataFrame(merged.groupby(by=["rug pulls", "uses"]).size())
-    freqs1 = merged.merge(
-        added_freqs, left_on=["rug pulls", "uses"], right_index=True, how="outer"
-    ).rename(columns={0: "count"})
+    fig.update_layout(
+        barmode="overlay",
+        bargap=0,
+        yaxis={"showticklabels": False},
+        yaxis2_title="count",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
 
-    fign = ex.scatter(
+    return fig
+
+
+def _make_uses_scatter(server: bool) -> Figure:
+    _, freqs1, _ = _load_actions_stats(_statistics_version())
+
+    return scatter(
         freqs1,
         y="rug pulls",
         x="uses",
-        color_discrete_sequence=[GRAPH_COLORS["workflow"]],
+        color=None,
+        colors={"": GRAPH_COLORS["workflow"]},
+        names={},
         labels={
             "rug pulls": "# rug pulled Actions",
             "uses": "# used Actions",
             "color": "density",
         },
-        hover_data={"name": freqs1["action"]},
+        hover="action",
         log_x=True,
         log_y=True,
+        server=server,
     )
 
-    st.dataframe(freqs1)
 
+def _make_versions_scatter() -> Figure:
+    merged, _, freqs = _load_actions_stats(_statistics_version())
     max_xy = max(merged["versions"].max(), merged["rp versions"].max()) + 1
 
-    added_freqs = DataFrame(merged.groupby(by=["rp versions", "versions"]).size())
-    freqs = merged.merge(
-        added_freqs, left_on=["rp versions", "versions"], right_index=True, how="outer"
-    ).rename(columns={0: "count"})
-
-    fign1 = ex.scatter(
+    return ex.scatter(
         freqs,
         y="rp versions",
         x="versions",
@@ -595,109 +593,182 @@ def make_rug_pulls_component() -> None:
         opacity=0.3,
     )
 
-    fig3 = ex.histogram(
-        df,
-        x="date",
-        histfunc="count",
-        color="type",
-        marginal="box",
-        barmode="overlay",
-        color_discrete_map={
-            "commit": GRAPH_COLORS["commit"],
-            "rug pull": GRAPH_COLORS["rugpull"],
+
+def _make_cvss_histogram(server: bool) -> Figure:
+    direct_indirect_df = get_vulnerability_rows()
+
+    histo = histogram(
+        direct_indirect_df[direct_indirect_df["severity"] > 0.0],
+        x="severity",
+        color="fix_category",
+        colors={
+            "fixed Workflow": GRAPH_COLORS["workflow"],
+            "fixed Action": GRAPH_COLORS["action"],
+            "dep_fixable ": GRAPH_COLORS["dependency"],
+            "unfixable ": GRAPH_COLORS["unfixable"],
+            "fixable ": GRAPH_COLORS["fixable"],
         },
+        names={
+            "fixed Workflow": "Fixed (Workflow)",
+            "fixed Action": "Fixed (Action)",
+            "dep_fixable ": "Fixable (JS Dep.)",
+            "unfixable ": "Unfixable",
+            "fixable ": "Fixable (Action)",
+        },
+        labels={"severity": "CVSS", "fix_category": "Category"},
+        nbins=16,
+        server=server,
     )
 
-    fig3.update_layout(
+    histo.update_layout(yaxis_title="# used dependencies")
+    histo.update_xaxes(range=[0, 10.0])
+
+    histo.update_layout(
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
 
-    fig = ex.histogram(
-        direct_indirect.sort_values(by="date"),
-        x="date",
-        color="type",
-        color_discrete_map={
-            "direct": "blue",
-            "indirect": "lightblue",
-            "direct_dev": "red",
-        },
-    )
+    # fign.update_layout(yaxis_title="% rug pull")
+    # histo.update_xaxes(showgrid=False, zeroline=False)
+    # histo.update_yaxes(showgrid=True, zeroline=False)
 
-    fig1 = ex.histogram(
-        direct_indirect.sort_values(by="date"),
-        x="date",
-        color="type",
-        barnorm="fraction",
-        color_discrete_map={
-            "direct": "blue",
-            "indirect": "lightblue",
-            "direct_dev": "red",
-        },
-    )
+    # write_image(histo, "./cvss-histo.pdf", format="pdf")
 
-    st.plotly_chart(fig)
-    st.plotly_chart(fig1)
+    return histo
 
-    _ = st.plotly_chart(fig3, key="hist")
 
-    fig.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    fig1.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+def _make_severity_histogram() -> Figure:
+    buckets = get_cvss_stats()["buckets"]
+
+    return ex.bar(
+        buckets[buckets["group"] != ""],
+        x="group",
+        y="count",
+        color="fix_category",
+        category_orders={"group": ["low", "medium", "high", "critical"]},
     )
 
-    st.dataframe(merged.sort_values(by="rug pulls", ascending=False))
 
-    coln = st.columns(2)
-    coln[0].plotly_chart(fign)
-    coln[1].plotly_chart(fign1)
-
-    # _ = st.plotly_chart(fig2)
-
-    direct_indirect_df = (
-        rug_pulls.explode("vulns_list")[
-            [
-                "action",
-                "vulns_list",
-                "vulns_severities",
-                "date",
-                "fix_category",
-                "fix_actor",
-                "version",
-            ]
-        ]
-        .explode("vulns_severities")
-        .sort_values(by="date")
-    )
-    direct_indirect_df["version"] = direct_indirect_df["vulns_list"].apply(
-        lambda x: x.split(" - ")[0].split("@v.")[1]
-    )
-    direct_indirect_df["vuln"] = direct_indirect_df["vulns_severities"].apply(
-        lambda x: x.split(" // ")[0]
+@st.fragment
+def make_rug_pulls_component() -> None:
+    rug_pulled_workflows_title = st.container(
+        horizontal=True,
+        vertical_alignment="center",
     )
-    direct_indirect_df["vuln1"] = direct_indirect_df["vulns_list"].apply(
-        lambda x: x.split(" - ")[0].split("@v.")[0]
+    rug_pulled_workflows_title.write("#### Rug-Pulled Actions")
+    _ = rug_pulled_workflows_title.text(
+        body="",
+        help="Rug-pulled workflow commits are those commits where the maintainers of"
+        + " the used Actions upgrade/downgrade their versions. By doing so, they introduce"
+        + " vulnerabilities in the workflow. Workflow maintainers do not introduce these"
+        + " vulnerabilities directly.",
     )
 
-    direct_indirect_df["used as"] = direct_indirect_df["vulns_list"].apply(
-        lambda x: x.split(" - ")[1]
+    st.write("##### Statistics")
+
+    dataset = read_csv(DATASET_STATS_PATH)
+
+    make_metrics_components(
+        labels=[
+            "# Repositories",
+            "# Workflows",
+            "# Commits",
+            "# Actions",
+            "# Action Versions",
+            "# Dependencies",
+            "# Dependency Versions",
+            "# Vulnerabilities",
+        ],
+        values=[
+            int(dataset[dataset["element"] == "repository"]["total"]),
+            int(dataset[dataset["element"] == "workflow"]["total"]),
+            int(dataset[dataset["element"] == "commit (per workflow)"]["total"]),
+            int(dataset[dataset["element"] == "action (per commit)"]["unique"]),
+            int(dataset[dataset["element"] == "action version (per commit)"]["unique"]),
+            int(dataset[dataset["element"] == "dependency (per action)"]["unique"]),
+            int(
+                dataset[dataset["element"] == "dependency version (per action)"][
+                    "unique"
+                ]
+            ),
+            int(dataset[dataset["element"] == "vulnerability (per commit)"]["unique"]),
+        ],
     )
-    direct_indirect_df["vulns_list"] = direct_indirect_df["vulns_list"].apply(
-        lambda x: x.split(" - ")[0]
+
+    st.dataframe(dataset.drop("unique", axis=1), hide_index=True)
+    _make_rug_pulls_metrics()
+
+    # ===========================
+
+    st.write("##### Plots")
+
+    durations = get_duration_stats()
+
+    for duration, name in [("ttx", "TTX"), ("ttpf", "TTPF"), ("elapsed", "OVA")]:
+        stats = durations.loc[duration]
+        empty = stats["count"] == 0
+
+        make_metrics_components(
+            labels=[
+                f"Min. {name} (days)",
+                f"Max. {name} (days)",
+                f"Med. {name} (days)",
+                f"M{name} (days)",
+                f"Std. {name} (days)",
+            ],
+            values=[
+                int(stats["min"]) if not empty else 0,
+                int(stats["max"]) if not empty else 0,
+                int(stats["median"]) if not empty else 0,
+                round(stats["mean"], 2) if not empty else 0,
+                round(stats["stdev"], 2) if not empty else 0,
+            ],
+        )
+
+    # Large charts are binned, or decimated, before being sent to the browser
+    server = st.toggle("Server-side charts", value=True, key="server_charts")
+    cols_o2 = st.columns(3)
+
+    _plot(cols_o2[0], "ttx_histogram", lambda: _make_ttx_histogram(server), server)
+    _plot(cols_o2[0], "ttx_scatter", lambda: _make_ttx_scatter(server), server)
+    _plot(cols_o2[2], "ova_histogram", lambda: _make_ova_histogram(server), server)
+    _plot(cols_o2[2], "ova_scatter", lambda: _make_ova_scatter(server), server)
+    _plot(cols_o2[1], "ttpf_histogram", lambda: _make_ttpf_histogram(server), server)
+    _plot(cols_o2[1], "ttpf_scatter", lambda: _make_ttpf_scatter(server), server)
+
+    _plot(st, "years_box", _make_years_box)
+
+    # ===========================
+
+    merged, freqs1, _ = _load_actions_stats(_statistics_version())
+
+    st.dataframe(freqs1)
+
+    _plot(st, "dependency_types", lambda: _make_dependency_types_histogram(None))
+    _plot(
+        st,
+        "dependency_types_fraction",
+        lambda: _make_dependency_types_histogram("fraction"),
     )
-    direct_indirect_df["cve"] = direct_indirect_df["vulns_severities"].apply(
-        lambda x: x.split(" // ")[1]
+
+    frequency = st.segmented_control(
+        "Bin size", ["day", "week", "month"], default="week", key="dates_frequency"
     )
-    direct_indirect_df["severity"] = (
-        direct_indirect_df["vulns_severities"]
-        .apply(lambda x: x.split(" // ")[2])
-        .map(float)
+    _plot(
+        st,
+        "dates_histogram",
+        lambda: _make_dates_histogram(frequency or "week"),
+        frequency or "week",
+        key="hist",
     )
 
-    direct_indirect_df = direct_indirect_df[
-        direct_indirect_df[["vuln", "vuln1"]].nunique(axis=1) == 1
-    ]
+    st.dataframe(merged.sort_values(by="rug pulls", ascending=False))
+
+    coln = st.columns(2)
+    _plot(coln[0], "uses_scatter", lambda: _make_uses_scatter(server), server)
+    _plot(coln[1], "versions_scatter", _make_versions_scatter)
+
+    direct_indirect_df = get_vulnerability_rows()
+    cvss_stats = get_cvss_stats()
 
     make_metrics_components(
         labels=[
@@ -706,26 +777,15 @@ def make_rug_pulls_component() -> None:
             "Distinct CVEs",
         ],
         values=[
-            direct_indirect_df["cve"]
-            .value_counts()
-            .sort_values(ascending=False)
-            .index[0],
-            direct_indirect_df["cve"]
-            .value_counts()
-            .sort_values(ascending=False)
-            .iloc[0],
-            direct_indirect_df["cve"].nunique(),
+            cvss_stats["cves"].index[0],
+            cvss_stats["cves"]["count"].iloc[0],
+            len(cvss_stats["cves"]),
         ],
     )
 
-    direct_indirect_df["fix_actor"] = direct_indirect_df["fix_actor"].fillna("")
-    direct_indirect_df["fix_category"] = (
-        direct_indirect_df["fix_category"] + " " + direct_indirect_df["fix_actor"]
-    )
-
     st.dataframe(direct_indirect_df)
 
-    for name, filter in zip(
+    for name, category in zip(
         ["", "(Fixed W.)", "(Fixed A.)", "(Fixable J.)", "(Fixable A.)", "(Unfixable)"],
         [
             "",
@@ -736,15 +796,7 @@ def make_rug_pulls_component() -> None:
             "unfixable ",
         ],
     ):
-        df_cvss = direct_indirect_df[
-            (direct_indirect_df["severity"] > 0.0)
-            & (direct_indirect_df["fix_category"] == filter)
-        ]["severity"]
-
-        if filter == "":
-            df_cvss = direct_indirect_df[direct_indirect_df["severity"] > 0.0][
-                "severity"
-            ]
+        stats = cvss_stats["cvss"].reindex([category]).iloc[0]
 
         make_metrics_components(
             labels=[
@@ -755,87 +807,24 @@ def make_rug_pulls_component() -> None:
                 f"Std. CVSS Score {name}",
             ],
             values=[
-                df_cvss.min(),
-                df_cvss.max(),
-                df_cvss.median(),
-                round(df_cvss.mean(), 2),
-                round(df_cvss.std(), 2),
+                stats["min"],
+                stats["max"],
+                stats["median"],
+                round(stats["mean"], 2),
+                round(stats["std"], 2),
             ],
         )
 
-    histo = ex.histogram(
-        direct_indirect_df[direct_indirect_df["severity"] > 0.0],
-        x="severity",
-        color="fix_category",
-        color_discrete_sequence=[
-            GRAPH_COLORS["workflow"],
-            GRAPH_COLORS["action"],
-            GRAPH_COLORS["dependency"],
-            GRAPH_COLORS["unfixable"],
-            GRAPH_COLORS["fixable"],
-        ],
-        nbins=16,
-        labels={
-            "severity": "CVSS",
-            "fix_category": "Category",
-        },
-        marginal="box",
-    )
-
-    histo.data[0].name = "Fixed (Workflow)"
-    histo.data[2].name = "Fixed (Action)"
-    histo.data[4].name = "Fixable (JS Dep.)"
-    histo.data[6].name = "Unfixable"
-    histo.data[8].name = "Fixable (Action)"
-    histo.update_layout(yaxis_title="# used dependencies")
-    histo.update_xaxes(range=[0, 10.0])
-
-    histo.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
+    _plot(st, "cvss_histogram", lambda: _make_cvss_histogram(server), server)
+    _plot(st, "severity_histogram", _make_severity_histogram)
 
-    # fign.update_layout(yaxis_title="% rug pull")
-    # histo.update_xaxes(showgrid=False, zeroline=False)
-    # histo.update_yaxes(showgrid=True, zeroline=False)
-
-    # write_image(histo, "./cvss-histo.pdf", format="pdf")
-
-    st.plotly_chart(histo)
-
-    def get_group(cvss) -> str:
-        if 0.1 < cvss <= 3.99:
-            return "low"
-        elif 4.0 < cvss <= 6.99:
-            return "medium"
-        elif 7.0 < cvss <= 8.99:
-            return "high"
-        elif 9.0 < cvss <= 10.0:
-            return "critical"
-        else:
-            return ""
-
-    gt0 = direct_indirect_df[direct_indirect_df["severity"] > 0.0]
-    gt0["rp"] = gt0["action"] + gt0["date"].apply(str)
-    gt0["group"] = gt0["severity"].apply(lambda x: get_group(x))
-    gt0.drop_duplicates(inplace=True)
-
-    st.plotly_chart(
-        ex.histogram(
-            gt0[gt0["group"] != ""],
-            x="group",
-            color="fix_category",
-        )
-    )
+    severities = cvss_stats["buckets"].groupby("group")["count"].sum()
 
     st.write(
-        f"Low: {len(gt0[gt0["group"] == "low"])} // ",
-        f"Medium: {len(gt0[gt0["group"] == "medium"])} // ",
-        f"High: {len(gt0[gt0["group"] == "high"])} // ",
-        f"Critical: {len(gt0[gt0["group"] == "critical"])}",
-    )
-
-    figo21.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        f"Low: {severities.get("low", 0)} // ",
+        f"Medium: {severities.get("medium", 0)} // ",
+        f"High: {severities.get("high", 0)} // ",
+        f"Critical: {severities.get("critical", 0)}",
     )
 
     cves_cols = st.columns(2)
@@ -860,178 +849,213 @@ def make_rug_pulls_component() -> None:
     cves_cols[0].dataframe(cves.sort_values(by="length", ascending=False))
     cves_cols[1].dataframe(sevs.sort_values(by="length", ascending=False))
 
-    direct_df = (
-        direct_indirect_df[direct_indirect_df["used as"] == "direct"][
-            ["cve", "severity", "vuln"]
-        ]
-        .value_counts()
-        .sort_values(ascending=False)
-    )
-    indirect_df = (
-        direct_indirect_df[direct_indirect_df["used as"] == "indirect"][
-            ["cve", "severity", "vuln"]
-        ]
-        .value_counts()
-        .sort_values(ascending=False)
-    )
-    total_df = (
-        direct_indirect_df[["cve", "severity", "vulns_list"]]
-        .value_counts()
-        .sort_values(ascending=False)
-    )
-
     cols_deps = st.columns(3)
     cols_deps[0].write("##### Direct Dependencies")
-    cols_deps[0].dataframe(direct_df)
+    cols_deps[0].dataframe(cvss_stats["direct"])
     cols_deps[1].write("##### Indirect Dependencies")
-    cols_deps[1].dataframe(indirect_df)
+    cols_deps[1].dataframe(cvss_stats["indirect"])
     cols_deps[2].write("##### Dependencies")
-    cols_deps[2].dataframe(total_df)
+    cols_deps[2].dataframe(cvss_stats["total"])
 
-    st.dataframe(
-        DataFrame(direct_df)
-        .merge(
-            DataFrame(indirect_df),
-            left_index=True,
-            right_index=True,
-            how="outer",
+    st.dataframe(cvss_stats["breakdown"])
+
+
+def _make_gantt_timeline(rug_pulls: DataFrame) -> Figure:
+    no_fix = rug_pulls[rug_pulls["fix_category"] != "fixed"]
+    fixable = no_fix[rug_pulls["fix_category"] != "unfixable"]
+
+    names = rug_pulls["action"]
+    actions = (
+        rug_pulls["action"]
+        + "@"
+        + rug_pulls["version"]
+        + " ("
+        + rug_pulls["date"].map(str)
+        + ")"
+    )
+    start_dates = rug_pulls["date"].to_list()
+    end_dates = where(
+        rug_pulls["fix_category"] == "fixed",
+        rug_pulls["fix_date"],
+        rug_pulls["last"],
+    )
+    colors = where(
+        rug_pulls["fix_category"] == "fixed", rug_pulls["fix_actor"], "Unfixed"
+    )
+    versions = rug_pulls["fix_version"].to_list()
+
+    df = [
+        dict(
+            id=ind,
+            Action=task,
+            Start=start,
+            Finish=finish,
+            Fix_Actor=color,
+            Fix_Version=", ".join(version),
         )
-        .reset_index()
-        .set_index(["cve", "severity", "vuln"])
-        .merge(
-            DataFrame(total_df),
-            left_index=True,
-            right_index=True,
-            how="outer",
+        for ind, task, start, finish, color, version in zip(
+            names, actions, start_dates, end_dates, colors, versions
         )
-        .dropna()
-        .rename(columns={"count_x": "direct", "count_y": "indirect", "count": "total"})
-        .sort_values(by="total", ascending=False)
-    )
-
+    ]
 
-def make_gantt_charts():
-    rug_pulls = compute_rug_pulls()
-    fixed_df = rug_pulls[rug_pulls["fix_category"] == "fixed"]
-    not_fixed_df = rug_pulls[rug_pulls["fix_category"] != "fixed"]
-    fixable_df = not_fixed_df[not_fixed_df["fix_category"] == "fixable"]
-    fixable_deps_df = not_fixed_df[not_fixed_df["fix_category"] == "dep_fixable"]
-    non_fixable_df = rug_pulls[rug_pulls["fix_category"] == "unfixable"]
+    df.sort(key=lambda x: x["id"])
 
-    st.write("##### Table")
+    fig = ex.timeline(
+        df,
+        x_start="Start",
+        x_end="Finish",
+        y="Action",
+        text="Fix_Version",
+        color="Fix_Actor",
+        labels={"Fix_Actor": "Actor"},
+        color_discrete_map={
+            "Workflow": GRAPH_COLORS["workflow"],
+            "Action": GRAPH_COLORS["action"],
+            "Unfixed": GRAPH_COLORS["unfixable"],
+        },
+    )
+    fig.add_scatter(
+        x=fixable["fix_date"],
+        y=fixable["action"]
+        + "@"
+        + fixable["version"]
+        + " ("
+        + fixable["date"].map(str)
+        + ")",
+        name="fix available",
+        mode="markers",
+        marker={"color": "#4FCB8C", "size": 10},
+    )
+    fig.update_yaxes(autorange="reversed")
+    fig.update_xaxes(showgrid=True)
 
-    all, fixed, not_fixed, fixable, dep_fixable, not_fixable = st.tabs(
-        ["All", "Fixed", "Not Fixed", "Fixable", "Fixable Deps.", "Not Fixable"]
+    fig.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
 
-    with all:
-        _ = st.dataframe(rug_pulls)
-    with fixed:
-        _ = st.dataframe(fixed_df)
-    with not_fixed:
-        _ = st.dataframe(not_fixed_df)
-    with fixable:
-        _ = st.dataframe(fixable_df)
-    with dep_fixable:
-        _ = st.dataframe(fixable_deps_df)
-    with not_fixable:
-        _ = st.dataframe(non_fixable_df)
+    return fig
 
-    st.write("##### Gantt Charts")
-    grouped_rug_pulls = compute_rug_pulls().groupby(["repo", "workflow"])
 
-    begin = (st.session_state["curr_page_gantt"] - 1) * 10
-    end = st.session_state["curr_page_gantt"] * 10
+def _make_compact_gantt(rug_pulls: DataFrame) -> Figure:
+    exposures = rug_pulls.assign(
+        end=where(
+            rug_pulls["fix_category"] == "fixed",
+            rug_pulls["fix_date"],
+            rug_pulls["last"],
+        ),
+        unfixed=(rug_pulls["fix_category"] != "fixed").astype(int),
+    )
+    merged = merge_intervals(exposures, "action", "date", "end", ["unfixed"])
+    merged["state"] = where(merged["unfixed"] > 0, "Unfixed", "Fixed")
+
+    fig = ex.timeline(
+        merged,
+        x_start="date",
+        x_end="end",
+        y="action",
+        text="count",
+        color="state",
+        hover_data=["count", "unfixed", "peak"],
+        labels={
+            "action": "Action",
+            "state": "State",
+            "count": "Rug Pulls",
+            "unfixed": "Unfixed",
+            "peak": "Max. Overlapping",
+        },
+        color_discrete_map={
+            "Fixed": GRAPH_COLORS["workflow"],
+            "Unfixed": GRAPH_COLORS["unfixable"],
+        },
+    )
+    fig.update_yaxes(autorange="reversed")
+    fig.update_xaxes(showgrid=True)
 
-    make_paging_component(ceil(len(grouped_rug_pulls) / 10), "curr_page_gantt")
+    fig.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
 
-    group = 0
+    return fig
 
-    for workflow, rug_pulls in grouped_rug_pulls:
-        if group < begin:
-            group += 1
-            continue
-        if group >= end:
-            break
 
+def _make_gantt_page(page: int) -> None:
+    for workflow, rug_pulls in compute_gantt_page(page):
         st.write(f"###### {'/'.join(workflow)}")
 
-        no_fix = rug_pulls[rug_pulls["fix_category"] != "fixed"]
-        fixable = no_fix[rug_pulls["fix_category"] != "unfixable"]
-
-        names = rug_pulls["action"]
-        actions = (
-            rug_pulls["action"]
-            + "@"
-            + rug_pulls["version"]
-            + " ("
-            + rug_pulls["date"].map(str)
-            + ")"
-        )
-        start_dates = rug_pulls["date"].to_list()
-        end_dates = where(
-            rug_pulls["fix_category"] == "fixed",
-            rug_pulls["fix_date"],
-            rug_pulls["last"],
-        )
-        colors = where(
-            rug_pulls["fix_category"] == "fixed", rug_pulls["fix_actor"], "Unfixed"
-        )
-        versions = rug_pulls["fix_version"].to_list()
-
-        df = [
-            dict(
-                id=ind,
-                Action=task,
-                Start=start,
-                Finish=finish,
-                Fix_Actor=color,
-                Fix_Version=", ".join(version),
+        # Large workflows are summarized, and their bars are only drawn on demand
+        if len(rug_pulls) > GANTT_COMPACT_ROWS:
+            details = st.toggle(
+                f"Show all {len(rug_pulls)} rug pulls",
+                key=f"gantt_details_{'/'.join(workflow)}",
             )
-            for ind, task, start, finish, color, version in zip(
-                names, actions, start_dates, end_dates, colors, versions
+
+            if not details:
+                actions = rug_pulls["action"].nunique()
+
+                if actions > GANTT_MAX_SHAPES:
+                    st.caption(
+                        f"The {actions - GANTT_MAX_SHAPES + 1} actions with the"
+                        + f" fewest rug pulls are merged into {GANTT_OTHERS}"
+                    )
+
+                st.plotly_chart(
+                    _make_compact_gantt(rug_pulls),
+                    key=f"{'/'.join(workflow)}_compact",
+                )
+                continue
+
+        # Every rug pull draws a bar and, at most, a marker, so large workflows
+        # are drawn one part at a time
+        part_size = GANTT_MAX_SHAPES // 2
+        begin = 0
+
+        if len(rug_pulls) > part_size:
+            begin = st.selectbox(
+                "Rug pulls",
+                range(0, len(rug_pulls), part_size),
+                format_func=lambda begin: f"{begin + 1}-"
+                + f"{min(begin + part_size, len(rug_pulls))}"
+                + f" of {len(rug_pulls)}",
+                key=f"gantt_part_{'/'.join(workflow)}",
             )
-        ]
-
-        df.sort(key=lambda x: x["id"])
-
-        st.write(rug_pulls)
-
-        fig = ex.timeline(
-            df,
-            x_start="Start",
-            x_end="Finish",
-            y="Action",
-            text="Fix_Version",
-            color="Fix_Actor",
-            labels={"Fix_Actor": "Actor"},
-            color_discrete_map={
-                "Workflow": GRAPH_COLORS["workflow"],
-                "Action": GRAPH_COLORS["action"],
-                "Unfixed": GRAPH_COLORS["unfixable"],
-            },
-        )
-        fig.add_scatter(
-            x=fixable["fix_date"],
-            y=fixable["action"]
-            + "@"
-            + fixable["version"]
-            + " ("
-            + fixable["date"].map(str)
-            + ")",
-            name="fix available",
-            mode="markers",
-            marker={"color": "#4FCB8C", "size": 10},
-        )
-        fig.update_yaxes(autorange="reversed")
-        fig.update_xaxes(showgrid=True)
 
-        fig.update_layout(
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        st.plotly_chart(
+            _make_gantt_timeline(rug_pulls.iloc[begin : begin + part_size]),
+            key="/".join(workflow),
         )
 
-        st.plotly_chart(fig, key="/".join(workflow))
 
-        group += 1
+def _make_rug_pulls_page(rug_pulls_filter: str, page: int) -> None:
+    _ = st.dataframe(get_rug_pulls_page(rug_pulls_filter, page))
+
+
+@st.fragment
+def _make_rug_pulls_table() -> None:
+    st.write("##### Table")
+
+    rug_pulls_filter = st.segmented_control(
+        "Rug Pulls",
+        list(RUG_PULLS_FILTERS.keys()),
+        format_func=lambda option: RUG_PULLS_FILTER_LABELS[option],
+        key="rug_pulls_filter",
+        on_change=change_page,
+        kwargs={"key": "curr_page_table", "where": 0},
+        label_visibility="collapsed",
+    )
 
-    make_paging_component(ceil(len(grouped_rug_pulls) / 10), "curr_page_gantt")
+    # A deselected filter shows all the rug pulls
+    rug_pulls_filter = rug_pulls_filter or "all"
+
+    make_paged_component(
+        get_rug_pulls_pages(rug_pulls_filter),
+        "curr_page_table",
+        lambda page: _make_rug_pulls_page(rug_pulls_filter, page),
+    )
+
+
+@st.fragment
+def make_gantt_charts() -> None:
+    _make_rug_pulls_table()
+
+    st.write("##### Gantt Charts")
+    make_paged_component(compute_gantt_pages(), "curr_page_gantt", _make_gantt_page)
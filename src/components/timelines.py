@@ -1,21 +1,24 @@
 from datetime import datetime
 from math import ceil
-from random import randint
 
 import plotly.express as ex
 import streamlit as st
+from pandas import Series
 from plotly.graph_objects import Figure, Scatter
 from plotly.subplots import make_subplots
 from streamlit.delta_generator import DeltaGenerator
 
 from ..components.metrics import make_metrics_components
 from ..helpers.compute import (
+    compress_series,
     compute_dependencies,
-    compute_trend,
     compute_trend_category,
+    compute_trends,
+    load_selected_trends,
 )
+from ..helpers.data import load_repo_workflows
 from ..models.neo import Workflow
-from .paging import make_paging_component
+from .paging import make_paged_component
 
 ss = st.session_state
 threshold = 0.1
@@ -25,10 +28,12 @@ def _make_plot_component(
     repo_name: str,
     workflow_name: str,
     workflow: Workflow,
+    trends: Series,
     container: DeltaGenerator,
+    all_commits: bool = False,
 ) -> None:
-    trend = compute_trend(workflow, True)
-    trend2 = compute_trend(workflow)
+    trend = {"tau": trends["deps_tau"], "pvalue": trends["deps_pvalue"]}
+    trend2 = {"tau": trends["vulns_tau"], "pvalue": trends["vulns_pvalue"]}
     trend_type = compute_trend_category(trend["tau"], trend["pvalue"], threshold)
     trend_type2 = compute_trend_category(trend2["tau"], trend2["pvalue"], threshold)
 
@@ -72,19 +77,30 @@ def _make_plot_component(
         "rgb(61, 58, 42)",
     ]
 
+    # Only the commits where a count changes are drawn, unless all are requested
     for i in range(len(ys)):
+        dates, counts, commits = compress_series(
+            dependencies["dates"], dependencies[ys[i]], all_commits
+        )
         fig1 = fig1.add_scatter(
-            x=dependencies["dates"],
-            y=dependencies[ys[i]],
+            x=dates,
+            y=counts,
+            customdata=commits,
+            hovertemplate="%{y} (%{customdata} commits)",
             name=ys[i],
             marker={"color": colors[i]},
             line_shape="hv",
             mode="lines+markers",
         )
 
+        dates, counts, commits = compress_series(
+            dependencies["dates"], dependencies[ys[i] + "_vuln"], all_commits
+        )
         fig2 = fig2.add_scatter(
-            x=dependencies["dates"],
-            y=dependencies[ys[i] + "_vuln"],
+            x=dates,
+            y=counts,
+            customdata=commits,
+            hovertemplate="%{y} (%{customdata} commits)",
             name=ys[i],
             marker={"color": colors[i]},
             line_shape="hv",
@@ -102,40 +118,46 @@ def _make_plot_component(
     _ = plots_container.plotly_chart(
         figure_or_data=fig1,
         theme=None,
-        key=f"{repo_name}-{workflow_name}-{randint(0, 100000)}",
+        key=f"{repo_name}-{workflow_name}-dependencies",
         on_select="rerun",
     )
     _ = plots_container.plotly_chart(
         figure_or_data=fig2,
         theme=None,
-        key=f"{repo_name}-{workflow_name}-{randint(0, 100000)}",
+        key=f"{repo_name}-{workflow_name}-vulnerabilities",
         on_select="rerun",
     )
 
 
-def make_timelines_component() -> None:
-    st.write("#### Plots")
-
-    make_paging_component(
-        ceil(len(ss["selected_workflows"]) / 5),
-        "curr_page_timelines",
-    )
+def _make_timelines_page(page: int) -> None:
+    all_commits = st.toggle("Show every commit", key="timelines_all_commits")
 
-    begin = (ss["curr_page_timelines"] - 1) * 5
-    end = ss["curr_page_timelines"] * 5
+    begin = (page - 1) * 5
+    end = page * 5
 
     for repo_name in list(ss["selected_workflows"].keys())[begin:end]:
-        workflows = ss["selected_workflows"][repo_name]
+        # The session only holds the names of the selected workflows
+        workflows = load_repo_workflows(repo_name, ss["selected_workflows"][repo_name])
+        trends = compute_trends({repo_name: dict(workflows)})
 
         st.write(f"##### {repo_name} _({len(workflows)} workflows)_")
         container = st.container(gap="medium")
 
-        for workflow_name, workflow in workflows.items():
-            _make_plot_component(repo_name, workflow_name, workflow, container)
+        for (workflow_name, workflow), (_, trend) in zip(
+            workflows.items(), trends.iterrows()
+        ):
+            _make_plot_component(
+                repo_name, workflow_name, workflow, trend, container, all_commits
+            )
+
 
-    make_paging_component(
+def make_timelines_component() -> None:
+    st.write("#### Plots")
+
+    make_paged_component(
         ceil(len(ss["selected_workflows"]) / 5),
         "curr_page_timelines",
+        _make_timelines_page,
     )
 
 
@@ -153,26 +175,24 @@ def make_statistics_component() -> None:
         "pvalues": [],
     }
 
-    for repo_name, workflows in ss["selected_workflows"].items():
-        for workflow_name, workflow in workflows.items():
-            trend = compute_trend(workflow, True)
-            trend2 = compute_trend(workflow)
-
-            hover["repository"].append(repo_name)
-            hover["workflow"].append(workflow_name)
-            hover["taus"].append([trend["tau"], trend2["tau"]])
-            hover["pvalues"].append([trend["pvalue"], trend2["pvalue"]])
-
-            xs.append(len(workflow.commits))
-            ys.append(trend["tau"])
-            ys2.append(trend2["tau"])
-            cs.append(
-                f"pvalue deps <= {threshold} && pvalue vulns <= {threshold}"
-                if trend["pvalue"] <= threshold and trend2["pvalue"] <= threshold
-                else f"pvalue deps > {threshold} && pvalue vulns > {threshold}"
-                if trend["pvalue"] > threshold and trend2["pvalue"] > threshold
-                else f"pvalue deps > {threshold} || pvalue vulns > {threshold}"
-            )
+    trends = load_selected_trends(ss["selected_workflows"])
+
+    for _, trend in trends.iterrows():
+        hover["repository"].append(trend["repo"])
+        hover["workflow"].append(trend["workflow"])
+        hover["taus"].append([trend["deps_tau"], trend["vulns_tau"]])
+        hover["pvalues"].append([trend["deps_pvalue"], trend["vulns_pvalue"]])
+
+        xs.append(trend["commits"])
+        ys.append(trend["deps_tau"])
+        ys2.append(trend["vulns_tau"])
+        cs.append(
+            f"pvalue deps <= {threshold} && pvalue vulns <= {threshold}"
+            if trend["deps_pvalue"] <= threshold and trend["vulns_pvalue"] <= threshold
+            else f"pvalue deps > {threshold} && pvalue vulns > {threshold}"
+            if trend["deps_pvalue"] > threshold and trend["vulns_pvalue"] > threshold
+            else f"pvalue deps > {threshold} || pvalue vulns > {threshold}"
+        )
 
     # ----------------------
 
@@ -240,10 +260,14 @@ def make_statistics_component() -> None:
     if len(selected_workflow["selection"]["points"]) == 1:
         repo_name = selected_workflow["selection"]["points"][0]["customdata"][0]
         workflow_name = selected_workflow["selection"]["points"][0]["customdata"][1]
+        selected = trends[
+            (trends["repo"] == repo_name) & (trends["workflow"] == workflow_name)
+        ]
 
         _make_plot_component(
             repo_name,
             workflow_name,
-            ss["selected_workflows"][repo_name][workflow_name],
+            load_repo_workflows(repo_name, (workflow_name,))[workflow_name],
+            selected.iloc[0],
             trend_container,
         )
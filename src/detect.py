@@ -0,0 +1,124 @@
+from argparse import ArgumentParser
+from json import load
+from os.path import abspath, dirname, join
+from time import perf_counter
+
+from .helpers.dates import RUG_PULL_DATE_COUNTS_PATH
+from .helpers.detect import (
+    CHUNKS_DIR,
+    RUG_PULLS_PATH,
+    VULNERABILITIES_PATH,
+    compact_rug_pulls,
+    detect_rug_pulls,
+)
+from .helpers.metrics import METRICS_PATH
+
+
+def _select_workflows(selection: str) -> dict[str, list[str]]:
+    with open(selection) as file:
+        return load(file)
+
+
+def _select_refresh(
+    selected: dict[str, list[str]],
+    repos: list[str] | None,
+    workflows: list[str] | None,
+) -> set[str] | None:
+    if not repos and not workflows:
+        return None
+
+    # A repository is always analyzed with all of its workflows, so that its
+    # chunk and manifest entry stay valid for the whole selection
+    return {
+        repo_name
+        for repo_name, repo_workflows in selected.items()
+        if (not repos or repo_name in repos)
+        and (not workflows or any(workflow in workflows for workflow in repo_workflows))
+    }
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="python -m src.detect",
+        description="Detect the rug pulls of the selected workflows and store them"
+        + " as precomputed results for the webapp.",
+    )
+    parser.add_argument(
+        "--selection",
+        default=join(dirname(abspath(__file__)), "../data/workflows.json"),
+        help="JSON file mapping each repository to its workflows",
+    )
+    parser.add_argument(
+        "--repos", nargs="+", help="only reanalyze these repositories (owner/name)"
+    )
+    parser.add_argument(
+        "--workflows",
+        nargs="+",
+        help="only reanalyze the repositories with workflows with these names",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of detection processes"
+    )
+    parser.add_argument(
+        "--chunks", default=CHUNKS_DIR, help="directory of the per-repository results"
+    )
+    parser.add_argument(
+        "--output",
+        default=RUG_PULLS_PATH,
+        help="path of the compacted rug pulls Parquet file",
+    )
+    parser.add_argument(
+        "--vulnerabilities",
+        default=VULNERABILITIES_PATH,
+        help="path of the compacted table of the rug pulls' vulnerabilities",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=METRICS_PATH,
+        help="path of the summary metrics of the rug pulls",
+    )
+    parser.add_argument(
+        "--date-counts",
+        default=RUG_PULL_DATE_COUNTS_PATH,
+        help="path of the daily, weekly and monthly counts of the rug pulls",
+    )
+
+    args = parser.parse_args()
+    selected = _select_workflows(args.selection)
+    refresh = _select_refresh(selected, args.repos, args.workflows)
+
+    repos = 0
+    computed = 0
+    commits = 0
+    start = perf_counter()
+
+    def chunks():
+        nonlocal repos, computed, commits
+
+        for chunk, chunk_commits in detect_rug_pulls(
+            selected, args.chunks, args.workers, refresh
+        ):
+            repos += 1
+            computed += 1 if chunk_commits > 0 else 0
+            commits += chunk_commits
+
+            yield chunk
+
+    compact_rug_pulls(
+        chunks(), args.output, args.vulnerabilities, args.metrics, args.date_counts
+    )
+
+    elapsed = perf_counter() - start
+
+    print(
+        f"{repos} repositories ({computed} recomputed), {commits} commits"
+        + f" in {elapsed:.2f}s"
+    )
+    print(
+        f"{repos / elapsed:.2f} repos/s, {commits / elapsed:.2f} commits/s"
+        + f" -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
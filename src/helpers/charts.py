@@ -0,0 +1,301 @@
+from math import ceil
+
+import plotly.express as ex
+from numpy import arange, flatnonzero, histogram_bin_edges, isin, log10, percentile
+from numpy import histogram as bin_values
+from numpy.random import default_rng
+from numpy.typing import NDArray
+from pandas import DataFrame, Series, Timedelta, concat
+from plotly.graph_objects import Bar, Box, Figure, Scatter, Scattergl
+
+# Above this many points, scatter plots are decimated and drawn with WebGL
+SCATTER_MAX_POINTS = 5000
+DECIMATION_GRID = 64
+MARGINAL_DOMAIN = 0.74
+# Above this many rug pulls, a Gantt chart merges the overlapping ones
+GANTT_COMPACT_ROWS = 100
+GANTT_MAX_SHAPES = 300
+GANTT_OTHERS = "Others"
+
+
+def _to_numbers(values: Series) -> NDArray:
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[ns]").astype("int64").to_numpy(float)
+
+    return values.to_numpy(float)
+
+
+def decimate(
+    x: NDArray, y: NDArray, max_points: int = SCATTER_MAX_POINTS, seed: int = 0
+) -> NDArray:
+    size = len(x)
+
+    if size <= max_points:
+        return arange(size)
+
+    # Every cell of a grid over the plot keeps the same share of its points, and
+    # at least one, so the density and the outliers of the cloud are preserved
+    cells = 0
+
+    for values in [x, y]:
+        span = values.max() - values.min()
+        scaled = (values - values.min()) / span if span > 0 else values * 0
+        bins = (scaled * (DECIMATION_GRID - 1)).astype(int)
+        cells = cells * DECIMATION_GRID + bins
+
+    order = default_rng(seed).permutation(size)
+    shuffled = Series(cells[order])
+    ranks = shuffled.groupby(shuffled).cumcount().to_numpy()
+    quotas = shuffled.map(
+        (shuffled.value_counts() * max_points / size).apply(ceil)
+    ).to_numpy()
+
+    return order[flatnonzero(ranks < quotas)].copy()
+
+
+def _box_stats(values: NDArray) -> dict[str, list[float]]:
+    q1, median, q3 = percentile(values, [25, 50, 75])
+    low = values[values >= q1 - 1.5 * (q3 - q1)].min()
+    high = values[values <= q3 + 1.5 * (q3 - q1)].max()
+
+    return {
+        "q1": [q1],
+        "median": [median],
+        "q3": [q3],
+        "lowerfence": [low],
+        "upperfence": [high],
+    }
+
+
+def _rename_traces(fig: Figure, names: dict[str, str]) -> Figure:
+    for trace in fig.data:
+        trace.name = names.get(trace.name, trace.name)
+
+    return fig
+
+
+def histogram(
+    df: DataFrame,
+    x: str,
+    color: str,
+    colors: dict[str, str],
+    names: dict[str, str],
+    labels: dict[str, str],
+    nbins: int,
+    title: str | None = None,
+    barmode: str = "relative",
+    server: bool = True,
+) -> Figure:
+    if not server:
+        return _rename_traces(
+            ex.histogram(
+                df,
+                x=x,
+                color=color,
+                category_orders={color: list(colors.keys())},
+                color_discrete_map=colors,
+                title=title,
+                nbins=nbins,
+                labels=labels,
+                marginal="box",
+                barmode=barmode,
+            ),
+            names,
+        )
+
+    df = df[df[x].notna()]
+    edges = histogram_bin_edges(df[x].to_numpy(float), bins=nbins)
+    fig = Figure()
+
+    # Only the bin counts and the quartiles of every category are sent
+    for category, group_color in colors.items():
+        values = df[df[color] == category][x].to_numpy(float)
+
+        if len(values) == 0:
+            continue
+
+        counts, _ = bin_values(values, bins=edges)
+
+        fig.add_trace(
+            Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                name=names.get(category, category),
+                legendgroup=category,
+                marker_color=group_color,
+                opacity=0.5 if barmode == "overlay" else None,
+            )
+        )
+        fig.add_trace(
+            Box(
+                y=[names.get(category, category)],
+                **_box_stats(values),
+                orientation="h",
+                name=names.get(category, category),
+                legendgroup=category,
+                showlegend=False,
+                marker_color=group_color,
+                yaxis="y2",
+            )
+        )
+
+    return fig.update_layout(
+        title=title,
+        barmode=barmode,
+        bargap=0,
+        legend_title=labels.get(color, color),
+        xaxis_title=labels.get(x, x),
+        yaxis={"domain": [0, MARGINAL_DOMAIN], "title": "count"},
+        yaxis2={
+            "domain": [MARGINAL_DOMAIN + 0.01, 1],
+            "showticklabels": False,
+            "anchor": "x",
+        },
+    )
+
+
+def scatter(
+    df: DataFrame,
+    x: str,
+    y: str,
+    color: str | None,
+    colors: dict[str, str],
+    names: dict[str, str],
+    labels: dict[str, str],
+    hover: str | None = None,
+    log_x: bool = False,
+    log_y: bool = False,
+    server: bool = True,
+) -> Figure:
+    if not server:
+        return _rename_traces(
+            ex.scatter(
+                df,
+                x=x,
+                y=y,
+                color=color,
+                category_orders={color: list(colors.keys())} if color else {},
+                color_discrete_map=colors if color else {},
+                color_discrete_sequence=list(colors.values()),
+                labels=labels,
+                hover_data={"name": df[hover]} if hover else None,
+                log_x=log_x,
+                log_y=log_y,
+            ),
+            names,
+        )
+
+    df = df[df[x].notna() & df[y].notna()]
+    xs = _to_numbers(df[x])
+    ys = _to_numbers(df[y])
+
+    # The grid of the decimation follows the axes' scale
+    keep = decimate(
+        log10(xs.clip(min=1)) if log_x else xs,
+        log10(ys.clip(min=1)) if log_y else ys,
+    )
+    trace = Scattergl if len(keep) < len(df) else Scatter
+    fig = Figure()
+
+    for category, group_color in colors.items():
+        selected = keep
+
+        if color is not None:
+            selected = keep[isin(keep, flatnonzero(df[color] == category))]
+
+        if len(selected) == 0:
+            continue
+
+        rows = df.iloc[selected]
+
+        fig.add_trace(
+            trace(
+                x=rows[x],
+                y=rows[y],
+                mode="markers",
+                name=names.get(category, category),
+                showlegend=color is not None,
+                marker_color=group_color,
+                hovertext=rows[hover] if hover else None,
+            )
+        )
+
+    return fig.update_layout(
+        legend_title=labels.get(color, color) if color else None,
+        xaxis={"title": labels.get(x, x), "type": "log" if log_x else None},
+        yaxis={"title": labels.get(y, y), "type": "log" if log_y else None},
+    )
+
+
+def _merge_intervals(
+    df: DataFrame, key: str, start: str, end: str, sums: list[str], tolerance: Timedelta
+) -> DataFrame:
+    # Sweep every key by start: an interval opens a new run when it begins after
+    # the furthest end seen so far (plus the tolerance)
+    reach = df.groupby(key)[end].cummax()
+    previous = reach.groupby(df[key]).shift()
+    runs = (previous.isna() | (df[start] > previous + tolerance)).cumsum()
+
+    events = concat(
+        [
+            DataFrame({"run": runs, "time": df[start], "delta": 1}),
+            DataFrame({"run": runs, "time": df[end], "delta": -1}),
+        ]
+    ).sort_values(by=["run", "time", "delta"], kind="stable")
+    overlaps = events["delta"].groupby(events["run"]).cumsum()
+
+    merged = df.groupby(runs).agg(
+        **{
+            key: (key, "first"),
+            start: (start, "min"),
+            end: (end, "max"),
+            "count": (start, "size"),
+        },
+        **{column: (column, "sum") for column in sums},
+    )
+    # Ends are swept before starts, so touching intervals do not overlap
+    merged["peak"] = overlaps.groupby(events["run"]).max().clip(lower=1)
+
+    return merged.reset_index(drop=True)
+
+
+def merge_intervals(
+    df: DataFrame,
+    key: str,
+    start: str,
+    end: str,
+    sums: list[str] | None = None,
+    max_intervals: int = GANTT_MAX_SHAPES,
+) -> DataFrame:
+    sums = sums or []
+    df = (
+        df[[key, start, end, *sums]]
+        .dropna(subset=[key, start, end])
+        .sort_values(by=[key, start], kind="stable", ignore_index=True)
+    )
+    df[end] = df[[start, end]].max(axis=1)
+
+    if len(df) == 0:
+        return DataFrame(columns=[key, start, end, "count", *sums, "peak"])
+
+    sizes = df.groupby(key).size().sort_values(ascending=False, kind="stable")
+
+    if len(sizes) > max_intervals:
+        # Every key needs a row of its own, so the keys with the fewest intervals
+        # are folded into a single one, for the cap to be met without dropping any
+        kept = sizes.index[: max_intervals - 1]
+        df[key] = df[key].where(df[key].isin(kept), GANTT_OTHERS)
+        df = df.sort_values(by=[key, start], kind="stable", ignore_index=True)
+
+    merged = _merge_intervals(df, key, start, end, sums, Timedelta(0))
+
+    if len(merged) > max_intervals:
+        # The closest intervals of every key are bridged first, until the cap is met
+        gaps = (merged[start] - merged.groupby(key)[end].shift()).dropna()
+        bridged = min(len(merged) - max_intervals, len(gaps))
+
+        if bridged > 0:
+            tolerance = gaps.sort_values().iloc[bridged - 1]
+            merged = _merge_intervals(df, key, start, end, sums, tolerance)
+
+    return merged
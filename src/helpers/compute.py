@@ -1,105 +1,242 @@
 from ast import literal_eval
 from datetime import datetime
 from hashlib import sha256
+from math import ceil
 from os.path import abspath, dirname, isfile, join
-from typing import Any
+from re import fullmatch
+from typing import Mapping
 
 import streamlit as st
-from dotenv import dotenv_values
-from numpy import nan
-from pandas import DataFrame, read_csv
+from numpy import append, arange, array, concatenate, diff, flatnonzero, int64, unique
+from numpy.typing import NDArray
+from pandas import DataFrame, concat, cut, read_csv, read_parquet
+from pyarrow.parquet import read_table
 from scipy.stats import kendalltau
-from tqdm import tqdm
 
-from ..helpers.queries import connect, get_first_fixed_commit, is_dependency_fixable
-from ..helpers.repos import pickle2repo
-from ..models.neo import Dependency, Repository, Workflow
-from ..models.rugs import ActualFix, PotentialFix, Rugpull
+from ..helpers.data import REPOSITORIES_DIR, data_version, load_repo_workflows
+from ..helpers.dates import (
+    COMMIT_DATE_COUNTS_PATH,
+    RUG_PULL_DATE_COUNTS_PATH,
+    bin_dates,
+    count_days,
+    read_date_counts,
+)
+from ..helpers.detect import (
+    RUG_PULLS_COLUMNS,
+    RUG_PULLS_CSV_PATH,
+    RUG_PULLS_PATH,
+    VULNERABILITIES_COLUMNS,
+    VULNERABILITIES_PATH,
+    get_severity_group,
+)
+from ..helpers.trends import history_digest
+from ..models.neo import Workflow
 
 ss = st.session_state
 
-
-def compute_dependencies(workflow: Workflow) -> dict[str, list[datetime] | list[int]]:
+DEPENDENCY_SUBTYPES = ["direct", "direct_dev", "direct_opt", "indirect"]
+LIST_COLUMNS = ["vulns_list", "vulns_severities", "fix_version"]
+# Same (left-open) ranges as get_severity_group, whose gaps map to no group
+SEVERITY_BINS = [0.1, 3.99, 4.0, 6.99, 7.0, 8.99, 9.0, 10.0]
+SEVERITY_LABELS = ["low", "", "medium", "", "high", "", "critical"]
+CVSS_STATS = ["min", "max", "median", "mean", "std"]
+GANTT_PAGE_SIZE = 10
+TRENDS_PATH = join(dirname(abspath(__file__)), "../../data/trends.csv")
+COMMIT_DATES_PATH = join(dirname(abspath(__file__)), "../../data/commit_dates.csv")
+# The severities only keep the CVE of a vulnerability, or its id without one
+CVE_PATTERN = r"CVE-\d{4}-\d+"
+TRENDS_COLUMNS = [
+    "digest",
+    "repo",
+    "workflow",
+    "commits",
+    "deps_tau",
+    "deps_pvalue",
+    "vulns_tau",
+    "vulns_pvalue",
+]
+
+
+def compute_dependencies(workflow: Workflow) -> dict[str, NDArray]:
     dates: list[datetime] = []
-    direct: list[int] = []
-    direct_vuln: list[int] = []
-    direct_dev: list[int] = []
-    direct_dev_vuln: list[int] = []
-    direct_opt: list[int] = []
-    direct_opt_vuln: list[int] = []
-    indirect: list[int] = []
-    indirect_vuln: list[int] = []
+    counts: list[list[int]] = []
+    positions = {subtype: i for i, subtype in enumerate(DEPENDENCY_SUBTYPES)}
 
     for commit in workflow.commits.values():
         dates.append(commit.date)
+        row = [0] * (2 * len(DEPENDENCY_SUBTYPES) + 2)
 
-        indirect_deps = commit.dependencies["indirect"].values()
-        vuln_indirect_deps = list(
-            filter(lambda el: len(el.vulnerabilities) > 0, indirect_deps)
-        )
+        for dep in commit.dependencies["indirect"].values():
+            vulnerable = len(dep.vulnerabilities) > 0
+            row[-2] += 1
+            row[-1] += vulnerable
+
+            if dep.subtype not in positions:
+                continue
+
+            position = 2 * positions[dep.subtype]
+            row[position] += 1
+            row[position + 1] += vulnerable
+
+        counts.append(row)
+
+    matrix = array(counts, dtype=int64).reshape(len(counts), len(positions) * 2 + 2)
+    dependencies: dict[str, NDArray] = {"dates": array(dates, dtype="datetime64[s]")}
+
+    for i, subtype in enumerate(DEPENDENCY_SUBTYPES):
+        dependencies[subtype] = matrix[:, 2 * i]
+        dependencies[f"{subtype}_vuln"] = matrix[:, 2 * i + 1]
+
+    dependencies["total"] = matrix[:, -2]
+    dependencies["total_vuln"] = matrix[:, -1]
+
+    return dependencies
+
+
+def compute_change_points(values: NDArray) -> NDArray:
+    if len(values) == 0:
+        return arange(0)
+
+    # A step line only needs the first commit of every run of equal values, and
+    # the last commit to extend the line up to it
+    changes = flatnonzero(values[1:] != values[:-1]) + 1
+
+    return unique(concatenate([[0], changes, [len(values) - 1]]))
+
+
+def compress_series(
+    dates: NDArray, values: NDArray, all_commits: bool = False
+) -> tuple[NDArray, NDArray, NDArray]:
+    kept = arange(len(values)) if all_commits else compute_change_points(values)
+
+    # Every kept point stands for the commits up to the next one
+    return dates[kept], values[kept], diff(append(kept, len(values)))
 
-        direct.append(
-            len(list(filter(lambda el: el.subtype == "direct", indirect_deps)))
-        )
-        direct_vuln.append(
-            len(list(filter(lambda el: el.subtype == "direct", vuln_indirect_deps)))
-        )
-        direct_dev.append(
-            len(list(filter(lambda el: el.subtype == "direct_dev", indirect_deps)))
-        )
-        direct_dev_vuln.append(
-            len(list(filter(lambda el: el.subtype == "direct_dev", vuln_indirect_deps)))
-        )
-        direct_opt.append(
-            len(list(filter(lambda el: el.subtype == "direct_opt", indirect_deps)))
-        )
-        direct_opt_vuln.append(
-            len(list(filter(lambda el: el.subtype == "direct_opt", vuln_indirect_deps)))
-        )
-        indirect.append(
-            len(list(filter(lambda el: el.subtype == "indirect", indirect_deps)))
-        )
-        indirect_vuln.append(
-            len(list(filter(lambda el: el.subtype == "indirect", vuln_indirect_deps)))
-        )
+
+def trend_digest(repo_name: str, workflow_name: str, history: str) -> str:
+    # Changes with the dependencies of any commit, not only with the commits
+    return sha256(f"{repo_name}/{workflow_name}:{history}".encode("utf-8")).hexdigest()
+
+
+def workflow_digest(repo_name: str, workflow_name: str, workflow: Workflow) -> str:
+    return trend_digest(repo_name, workflow_name, history_digest(workflow))
+
+
+def _compute_tau(dates: NDArray, counts: NDArray) -> tuple[float, float]:
+    if len(counts) <= 1:
+        return 0.0, 0.0
+
+    tau, pvalue = kendalltau(dates, counts)
+
+    return float(tau), float(pvalue)
+
+
+def _compute_workflow_trends(workflow: Workflow) -> dict[str, float]:
+    dependencies = compute_dependencies(workflow)
+    dates = dependencies["dates"].astype(int64)
+    # Commits without any dependency do not contribute to the trends
+    used = dependencies["total"] > 0
+
+    deps_tau, deps_pvalue = _compute_tau(dates[used], dependencies["total"][used])
+    vulns_tau, vulns_pvalue = _compute_tau(dates[used], dependencies["total_vuln"][used])
 
     return {
-        "dates": dates,
-        "direct": direct,
-        "direct_vuln": direct_vuln,
-        "direct_dev": direct_dev,
-        "direct_dev_vuln": direct_dev_vuln,
-        "direct_opt": direct_opt,
-        "direct_opt_vuln": direct_opt_vuln,
-        "indirect": indirect,
-        "indirect_vuln": indirect_vuln,
+        "deps_tau": deps_tau,
+        "deps_pvalue": deps_pvalue,
+        "vulns_tau": vulns_tau,
+        "vulns_pvalue": vulns_pvalue,
     }
 
 
-def compute_trend(workflow: Workflow, dependencies: bool = False) -> dict[str, float]:
-    dates: list[float] = []
-    count_vuln: list[int] = []
+def load_trends() -> DataFrame:
+    if not isfile(TRENDS_PATH):
+        return DataFrame(columns=TRENDS_COLUMNS).set_index("digest")
 
-    for commit in sorted(workflow.commits.values(), key=lambda x: x.date):
-        indirect_deps = commit.dependencies["indirect"].values()
-        vuln_indirect_deps = list(
-            filter(lambda el: len(el.vulnerabilities) > 0, indirect_deps)
-        )
+    return read_csv(TRENDS_PATH).set_index("digest")
 
-        if len(vuln_indirect_deps) == 0 and len(indirect_deps) == 0:
-            continue
 
-        dates.append(commit.date.timestamp())
-        count_vuln.append(
-            len(indirect_deps) if dependencies else len(vuln_indirect_deps)
-        )
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_trends(filepath: str, version: tuple[int, int]) -> DataFrame:
+    return read_csv(filepath).set_index("digest")
+
+
+@st.cache_data(max_entries=4096, show_spinner=False)
+def _compute_cached_trends(
+    digest: str, repo_name: str, workflow_name: str, _workflow: Workflow
+) -> dict[str, str | int | float]:
+    # The workflow itself is not hashed, its digest already identifies it
+    if isfile(TRENDS_PATH):
+        trends = _load_trends(TRENDS_PATH, data_version(TRENDS_PATH))
+
+        if digest in trends.index:
+            return trends.loc[digest].to_dict()
+
+    return {
+        "repo": repo_name,
+        "workflow": workflow_name,
+        "commits": len(_workflow.commits),
+        **_compute_workflow_trends(_workflow),
+    }
+
+
+def compute_trends(workflows: dict[str, dict[str, Workflow]]) -> DataFrame:
+    rows: list[dict[str, str | int | float]] = []
+
+    for repo_name, repo_workflows in workflows.items():
+        for workflow_name, workflow in repo_workflows.items():
+            digest = workflow_digest(repo_name, workflow_name, workflow)
+            trends = _compute_cached_trends(digest, repo_name, workflow_name, workflow)
+            rows.append({"digest": digest, **trends})
+
+    return DataFrame(rows, columns=TRENDS_COLUMNS).set_index("digest")
 
-    if len(count_vuln) <= 1:
-        return {"tau": 0.0, "pvalue": 0.0}
 
-    tau, pvalue = kendalltau(dates, count_vuln)
+def load_selected_trends(selected: Mapping[str, tuple[str, ...]]) -> DataFrame:
+    trends = DataFrame(columns=TRENDS_COLUMNS).set_index("digest")
+    computed_at = -1
 
-    return {"tau": tau, "pvalue": pvalue}
+    if isfile(TRENDS_PATH):
+        trends = _load_trends(TRENDS_PATH, data_version(TRENDS_PATH))
+        computed_at = data_version(TRENDS_PATH)[0]
+
+    pickles = {
+        repo_name: join(REPOSITORIES_DIR, f"{repo_name.replace("/", "::")}.pickle")
+        for repo_name in selected
+    }
+    # Only the precomputed trends are read, loading every selected workflow would
+    # unpickle the whole corpus. The repositories changed since they were
+    # computed, and the workflows missing from them, are computed here instead
+    fresh = {
+        repo_name
+        for repo_name, filepath in pickles.items()
+        if isfile(filepath) and data_version(filepath)[0] <= computed_at
+    }
+    found = trends.loc[
+        [
+            repo_name in fresh and workflow in selected[repo_name]
+            for repo_name, workflow in zip(trends["repo"], trends["workflow"])
+        ]
+    ]
+    present = set(zip(found["repo"], found["workflow"]))
+    missing: dict[str, tuple[str, ...]] = {}
+
+    for repo_name, names in selected.items():
+        left = tuple(name for name in names if (repo_name, name) not in present)
+
+        if isfile(pickles[repo_name]) and len(left) > 0:
+            missing[repo_name] = left
+
+    if len(missing) == 0:
+        return found
+
+    with st.spinner(f"Computing the trends of {len(missing)} repositories..."):
+        computed = [
+            compute_trends({repo_name: dict(load_repo_workflows(repo_name, names))})
+            for repo_name, names in missing.items()
+        ]
+
+    # Empty frames are left out, as their columns have no type to concatenate
+    return concat([frame for frame in [found, *computed] if len(frame) > 0] or [found])
 
 
 def compute_trend_category(
@@ -128,327 +265,246 @@ def compute_trend_category(
     }
 
 
-def _compute_rug_pulled_dependencies(
-    repo_name: str,
-    workflows: dict[str, Workflow],
-) -> list[Rugpull]:
-    rug_pulled_actions: list[Rugpull] = []
-    session = connect(dotenv_values(join(dirname(abspath(__file__)), "../../.env")))
+def _read_rug_pulls(filepath: str) -> DataFrame:
+    df = read_csv(
+        filepath,
+        parse_dates=["date", "elapsed", "fix_date"],
+        date_format="%Y-%m-%d %H-%M-%S",
+    ).set_index("#")
 
-    for workflow_name, workflow in workflows.items():
-        pos = -1
-        prev_commit_sha: str = ""
-        vuln_prev_dependencies: dict[str, Dependency] = {}
-        prev_user_versions: dict[str, Dependency] = {}
+    df["elapsed"] = df["elapsed"].map(int)
+    df["vulns_list"] = df["vulns_list"].apply(lambda x: literal_eval(x))
+    df["vulns_severities"] = df["vulns_severities"].apply(lambda x: literal_eval(x))
+    df["fix_version"] = df["fix_version"].apply(lambda x: literal_eval(x))
+    df["date"] = df["date"].astype("datetime64[s]")
+    df["fix_date"] = df["fix_date"].astype("datetime64[s]")
+    df["last"] = df["last"].astype("datetime64[s]")
 
-        for commit_sha, commit in workflow.commits.items():
-            vuln_indirect_deps = {
-                key: dep
-                for key, dep in commit.dependencies["indirect"].items()
-                if len(dep.vulnerabilities) > 0
-            }
+    return df
 
-            if pos == -1:
-                vuln_prev_dependencies = vuln_indirect_deps
-                prev_commit_sha = commit_sha
-                pos += 1
 
-                continue
+def _read_rug_pulls_parquet(filepath: str) -> DataFrame:
+    table = read_table(filepath)
+    df = table.drop_columns(LIST_COLUMNS).to_pandas().set_index("#")
 
-            for name, dep in commit.dependencies["direct"].items():
-                if name not in prev_user_versions:
-                    prev_user_versions[name] = dep
-
-                prev = prev_user_versions[name]
-
-                if not dep.date or not prev.date:
-                    continue
-
-                if dep.version == prev.version and dep.date != prev.date:
-                    current_action_vulns = {
-                        key: dep
-                        for key, dep in vuln_indirect_deps.items()
-                        if dep.parent == name
-                    }
-
-                    prev_action_vulns = {
-                        key: dep
-                        for key, dep in vuln_prev_dependencies.items()
-                        if dep.parent == name
-                    }
-
-                    new_vulnerable_deps = {
-                        key: dep
-                        for key, dep in current_action_vulns.items()
-                        if key not in prev_action_vulns
-                    }
-
-                    if len(new_vulnerable_deps) == 0:
-                        continue
-
-                    filepath = workflow.filepath
-                    hash_digest: str = sha256(f"{filepath}".encode("utf-8")).hexdigest()
-                    link_from = f"https://github.com/{repo_name}/commit/{prev_commit_sha}#diff-{hash_digest}"
-                    link_to = f"https://github.com/{repo_name}/commit/{commit_sha}#diff-{hash_digest}"
-
-                    rug_pulled_actions.append(
-                        Rugpull(
-                            location=f"{repo_name}/{workflow_name}/{commit_sha}",
-                            from_commit=f"{repo_name}/{workflow_name}/{prev_commit_sha}",
-                            links=(link_from, link_to),
-                            action=(name, dep),
-                            vulnerabilities=new_vulnerable_deps,
-                            introduced=dep.date,
-                            downgrade=dep.date < prev.date,
-                        )
-                    )
-
-                prev_user_versions[name] = dep
-
-            vuln_prev_dependencies = vuln_indirect_deps
-            prev_commit_sha = commit_sha
-            pos += 1
-
-        for rug_pull in rug_pulled_actions:
-            if (
-                "/".join(rug_pull.location.split("/")[:3])
-                != f"{repo_name}/{workflow_name}"
-            ):
-                continue
+    # Arrow lists become numpy arrays in pandas, while the components expect lists
+    for column in LIST_COLUMNS:
+        df[column] = table.column(column).to_pylist()
 
-            workflow = workflows[rug_pull.location.split("/")[2]]
-            sorted_workflows = sorted(workflow.commits.values(), key=lambda x: x.date)
-            last_date = sorted_workflows[-1].date
+    for column in ["date", "fix_date", "last"]:
+        df[column] = df[column].astype("datetime64[s]")
 
-            shas_sorted = sorted(workflow.commits.items(), key=lambda x: x[1].date)
-            shas = [item[0] for item in shas_sorted]
-            begin = shas.index(rug_pull.location.split("/")[-1]) + 1
+    return df[RUG_PULLS_COLUMNS[1:]]
 
-            for commit in shas_sorted[begin:]:
-                if rug_pull.fix:
-                    break
 
-                vuln_indirect_deps = {
-                    key: dep
-                    for key, dep in commit[1].dependencies["indirect"].items()
-                    if len(dep.vulnerabilities) > 0
-                }
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_rug_pulls(filepath: str, version: tuple[int, int]) -> DataFrame:
+    if filepath.endswith(".parquet"):
+        return _read_rug_pulls_parquet(filepath)
 
-                curr_action_vulns = {
-                    key: dep
-                    for key, dep in vuln_indirect_deps.items()
-                    if dep.parent == rug_pull.action[0]
-                }
+    return _read_rug_pulls(filepath)
 
-                direct_versions = [
-                    (direct.version, direct.version_type)
-                    for name, direct in commit[1].dependencies["direct"].items()
-                    if name == rug_pull.action[0]
-                ]
-
-                if len(direct_versions) == 0:
-                    rug_pull.fix = ActualFix(
-                        sha=commit[0],
-                        version=[],
-                        version_type=None,
-                        date=commit[1].date,
-                        ttx=commit[1].date - rug_pull.introduced,
-                        who="Workflow",
-                    )
-
-                    continue
-
-                curr_action = commit[1].dependencies["direct"][rug_pull.action[0]]
-                vuln_action = rug_pull.action[1]
-
-                if not curr_action.date or not vuln_action.date:
-                    continue
-
-                if (
-                    vuln_action.date == curr_action.date
-                    and vuln_action.version == curr_action.version
-                ):
-                    continue
-
-                actions_diff = [
-                    dep
-                    for dep in rug_pull.vulnerabilities.keys()
-                    if dep in curr_action_vulns
-                ]
-
-                who = (
-                    "Action"
-                    if vuln_action.version == curr_action.version
-                    else "Workflow"
-                )
-                date = curr_action.date if who == "Action" else commit[1].date
-
-                if len(actions_diff) == 0:
-                    rug_pull.fix = ActualFix(
-                        sha=commit[0],
-                        version=[curr_action.version],
-                        version_type=curr_action.version_type,
-                        date=date,
-                        ttx=date - rug_pull.introduced,
-                        who=who,
-                    )
-
-            if not rug_pull.fix:
-                fix = get_first_fixed_commit(
-                    action=rug_pull.action[0],
-                    deps=list(rug_pull.vulnerabilities.keys()),
-                    date=rug_pull.introduced,
-                    session=session,
-                )
-
-                if fix and fix[0] < last_date:
-                    date = datetime(
-                        fix[0].year,
-                        fix[0].month,
-                        fix[0].day,
-                        fix[0].hour,
-                        fix[0].minute,
-                        fix[0].second,
-                    )
-
-                    if rug_pull.action[1].version in fix[1]:
-                        rug_pull.fix = ActualFix(
-                            sha=fix[2],
-                            version=[rug_pull.action[1].version],
-                            version_type=rug_pull.action[1].version_type,
-                            date=date,
-                            ttx=date - rug_pull.introduced,
-                            who="Action",
-                        )
-                    else:
-                        rug_pull.fix = PotentialFix(
-                            sha=fix[2],
-                            date=date,
-                            versions=fix[1],
-                            ttpf=date - rug_pull.introduced,
-                        )
-                else:
-                    fixable_deps_dates = [
-                        is_dependency_fixable(dep_name, dep.version)
-                        for dep_name, dep in rug_pull.vulnerabilities.items()
-                    ]
-
-                    if None not in fixable_deps_dates and len(fixable_deps_dates) > 0:
-                        fixable_deps_date = sorted(fixable_deps_dates)[-1]
-
-                        if rug_pull.introduced < fixable_deps_date < last_date:
-                            rug_pull.fix = PotentialFix(
-                                sha="",
-                                date=fixable_deps_date,
-                                versions=[],
-                                ttpf=fixable_deps_date - rug_pull.introduced,
-                                dependencies=True,
-                            )
-
-    return rug_pulled_actions
+
+def _rug_pulls_path() -> str:
+    filepath = RUG_PULLS_PATH if isfile(RUG_PULLS_PATH) else RUG_PULLS_CSV_PATH
+
+    if not isfile(filepath):
+        st.error(
+            "No precomputed rug pulls found. Run `python -m src.detect` to generate them."
+        )
+        st.stop()
+
+    return filepath
 
 
 def compute_rug_pulls() -> DataFrame:
-    filepath = join(dirname(abspath(__file__)), "../../data/rug_pulls.csv")
-
-    if isfile(filepath):
-        df = read_csv(
-            filepath,
-            parse_dates=["date", "elapsed", "fix_date"],
-            date_format="%Y-%m-%d %H-%M-%S",
-        ).set_index("#")
-
-        df["elapsed"] = df["elapsed"].map(int)
-        df["vulns_list"] = df["vulns_list"].apply(lambda x: literal_eval(x))
-        df["vulns_severities"] = df["vulns_severities"].apply(lambda x: literal_eval(x))
-        df["fix_version"] = df["fix_version"].apply(lambda x: literal_eval(x))
-        df["date"] = df["date"].astype("datetime64[s]")
-        df["fix_date"] = df["fix_date"].astype("datetime64[s]")
-        df["last"] = df["last"].astype("datetime64[s]")
-
-        return df
-
-    rug_pulls: dict[str, list[Any]] = {
-        "#": [],
-        "action": [],
-        "version": [],
-        "version_type": [],
-        "version_used": [],
-        "date": [],
-        "repo": [],
-        "workflow": [],
-        "hash": [],
-        "vulns_list": [],
-        "vulns_severities": [],
-        "last": [],
-        "elapsed": [],
-        "fix_category": [],
-        "fix_date": [],
-        "fix_actor": [],
-        "fix_version": [],
-        "fix_v_type": [],
-        "fix_hash": [],
-        "ttx": [],
-        "ttpf": [],
+    filepath = _rug_pulls_path()
+
+    # The loaded frame is shared by all the sessions, so callers get a shallow copy
+    return _load_rug_pulls(filepath, data_version(filepath)).copy(deep=False)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_gantt_index(
+    filepath: str, version: tuple[int, int]
+) -> tuple[NDArray, DataFrame]:
+    keys = (
+        _load_rug_pulls(filepath, version)[["repo", "workflow"]]
+        .reset_index(drop=True)
+        .dropna()
+    )
+    # A stable sort keeps the rows of every group in their order, as groupby does
+    keys = keys.sort_values(by=["repo", "workflow"], kind="stable")
+    starts = flatnonzero((keys != keys.shift()).any(axis=1).to_numpy())
+
+    groups = keys.iloc[starts].reset_index(drop=True)
+    groups["start"] = starts
+    groups["end"] = append(starts[1:], len(keys))
+
+    return keys.index.to_numpy(), groups
+
+
+def compute_gantt_pages() -> int:
+    filepath = _rug_pulls_path()
+    _, groups = _load_gantt_index(filepath, data_version(filepath))
+
+    return ceil(len(groups) / GANTT_PAGE_SIZE)
+
+
+def compute_gantt_page(page: int) -> list[tuple[tuple[str, str], DataFrame]]:
+    filepath = _rug_pulls_path()
+    version = data_version(filepath)
+    rug_pulls = _load_rug_pulls(filepath, version)
+    order, groups = _load_gantt_index(filepath, version)
+
+    # Only the rows of the groups on the page are sliced out of the rug pulls
+    return [
+        ((repo, workflow), rug_pulls.iloc[order[start:end]])
+        for repo, workflow, start, end in groups.iloc[
+            (page - 1) * GANTT_PAGE_SIZE : page * GANTT_PAGE_SIZE
+        ].itertuples(index=False)
+    ]
+
+
+def _split_vulnerabilities(rug_pulls: DataFrame) -> DataFrame:
+    # Results compacted before the table existed only have the string columns
+    rows: list[dict[str, str | int | float]] = []
+
+    for rug_pull, deps, severities in zip(
+        rug_pulls.index, rug_pulls["vulns_list"], rug_pulls["vulns_severities"]
+    ):
+        versions: dict[str, tuple[str, str]] = {}
+
+        for dep in deps:
+            name, version = dep.split(" - ")[0].split("@v.")[:2]
+            versions[name] = (version, dep.split(" - ")[1])
+
+        for severity in severities:
+            name, vulnerability, cvss = severity.split(" // ")[:3]
+
+            rows.append(
+                {
+                    "rug_pull": rug_pull,
+                    "dependency": name,
+                    "version": versions[name][0],
+                    "subtype": versions[name][1],
+                    "vulnerability": vulnerability,
+                    "cve": (
+                        vulnerability if fullmatch(CVE_PATTERN, vulnerability) else ""
+                    ),
+                    "cvss": float(cvss),
+                    "severity": get_severity_group(float(cvss)),
+                }
+            )
+
+    return DataFrame(rows, columns=VULNERABILITIES_COLUMNS)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_vulnerabilities(filepath: str, version: tuple[int, int]) -> DataFrame:
+    if filepath == VULNERABILITIES_PATH:
+        return read_parquet(filepath)
+
+    return _split_vulnerabilities(_load_rug_pulls(filepath, version))
+
+
+def compute_rug_pull_vulnerabilities() -> DataFrame:
+    if isfile(RUG_PULLS_PATH) and isfile(VULNERABILITIES_PATH):
+        filepath = VULNERABILITIES_PATH
+    else:
+        filepath = RUG_PULLS_PATH if isfile(RUG_PULLS_PATH) else RUG_PULLS_CSV_PATH
+
+    return _load_vulnerabilities(filepath, data_version(filepath)).copy(deep=False)
+
+
+def compute_cvss_stats(vulnerabilities: DataFrame) -> dict[str, DataFrame]:
+    scored = vulnerabilities[vulnerabilities["severity"] > 0.0]
+
+    # The CVSS statistics of every category, plus the overall ones under ""
+    cvss = concat(
+        [
+            scored["severity"].agg(CVSS_STATS).to_frame("").T,
+            scored.groupby("fix_category")["severity"].agg(CVSS_STATS),
+        ]
+    )
+
+    unique = scored.drop_duplicates()
+    groups = cut(
+        unique["severity"], bins=SEVERITY_BINS, labels=SEVERITY_LABELS, ordered=False
+    )
+    buckets = (
+        unique.assign(group=groups.astype(object).fillna(""))
+        .groupby(["group", "fix_category"])
+        .size()
+        .reset_index(name="count")
+    )
+
+    # A single count per dependency usage, from which all the breakdowns follow
+    usages = vulnerabilities.groupby(
+        ["cve", "severity", "vuln", "vulns_list", "used as"], dropna=False
+    ).size()
+
+    def count(levels: list[str], used_as: str | None = None) -> DataFrame:
+        selected = usages
+
+        if used_as is not None:
+            selected = usages[usages.index.get_level_values("used as") == used_as]
+
+        return (
+            selected.groupby(level=levels)
+            .sum()
+            .sort_values(ascending=False, kind="stable")
+            .to_frame("count")
+        )
+
+    direct = count(["cve", "severity", "vuln"], "direct")
+    indirect = count(["cve", "severity", "vuln"], "indirect")
+    total = count(["cve", "severity", "vulns_list"])
+
+    return {
+        "cves": count(["cve"]),
+        "cvss": cvss,
+        "buckets": buckets,
+        "direct": direct,
+        "indirect": indirect,
+        "total": total,
+        "breakdown": direct.merge(
+            indirect, left_index=True, right_index=True, how="outer"
+        )
+        .merge(total, left_index=True, right_index=True, how="outer")
+        .dropna()
+        .rename(columns={"count_x": "direct", "count_y": "indirect", "count": "total"})
+        .sort_values(by="total", ascending=False, kind="stable"),
     }
 
-    index = 0
-
-    for repo_name, workflows_raw in tqdm(ss["selected_workflows"].items()):
-        repo: Repository = pickle2repo(f"{repo_name.replace('/', '::')}")
-        workflows: dict[str, Workflow] = {
-            name: repo.workflows[name]
-            for name in workflows_raw
-            if name in repo.workflows
-        }
-
-        rug_pulls_raw = _compute_rug_pulled_dependencies(repo_name, workflows)
-
-        for rug_pull in rug_pulls_raw:
-            fix = rug_pull.fix
-            fixed = type(rug_pull.fix) is ActualFix
-            p_fix = type(rug_pull.fix) is PotentialFix
-
-            vulnerable_deps = [
-                f"{dep_name}@v.{dep.version} - {dep.subtype}"
-                for dep_name, dep in rug_pull.vulnerabilities.items()
-            ]
-            
-            vulnerable_severities = [
-                f"{dep_name} // {vuln["cve"] if vuln["cve"] else vuln_name} // {vuln["cvss"]}"
-                for dep_name, dep in rug_pull.vulnerabilities.items()
-                for vuln_name, vuln in dep.vulnerabilities.items()
-            ]
-
-            workflow = workflows[rug_pull.location.split("/")[2]]
-            sorted_workflows = sorted(workflow.commits.values(), key=lambda x: x.date)
-            last_date = sorted_workflows[-1].date
-
-            rug_pulls["#"].append(index + 1)
-            rug_pulls["action"].append(rug_pull.action[0])
-            rug_pulls["version"].append(rug_pull.action[1].version)
-            rug_pulls["version_type"].append(rug_pull.action[1].version_type)
-            rug_pulls["version_used"].append(rug_pull.action[1].uses)
-            rug_pulls["date"].append(rug_pull.introduced)
-            rug_pulls["repo"].append("/".join(rug_pull.location.split("/")[:2]))
-            rug_pulls["workflow"].append(rug_pull.location.split("/")[2])
-            rug_pulls["hash"].append(rug_pull.location.split("/")[-1])
-            rug_pulls["vulns_list"].append(vulnerable_deps)
-            rug_pulls["vulns_severities"].append(vulnerable_severities)
-            rug_pulls["elapsed"].append((last_date - rug_pull.introduced).days)
-            rug_pulls["last"].append(last_date)
-            rug_pulls["fix_category"].append(rug_pull.get_fix_category())
-            rug_pulls["fix_date"].append(fix.date if fix else nan)
-            rug_pulls["fix_actor"].append(fix.who if fixed else nan)
-            rug_pulls["fix_version"].append(fix.versions if fixed else [])
-            rug_pulls["fix_v_type"].append(fix.version_type if fixed else nan)
-            rug_pulls["fix_hash"].append(fix.sha if fix else nan)
-            rug_pulls["ttx"].append(fix.ttx.days if fixed else nan)
-            rug_pulls["ttpf"].append(fix.ttpf.days if p_fix else nan)
-
-            index += 1
-
-    df = DataFrame(rug_pulls).set_index("#")
-    df.to_csv(filepath)
 
-    return df
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_date_counts(filepath: str, version: tuple[int, int]) -> DataFrame:
+    if filepath == COMMIT_DATES_PATH:
+        # Datasets built before the counts existed only have the raw dates
+        dates = read_csv(filepath).iloc[:, -1].astype("datetime64[s]")
+
+        return bin_dates(count_days(dates))
+
+    return read_date_counts(filepath)
+
+
+def compute_date_counts() -> DataFrame:
+    if isfile(COMMIT_DATE_COUNTS_PATH):
+        commits_path = COMMIT_DATE_COUNTS_PATH
+    else:
+        commits_path = COMMIT_DATES_PATH
+
+    commits = _load_date_counts(commits_path, data_version(commits_path))
+
+    if isfile(RUG_PULL_DATE_COUNTS_PATH):
+        rug_pulls = _load_date_counts(
+            RUG_PULL_DATE_COUNTS_PATH, data_version(RUG_PULL_DATE_COUNTS_PATH)
+        )
+    else:
+        rug_pulls = bin_dates(count_days(compute_rug_pulls()["date"]))
+
+    return concat(
+        [commits.assign(type="commit"), rug_pulls.assign(type="rug pull")],
+        ignore_index=True,
+    )
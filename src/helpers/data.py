@@ -0,0 +1,84 @@
+from json import load
+from os import stat
+from os.path import abspath, dirname, join
+from types import MappingProxyType
+from typing import Any, Mapping
+
+import streamlit as st
+
+from ..models.neo import Workflow
+from .repos import get_repo_names, pickle2repo
+
+WORKFLOWS_PATH = join(dirname(abspath(__file__)), "../../data/workflows.json")
+COMMITS_PATH = join(dirname(abspath(__file__)), "../../data/commits.json")
+REPOSITORIES_DIR = join(dirname(abspath(__file__)), "../../data/repositories")
+
+
+def data_version(filepath: str) -> tuple[int, int]:
+    # Changes whenever the file is rewritten, without having to read it
+    stats = stat(filepath)
+
+    return stats.st_mtime_ns, stats.st_size
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+# The resources below are shared by all the sessions of the process, so they are
+# frozen to keep a session from changing the data seen by the others
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_workflows(version: tuple[int, int]) -> Mapping[str, tuple[str, ...]]:
+    with open(WORKFLOWS_PATH) as file:
+        return _freeze(load(file))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_commits(version: tuple[int, int]) -> Mapping[str, tuple[str, ...]]:
+    with open(COMMITS_PATH) as file:
+        return _freeze(load(file))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_repo_names(version: tuple[int, int]) -> tuple[str, ...]:
+    return tuple(sorted(get_repo_names()))
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _load_repo_workflows(
+    file_name: str, names: tuple[str, ...], version: tuple[int, int]
+) -> Mapping[str, Workflow]:
+    workflows = pickle2repo(file_name).workflows
+
+    return MappingProxyType(
+        {name: workflows[name] for name in names if name in workflows}
+    )
+
+
+def load_selected_workflows() -> Mapping[str, tuple[str, ...]]:
+    return _load_workflows(data_version(WORKFLOWS_PATH))
+
+
+def load_selected_commits() -> Mapping[str, tuple[str, ...]]:
+    return _load_commits(data_version(COMMITS_PATH))
+
+
+def load_repo_names() -> tuple[str, ...]:
+    return _load_repo_names(data_version(REPOSITORIES_DIR))
+
+
+def load_repo_workflows(
+    repo_name: str, names: tuple[str, ...]
+) -> Mapping[str, Workflow]:
+    file_name = repo_name.replace("/", "::")
+
+    return _load_repo_workflows(
+        file_name, names, data_version(join(REPOSITORIES_DIR, f"{file_name}.pickle"))
+    )
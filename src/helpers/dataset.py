@@ -0,0 +1,97 @@
+from itertools import batched
+from os import mkdir, rename
+from os.path import abspath, dirname, isdir, isfile, join
+from shutil import rmtree
+from typing import Any, Iterable
+
+import pyarrow as pa
+from pandas import DataFrame, read_csv, read_parquet
+from pyarrow.parquet import ParquetWriter
+
+DATASET_DIR = join(dirname(abspath(__file__)), "../../data/dataset")
+DATASET_CSV_PATH = join(dirname(abspath(__file__)), "../../data/dataset.csv")
+DATASET_SCHEMA = pa.schema(
+    [
+        ("repository", pa.string()),
+        ("workflow", pa.string()),
+        ("commit", pa.string()),
+        ("action", pa.string()),
+        ("action_u", pa.int64()),
+        ("action_v", pa.string()),
+        ("action_d", pa.timestamp("s", tz="UTC")),
+        ("dependency", pa.string()),
+        ("dependency_v", pa.string()),
+        ("dependency_t", pa.string()),
+        ("vulnerability", pa.string()),
+    ]
+)
+# Every value of these columns repeats over many rows, the commit hashes do not
+DICTIONARY_COLUMNS = [
+    "repository",
+    "workflow",
+    "action",
+    "action_v",
+    "dependency",
+    "dependency_v",
+    "dependency_t",
+    "vulnerability",
+]
+DATASET_BATCH_ROWS = 65536
+
+
+def dataset_file(directory: str, file_name: str) -> str:
+    return join(directory, f"{file_name}.parquet")
+
+
+def write_dataset_rows(rows: Iterable[dict[str, Any]], filepath: str) -> int:
+    written = 0
+
+    # Only one batch of rows is held in memory at a time
+    with ParquetWriter(
+        filepath, DATASET_SCHEMA, use_dictionary=DICTIONARY_COLUMNS
+    ) as writer:
+        for batch in batched(rows, DATASET_BATCH_ROWS):
+            writer.write_batch(
+                pa.RecordBatch.from_pylist(list(batch), schema=DATASET_SCHEMA)
+            )
+            written += len(batch)
+
+    return written
+
+
+def new_dataset_dir(directory: str = DATASET_DIR) -> str:
+    temp_dir = f"{directory}.tmp"
+
+    if isdir(temp_dir):
+        rmtree(temp_dir)
+
+    mkdir(temp_dir)
+
+    return temp_dir
+
+
+def publish_dataset_dir(temp_dir: str, directory: str = DATASET_DIR) -> None:
+    # The previous files are only removed once the new ones are complete
+    if isdir(directory):
+        rmtree(directory)
+
+    rename(temp_dir, directory)
+
+
+def read_dataset(
+    directory: str = DATASET_DIR, csv_path: str = DATASET_CSV_PATH
+) -> DataFrame:
+    # The CSV exported before the Parquet files is read until they are written,
+    # without reading the versions that look like numbers as numbers
+    if not isdir(directory) and isfile(csv_path):
+        return read_csv(
+            csv_path,
+            index_col=0,
+            dtype={
+                field.name: str
+                for field in DATASET_SCHEMA
+                if pa.types.is_string(field.type)
+            },
+        )
+
+    return read_parquet(directory)
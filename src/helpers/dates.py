@@ -0,0 +1,81 @@
+from collections import Counter
+from datetime import date, datetime
+from os import replace
+from os.path import abspath, dirname, join
+from typing import Iterable
+
+from pandas import DataFrame, Series, Timestamp, concat, read_csv, to_datetime
+
+COMMIT_DATE_COUNTS_PATH = join(
+    dirname(abspath(__file__)), "../../data/commit_date_counts.csv"
+)
+RUG_PULL_DATE_COUNTS_PATH = join(
+    dirname(abspath(__file__)), "../../data/rug_pull_date_counts.csv"
+)
+DATE_COUNTS_COLUMNS = ["frequency", "date", "count"]
+# Each bin is labelled with the first day of its period
+FREQUENCIES = {"day": "D", "week": "W-SUN", "month": "M"}
+
+
+def to_day(value: datetime | date) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def count_days(dates: Iterable[datetime | date]) -> Counter[date]:
+    return Counter(to_day(value) for value in dates)
+
+
+def bin_dates(days: Counter[date]) -> DataFrame:
+    daily = Series(days, dtype="int64")
+    daily.index = to_datetime(list(days.keys()))
+
+    # The weekly and monthly counts are rolled up from the daily ones
+    return concat(
+        [
+            DataFrame(
+                {
+                    "frequency": frequency,
+                    "date": period.index,
+                    "count": period.to_numpy(),
+                }
+            )
+            for frequency, period in [
+                (
+                    frequency,
+                    daily.groupby(daily.index.to_period(alias).start_time).sum(),
+                )
+                for frequency, alias in FREQUENCIES.items()
+            ]
+        ],
+        ignore_index=True,
+    ).sort_values(by=["frequency", "date"], kind="stable", ignore_index=True)
+
+
+def write_date_counts(days: Counter[date], filepath: str) -> None:
+    bin_dates(days).to_csv(f"{filepath}.tmp", index=False)
+    replace(f"{filepath}.tmp", filepath)
+
+
+def read_date_counts(filepath: str) -> DataFrame:
+    counts = read_csv(filepath)
+    counts["date"] = counts["date"].astype("datetime64[s]")
+
+    return counts
+
+
+def date_quartiles(counts: DataFrame) -> dict[str, Timestamp]:
+    counts = counts.sort_values(by="date")
+    cumulative = counts["count"].cumsum().to_numpy()
+    dates = counts["date"].to_numpy()
+
+    # Quantiles of the binned dates, weighted by the count of every bin
+    def quantile(q: float) -> Timestamp:
+        return Timestamp(dates[(cumulative >= q * cumulative[-1]).argmax()])
+
+    return {
+        "lowerfence": Timestamp(dates[0]),
+        "q1": quantile(0.25),
+        "median": quantile(0.5),
+        "q3": quantile(0.75),
+        "upperfence": Timestamp(dates[-1]),
+    }
@@ -0,0 +1,615 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from hashlib import sha256
+from json import dump, load
+from os import makedirs, replace
+from os.path import abspath, dirname, isfile, join
+from typing import Any, Collection, Iterable, Iterator
+
+from dotenv import dotenv_values
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow.parquet import ParquetWriter, read_table, write_table
+from tqdm import tqdm
+
+from ..helpers.dates import RUG_PULL_DATE_COUNTS_PATH, count_days, write_date_counts
+from ..helpers.metrics import METRICS_PATH, materialize_metrics
+from ..helpers.queries import connect, get_first_fixed_commit, is_dependency_fixable
+from ..helpers.repos import (
+    action_timelines_digest,
+    get_action_timelines,
+    get_summaries,
+    pickle2repo,
+    repo_digest,
+)
+from ..models.neo import Dependency, Repository, Workflow
+from ..models.rugs import ActualFix, PotentialFix, Rugpull
+
+DETECTOR_VERSION = "3"
+MANIFEST_FLUSH_REPOS = 100
+RUG_PULLS_COLUMNS = [
+    "#",
+    "action",
+    "version",
+    "version_type",
+    "version_used",
+    "date",
+    "repo",
+    "workflow",
+    "hash",
+    "vulns_list",
+    "vulns_severities",
+    "last",
+    "elapsed",
+    "fix_category",
+    "fix_date",
+    "fix_actor",
+    "fix_version",
+    "fix_v_type",
+    "fix_hash",
+    "ttx",
+    "ttpf",
+]
+VULNERABILITIES_COLUMNS = [
+    "rug_pull",
+    "dependency",
+    "version",
+    "subtype",
+    "vulnerability",
+    "cve",
+    "cvss",
+    "severity",
+]
+CHUNKS_DIR = join(dirname(abspath(__file__)), "../../data/rug_pulls")
+RUG_PULLS_PATH = join(dirname(abspath(__file__)), "../../data/rug_pulls.parquet")
+RUG_PULLS_CSV_PATH = join(dirname(abspath(__file__)), "../../data/rug_pulls.csv")
+VULNERABILITIES_PATH = join(
+    dirname(abspath(__file__)), "../../data/rug_pull_vulnerabilities.parquet"
+)
+VULNERABILITIES_SCHEMA = pa.schema(
+    [
+        ("rug_pull", pa.int64()),
+        ("dependency", pa.string()),
+        ("version", pa.string()),
+        ("subtype", pa.string()),
+        ("vulnerability", pa.string()),
+        ("cve", pa.string()),
+        ("cvss", pa.float64()),
+        ("severity", pa.string()),
+    ]
+)
+RUG_PULLS_SCHEMA = pa.schema(
+    [
+        ("#", pa.int64()),
+        ("action", pa.string()),
+        ("version", pa.string()),
+        ("version_type", pa.string()),
+        ("version_used", pa.int64()),
+        ("date", pa.timestamp("s")),
+        ("repo", pa.string()),
+        ("workflow", pa.string()),
+        ("hash", pa.string()),
+        ("vulns_list", pa.list_(pa.string())),
+        ("vulns_severities", pa.list_(pa.string())),
+        ("last", pa.timestamp("s")),
+        ("elapsed", pa.int64()),
+        ("fix_category", pa.string()),
+        ("fix_date", pa.timestamp("s")),
+        ("fix_actor", pa.string()),
+        ("fix_version", pa.list_(pa.string())),
+        ("fix_v_type", pa.string()),
+        ("fix_hash", pa.string()),
+        ("ttx", pa.float64()),
+        ("ttpf", pa.float64()),
+    ]
+)
+
+
+def _encode_vulnerable_deps(
+    dependencies: dict[str, Dependency], ids: dict[str, int]
+) -> dict[str, int]:
+    masks: dict[str, int] = {}
+
+    for key, dep in dependencies.items():
+        if len(dep.vulnerabilities) == 0:
+            continue
+
+        if key not in ids:
+            ids[key] = len(ids)
+
+        masks[dep.parent] = masks.get(dep.parent, 0) | 1 << ids[key]
+
+    return masks
+
+
+def _compute_rug_pulled_dependencies(
+    repo_name: str,
+    workflows: dict[str, Workflow],
+    parents: dict[str, set[str]] | None = None,
+) -> list[Rugpull]:
+    rug_pulled_actions: list[Rugpull] = []
+
+    # Nothing to analyze, so neither the timelines nor the database are needed
+    if len(workflows) == 0:
+        return rug_pulled_actions
+
+    timelines = get_action_timelines()
+    session = (
+        connect(dotenv_values(join(dirname(abspath(__file__)), "../../.env")))
+        if timelines is None
+        else None
+    )
+
+    for workflow_name, workflow in workflows.items():
+        pos = -1
+        prev_commit_sha: str = ""
+        prev_user_versions: dict[str, Dependency] = {}
+        ids: dict[str, int] = {}
+        commit_masks: dict[str, dict[str, int]] = {}
+        workflow_rug_pulls: list[tuple[Rugpull, int]] = []
+
+        for commit_sha, commit in workflow.commits.items():
+            masks = _encode_vulnerable_deps(commit.dependencies["indirect"], ids)
+            commit_masks[commit_sha] = masks
+
+            if pos == -1:
+                prev_commit_sha = commit_sha
+                pos += 1
+
+                continue
+
+            prev_masks = commit_masks[prev_commit_sha]
+
+            for name, dep in commit.dependencies["direct"].items():
+                if parents is not None and name not in parents[workflow_name]:
+                    continue
+
+                if name not in prev_user_versions:
+                    prev_user_versions[name] = dep
+
+                prev = prev_user_versions[name]
+
+                if not dep.date or not prev.date:
+                    continue
+
+                if dep.version == prev.version and dep.date != prev.date:
+                    new_mask = masks.get(name, 0) & ~prev_masks.get(name, 0)
+
+                    if new_mask == 0:
+                        continue
+
+                    new_vulnerable_deps = {
+                        key: indirect
+                        for key, indirect in commit.dependencies["indirect"].items()
+                        if key in ids and new_mask >> ids[key] & 1
+                    }
+
+                    filepath = workflow.filepath
+                    hash_digest: str = sha256(f"{filepath}".encode("utf-8")).hexdigest()
+                    link_from = f"https://github.com/{repo_name}/commit/{prev_commit_sha}#diff-{hash_digest}"
+                    link_to = f"https://github.com/{repo_name}/commit/{commit_sha}#diff-{hash_digest}"
+
+                    workflow_rug_pulls.append(
+                        (
+                            Rugpull(
+                                location=f"{repo_name}/{workflow_name}/{commit_sha}",
+                                from_commit=f"{repo_name}/{workflow_name}/{prev_commit_sha}",
+                                links=(link_from, link_to),
+                                action=(name, dep),
+                                vulnerabilities=new_vulnerable_deps,
+                                introduced=dep.date,
+                                downgrade=dep.date < prev.date,
+                            ),
+                            new_mask,
+                        )
+                    )
+
+                prev_user_versions[name] = dep
+
+            prev_commit_sha = commit_sha
+            pos += 1
+
+        if len(workflow_rug_pulls) == 0:
+            continue
+
+        shas_sorted = sorted(workflow.commits.items(), key=lambda x: x[1].date)
+        positions = {sha: index for index, (sha, _) in enumerate(shas_sorted)}
+        last_date = shas_sorted[-1][1].date
+
+        for rug_pull, rug_pull_mask in workflow_rug_pulls:
+            begin = positions[rug_pull.location.split("/")[-1]] + 1
+
+            for commit in shas_sorted[begin:]:
+                if rug_pull.fix:
+                    break
+
+                if rug_pull.action[0] not in commit[1].dependencies["direct"]:
+                    rug_pull.fix = ActualFix(
+                        sha=commit[0],
+                        version=[],
+                        version_type=None,
+                        date=commit[1].date,
+                        ttx=commit[1].date - rug_pull.introduced,
+                        who="Workflow",
+                    )
+
+                    continue
+
+                curr_action = commit[1].dependencies["direct"][rug_pull.action[0]]
+                vuln_action = rug_pull.action[1]
+
+                if not curr_action.date or not vuln_action.date:
+                    continue
+
+                if (
+                    vuln_action.date == curr_action.date
+                    and vuln_action.version == curr_action.version
+                ):
+                    continue
+
+                still_vulnerable = (
+                    rug_pull_mask & commit_masks[commit[0]].get(rug_pull.action[0], 0)
+                )
+
+                who = (
+                    "Action"
+                    if vuln_action.version == curr_action.version
+                    else "Workflow"
+                )
+                fix_date = curr_action.date if who == "Action" else commit[1].date
+
+                if still_vulnerable == 0:
+                    rug_pull.fix = ActualFix(
+                        sha=commit[0],
+                        version=[curr_action.version],
+                        version_type=curr_action.version_type,
+                        date=fix_date,
+                        ttx=fix_date - rug_pull.introduced,
+                        who=who,
+                    )
+
+            if not rug_pull.fix:
+                if timelines is not None:
+                    fix = (
+                        timelines[rug_pull.action[0]].first_fixed(
+                            list(rug_pull.vulnerabilities.keys()), rug_pull.introduced
+                        )
+                        if rug_pull.action[0] in timelines
+                        else None
+                    )
+                else:
+                    fix = get_first_fixed_commit(
+                        action=rug_pull.action[0],
+                        deps=list(rug_pull.vulnerabilities.keys()),
+                        date=rug_pull.introduced,
+                        session=session,
+                    )
+
+                if fix and fix[0] < last_date:
+                    fix_date = datetime(
+                        fix[0].year,
+                        fix[0].month,
+                        fix[0].day,
+                        fix[0].hour,
+                        fix[0].minute,
+                        fix[0].second,
+                    )
+
+                    if rug_pull.action[1].version in fix[1]:
+                        rug_pull.fix = ActualFix(
+                            sha=fix[2],
+                            version=[rug_pull.action[1].version],
+                            version_type=rug_pull.action[1].version_type,
+                            date=fix_date,
+                            ttx=fix_date - rug_pull.introduced,
+                            who="Action",
+                        )
+                    else:
+                        rug_pull.fix = PotentialFix(
+                            sha=fix[2],
+                            date=fix_date,
+                            versions=fix[1],
+                            ttpf=fix_date - rug_pull.introduced,
+                        )
+                else:
+                    fixable_deps_dates = [
+                        is_dependency_fixable(dep_name, dep.version)
+                        for dep_name, dep in rug_pull.vulnerabilities.items()
+                    ]
+
+                    if None not in fixable_deps_dates and len(fixable_deps_dates) > 0:
+                        fixable_deps_date = sorted(fixable_deps_dates)[-1]
+
+                        if rug_pull.introduced < fixable_deps_date < last_date:
+                            rug_pull.fix = PotentialFix(
+                                sha="",
+                                date=fixable_deps_date,
+                                versions=[],
+                                ttpf=fixable_deps_date - rug_pull.introduced,
+                                dependencies=True,
+                            )
+
+            rug_pulled_actions.append(rug_pull)
+
+    return rug_pulled_actions
+
+
+def _iter_rug_pull_rows(
+    workflows: dict[str, Workflow], rug_pulls_raw: list[Rugpull]
+) -> Iterator[dict[str, Any]]:
+    last_dates: dict[str, datetime] = {}
+
+    for index, rug_pull in enumerate(rug_pulls_raw):
+        fix = rug_pull.fix
+        fixed = type(rug_pull.fix) is ActualFix
+        p_fix = type(rug_pull.fix) is PotentialFix
+
+        vulnerable_deps = [
+            f"{dep_name}@v.{dep.version} - {dep.subtype}"
+            for dep_name, dep in rug_pull.vulnerabilities.items()
+        ]
+
+        vulnerable_severities = [
+            f"{dep_name} // {vuln["cve"] if vuln["cve"] else vuln_name} // {vuln["cvss"]}"
+            for dep_name, dep in rug_pull.vulnerabilities.items()
+            for vuln_name, vuln in dep.vulnerabilities.items()
+        ]
+
+        workflow_name = rug_pull.location.split("/")[2]
+
+        if workflow_name not in last_dates:
+            last_dates[workflow_name] = max(
+                commit.date for commit in workflows[workflow_name].commits.values()
+            )
+
+        last_date = last_dates[workflow_name]
+
+        yield {
+            "#": index + 1,
+            "action": rug_pull.action[0],
+            "version": rug_pull.action[1].version,
+            "version_type": rug_pull.action[1].version_type,
+            "version_used": rug_pull.action[1].uses,
+            "date": rug_pull.introduced,
+            "repo": "/".join(rug_pull.location.split("/")[:2]),
+            "workflow": workflow_name,
+            "hash": rug_pull.location.split("/")[-1],
+            "vulns_list": vulnerable_deps,
+            "vulns_severities": vulnerable_severities,
+            "last": last_date,
+            "elapsed": (last_date - rug_pull.introduced).days,
+            "fix_category": rug_pull.get_fix_category(),
+            "fix_date": fix.date if fix else None,
+            "fix_actor": fix.who if fixed else None,
+            "fix_version": fix.versions if fixed else [],
+            "fix_v_type": fix.version_type if fixed else None,
+            "fix_hash": fix.sha if fix else None,
+            "ttx": fix.ttx.days if fixed else None,
+            "ttpf": fix.ttpf.days if p_fix else None,
+        }
+
+
+def get_severity_group(cvss: float) -> str:
+    if 0.1 < cvss <= 3.99:
+        return "low"
+    elif 4.0 < cvss <= 6.99:
+        return "medium"
+    elif 7.0 < cvss <= 8.99:
+        return "high"
+    elif 9.0 < cvss <= 10.0:
+        return "critical"
+    else:
+        return ""
+
+
+def _iter_vulnerability_rows(rug_pulls_raw: list[Rugpull]) -> Iterator[dict[str, Any]]:
+    for index, rug_pull in enumerate(rug_pulls_raw):
+        for dep_name, dep in rug_pull.vulnerabilities.items():
+            for vuln_name, vuln in dep.vulnerabilities.items():
+                yield {
+                    "rug_pull": index + 1,
+                    "dependency": dep_name,
+                    "version": dep.version,
+                    "subtype": dep.subtype,
+                    "vulnerability": vuln_name,
+                    "cve": vuln["cve"] if vuln["cve"] else "",
+                    "cvss": float(vuln["cvss"]),
+                    "severity": get_severity_group(float(vuln["cvss"])),
+                }
+
+
+def chunk_file(chunks_dir: str, repo_name: str) -> str:
+    return join(chunks_dir, f"{repo_name.replace("/", "::")}.parquet")
+
+
+def vulnerabilities_chunk(chunk: str) -> str:
+    return f"{chunk.removesuffix(".parquet")}.vulnerabilities.parquet"
+
+
+def write_chunk(
+    rows: Iterable[dict[str, Any]], schema: pa.Schema, filepath: str
+) -> None:
+    # Typed up front, a chunk without any fix or any row still matches the schema
+    write_table(pa.Table.from_pylist(list(rows), schema=schema), filepath)
+
+
+def _compute_repo_rug_pulls(
+    repo_name: str,
+    workflows_raw: list[str],
+    entry: dict[str, Any] | None,
+    summary: dict[str, Any] | None,
+    timelines: str,
+    chunks_dir: str,
+) -> tuple[str, dict[str, Any], int]:
+    file_name = repo_name.replace("/", "::")
+    chunk = chunk_file(chunks_dir, repo_name)
+    digest = repo_digest(file_name)
+    new_entry = {
+        "digest": digest,
+        "version": DETECTOR_VERSION,
+        "timelines": timelines,
+        "workflows": sorted(workflows_raw),
+    }
+
+    if entry == new_entry and isfile(chunk) and isfile(vulnerabilities_chunk(chunk)):
+        return chunk, entry, 0
+
+    parents: dict[str, set[str]] | None = None
+
+    if summary and summary["digest"] == digest:
+        parents = {
+            name: set(summary["workflows"][name]["parents"])
+            for name in workflows_raw
+            if name in summary["workflows"] and summary["workflows"][name]["vulnerable"]
+        }
+        workflows_raw = list(parents.keys())
+
+    workflows: dict[str, Workflow] = {}
+
+    if len(workflows_raw) > 0:
+        repo: Repository = pickle2repo(file_name)
+        workflows = {
+            name: repo.workflows[name]
+            for name in workflows_raw
+            if name in repo.workflows
+        }
+
+    rug_pulls_raw = _compute_rug_pulled_dependencies(repo_name, workflows, parents)
+    write_chunk(
+        _iter_rug_pull_rows(workflows, rug_pulls_raw), RUG_PULLS_SCHEMA, chunk
+    )
+    write_chunk(
+        _iter_vulnerability_rows(rug_pulls_raw),
+        VULNERABILITIES_SCHEMA,
+        vulnerabilities_chunk(chunk),
+    )
+
+    return (
+        chunk,
+        new_entry,
+        sum(len(workflow.commits) for workflow in workflows.values()),
+    )
+
+
+def _write_manifest(manifest: dict[str, dict[str, Any]], filepath: str) -> None:
+    with open(f"{filepath}.tmp", "w") as file:
+        dump(manifest, file)
+
+    replace(f"{filepath}.tmp", filepath)
+
+
+def detect_rug_pulls(
+    selected_workflows: dict[str, list[str]],
+    chunks_dir: str = CHUNKS_DIR,
+    workers: int = 1,
+    refresh: Collection[str] | None = None,
+) -> Iterator[tuple[str, int]]:
+    manifest_path = join(chunks_dir, "manifest.json")
+    manifest: dict[str, dict[str, Any]] = {}
+
+    makedirs(chunks_dir, exist_ok=True)
+
+    if isfile(manifest_path):
+        with open(manifest_path) as file:
+            manifest = load(file)
+
+    summaries = get_summaries()
+    timelines = action_timelines_digest()
+    repo_names = [
+        repo_name
+        for repo_name in selected_workflows
+        if refresh is None or repo_name in refresh
+    ]
+    args = (
+        repo_names,
+        [selected_workflows[repo_name] for repo_name in repo_names],
+        [manifest.get(repo_name) for repo_name in repo_names],
+        [summaries.get(repo_name) for repo_name in repo_names],
+        [timelines for _ in repo_names],
+        [chunks_dir for _ in repo_names],
+    )
+
+    updated = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_compute_repo_rug_pulls, *args)
+
+        try:
+            # Every chunk of the selection is yielded in order, so that the
+            # compacted files keep covering all of it when only a part of it
+            # is refreshed
+            for repo_name in tqdm(selected_workflows, total=len(selected_workflows)):
+                if refresh is not None and repo_name not in refresh:
+                    chunk = chunk_file(chunks_dir, repo_name)
+
+                    if (
+                        repo_name in manifest
+                        and isfile(chunk)
+                        and isfile(vulnerabilities_chunk(chunk))
+                    ):
+                        yield chunk, 0
+
+                    continue
+
+                chunk, entry, commits = next(results)
+                manifest[repo_name] = entry
+                updated += 1
+
+                if updated % MANIFEST_FLUSH_REPOS == 0:
+                    _write_manifest(manifest, manifest_path)
+
+                yield chunk, commits
+        finally:
+            # Also reached when the run is interrupted, the finished chunks are
+            # kept and the repositories that were not started are dropped
+            executor.shutdown(wait=True, cancel_futures=True)
+            _write_manifest(manifest, manifest_path)
+
+
+def compact_rug_pulls(
+    chunks: Iterable[str],
+    filepath: str = RUG_PULLS_PATH,
+    vulnerabilities_path: str = VULNERABILITIES_PATH,
+    metrics_path: str = METRICS_PATH,
+    date_counts_path: str = RUG_PULL_DATE_COUNTS_PATH,
+) -> None:
+    offset = 0
+    days: Counter[date] = Counter()
+
+    with (
+        ParquetWriter(f"{filepath}.tmp", RUG_PULLS_SCHEMA) as writer,
+        ParquetWriter(
+            f"{vulnerabilities_path}.tmp", VULNERABILITIES_SCHEMA
+        ) as vulnerabilities_writer,
+    ):
+        for chunk in chunks:
+            table = read_table(chunk).select(RUG_PULLS_SCHEMA.names)
+            rows = table.num_rows
+            table = table.set_column(
+                0, "#", pa.array(range(offset + 1, offset + rows + 1), pa.int64())
+            )
+
+            writer.write_table(table.cast(RUG_PULLS_SCHEMA))
+
+            # The rug pull ids are renumbered like the rug pulls themselves
+            vulnerabilities = read_table(vulnerabilities_chunk(chunk)).select(
+                VULNERABILITIES_SCHEMA.names
+            )
+            vulnerabilities = vulnerabilities.set_column(
+                0, "rug_pull", pc.add(vulnerabilities["rug_pull"], offset)
+            )
+
+            vulnerabilities_writer.write_table(
+                vulnerabilities.cast(VULNERABILITIES_SCHEMA)
+            )
+
+            days.update(count_days(table["date"].to_pylist()))
+            offset += rows
+
+    replace(f"{filepath}.tmp", filepath)
+    replace(f"{vulnerabilities_path}.tmp", vulnerabilities_path)
+
+    # The summaries only change with the rug pulls, so they are computed here once
+    materialize_metrics(filepath, metrics_path)
+    write_date_counts(days, date_counts_path)
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from hashlib import sha256
+from json import dumps, loads
+from os import getpid, listdir, remove, replace, utime
+from os.path import getmtime, isdir, isfile, join
+from threading import Lock, get_ident
+from typing import Any, Callable
+
+from plotly.graph_objects import Figure
+
+FIGURE_CACHE_ENTRIES = 128
+FIGURE_CACHE_DISK_ENTRIES = 1024
+
+
+def figure_key(figure_id: str, version: Any, params: tuple[Any, ...]) -> str:
+    return sha256(
+        dumps([figure_id, version, params], default=str).encode()
+    ).hexdigest()
+
+
+def figure_from_json(spec: str) -> Figure:
+    # The specs were valid when they were cached, so they are not validated again
+    return Figure(loads(spec), _validate=False)
+
+
+class FigureCache:
+    entries: OrderedDict[str, str]
+    max_entries: int
+    max_disk_entries: int
+    directory: str | None
+    lock: Lock
+
+    def __init__(
+        self,
+        max_entries: int = FIGURE_CACHE_ENTRIES,
+        directory: str | None = None,
+        max_disk_entries: int = FIGURE_CACHE_DISK_ENTRIES,
+    ) -> None:
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.directory = directory if directory and isdir(directory) else None
+        self.lock = Lock()
+
+    def _path(self, key: str) -> str:
+        return join(self.directory or "", f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+
+                return self.entries[key]
+
+        if self.directory is None or not isfile(self._path(key)):
+            return None
+
+        try:
+            with open(self._path(key)) as file:
+                spec = file.read()
+
+            # The modification time orders the files from the least recently used
+            utime(self._path(key))
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            return None
+
+        self._remember(key, spec)
+
+        return spec
+
+    def _remember(self, key: str, spec: str) -> None:
+        with self.lock:
+            self.entries[key] = spec
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def put(self, key: str, spec: str) -> None:
+        self._remember(key, spec)
+
+        if self.directory is not None:
+            # Other threads and processes may be writing the same figure
+            temp_path = f"{self._path(key)}.{getpid()}-{get_ident()}.tmp"
+
+            with open(temp_path, "w") as file:
+                file.write(spec)
+
+            replace(temp_path, self._path(key))
+            self._evict()
+
+    def _evict(self) -> None:
+        paths = [
+            join(self.directory or "", name)
+            for name in listdir(self.directory or "")
+            if name.endswith(".json")
+        ]
+
+        if len(paths) <= self.max_disk_entries:
+            return
+
+        ages: list[tuple[float, str]] = []
+
+        for path in paths:
+            try:
+                ages.append((getmtime(path), path))
+            except FileNotFoundError:
+                continue
+
+        for _, path in sorted(ages)[: len(ages) - self.max_disk_entries]:
+            try:
+                remove(path)
+            except FileNotFoundError:
+                continue
+
+    def get_or_build(self, key: str, build: Callable[[], Figure]) -> str:
+        spec = self.get(key)
+
+        if spec is None:
+            spec = build().to_json()
+            self.put(key, spec)
+
+        return spec
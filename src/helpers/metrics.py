@@ -0,0 +1,178 @@
+from hashlib import file_digest, sha256
+from os import replace
+from os.path import abspath, dirname, join
+
+import duckdb
+import pyarrow as pa
+from pandas import DataFrame
+from pyarrow.parquet import read_table, write_table
+
+METRICS_PATH = join(
+    dirname(abspath(__file__)), "../../data/rug_pull_metrics.parquet"
+)
+METRICS_COLUMNS = [
+    "section",
+    "element",
+    "count",
+    "min",
+    "max",
+    "mean",
+    "median",
+    "stdev",
+]
+# Shared with the filters of the rug pulls table, so that its pages add up to the
+# counts, including the rug pulls without any fix category
+FIXED = "fix_category = 'fixed'"
+NOT_FIXED = "fix_category IS DISTINCT FROM 'fixed'"
+COUNTS = [
+    ("total", "TRUE"),
+    ("fixed", FIXED),
+    ("fixed_workflow", f"{FIXED} AND fix_actor = 'Workflow'"),
+    ("fixed_action", f"{FIXED} AND fix_actor = 'Action'"),
+    ("not_fixed", NOT_FIXED),
+    ("fixable", "fix_category = 'fixable'"),
+    ("dep_fixable", "fix_category = 'dep_fixable'"),
+    ("unfixable", "fix_category = 'unfixable'"),
+]
+GROUPINGS = [
+    ("repository", ["repo"]),
+    ("workflow", ["repo", "workflow"]),
+    ("commit", ["repo", "workflow", "hash"]),
+    ("action", ["action"]),
+    ("action version", ["action", "version"]),
+]
+DURATIONS = [
+    ("ttx", FIXED),
+    ("ttpf", "fix_category NOT IN ('fixed', 'unfixable')"),
+    ("elapsed", NOT_FIXED),
+]
+STATS = ["min", "max", "mean", "median", "stdev"]
+FUNCTIONS = {
+    "min": "min",
+    "max": "max",
+    "mean": "avg",
+    "median": "median",
+    "stdev": "stddev_samp",
+}
+
+
+def rug_pulls_digest(filepath: str) -> str:
+    with open(filepath, "rb") as file:
+        return file_digest(file, sha256).hexdigest()
+
+
+def compute_metrics(connection: duckdb.DuckDBPyConnection) -> DataFrame:
+    rows: list[dict[str, str | int | float | None]] = []
+
+    # A single scan gives every count and the statistics of the three durations
+    totals = connection.execute(
+        "SELECT "
+        + ", ".join(
+            [f"count(*) FILTER (WHERE {cond}) AS {name}" for name, cond in COUNTS]
+            + [
+                f"count({name}) FILTER (WHERE {cond}) AS {name}_count, "
+                + ", ".join(
+                    f"{FUNCTIONS[stat]}({name}) FILTER (WHERE {cond}) AS {name}_{stat}"
+                    for stat in STATS
+                )
+                for name, cond in DURATIONS
+            ]
+        )
+        + " FROM rug_pulls"
+    ).df()
+
+    for name, _ in COUNTS:
+        rows.append(
+            {"section": "rug_pulls", "element": name, "count": totals[name].iloc[0]}
+        )
+
+    for name, _ in DURATIONS:
+        rows.append(
+            {
+                "section": "durations",
+                "element": name,
+                "count": totals[f"{name}_count"].iloc[0],
+                **{stat: totals[f"{name}_{stat}"].iloc[0] for stat in STATS},
+            }
+        )
+
+    # The sizes of all the groupings come from a single grouping-sets pass, where
+    # the groups with a missing key are left out as in the separate group-bys
+    columns = sorted({column for _, grouping in GROUPINGS for column in grouping})
+    levels = {
+        sum(
+            1 << (len(columns) - 1 - i)
+            for i, column in enumerate(columns)
+            if column not in grouping
+        ): element
+        for element, grouping in GROUPINGS
+    }
+    sets = ", ".join(f"({', '.join(grouping)})" for _, grouping in GROUPINGS)
+    present = " AND ".join(
+        f"(level & {1 << (len(columns) - 1 - i)} > 0 OR {column} IS NOT NULL)"
+        for i, column in enumerate(columns)
+    )
+    groups = connection.execute(
+        f"""
+        SELECT
+            level,
+            count(*) AS count,
+            {", ".join(f"{FUNCTIONS[stat]}(size) AS {stat}" for stat in STATS)}
+        FROM (
+            SELECT
+                {", ".join(columns)},
+                grouping({", ".join(columns)}) AS level,
+                count(*) AS size
+            FROM rug_pulls
+            GROUP BY GROUPING SETS ({sets})
+        )
+        WHERE {present}
+        GROUP BY level
+        """
+    ).df()
+    groups = groups.set_index(groups["level"].map(levels))
+
+    for element, _ in GROUPINGS:
+        if element not in groups.index:
+            continue
+
+        rows.append(
+            {
+                "section": "groups",
+                "element": element,
+                **{column: groups.loc[element, column] for column in ["count", *STATS]},
+            }
+        )
+
+    return DataFrame(rows, columns=METRICS_COLUMNS)
+
+
+def materialize_metrics(rug_pulls_path: str, filepath: str = METRICS_PATH) -> None:
+    connection = duckdb.connect()
+    connection.execute(
+        "CREATE VIEW rug_pulls AS SELECT * FROM read_parquet("
+        + "'"
+        + rug_pulls_path.replace("'", "''")
+        + "')"
+    )
+
+    table = pa.Table.from_pandas(compute_metrics(connection), preserve_index=False)
+    # The digest tells the readers which rug pulls the metrics were computed from
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            b"rug_pulls": rug_pulls_digest(rug_pulls_path),
+        }
+    )
+
+    write_table(table, f"{filepath}.tmp")
+    replace(f"{filepath}.tmp", filepath)
+
+
+def load_metrics(filepath: str, digest: str) -> DataFrame | None:
+    table = read_table(filepath)
+
+    if (table.schema.metadata or {}).get(b"rug_pulls", b"").decode() != digest:
+        return None
+
+    return table.to_pandas()
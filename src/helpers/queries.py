@@ -3,7 +3,7 @@ from datetime import datetime
 from neo4j import GraphDatabase, Session
 from requests import post
 
-from ..models.neo import Dependency
+from ..models.neo import ActionTimeline, Dependency
 
 PER_PAGE = 1000
 
@@ -176,6 +176,43 @@ def get_first_fixed_commit(
     return result[0] if result else None
 
 
+def get_action_timeline(action: str, session: Session) -> ActionTimeline:
+    commits = session.run(
+        """
+        MATCH (n:Component {full_name: $action})-[]->(v:Version)-[]->(c:Commit)-[]->(d:Version)
+        OPTIONAL MATCH (d)-[]->(vuln:Vulnerability)
+        WITH
+          v.name AS version,
+          c.name AS commit,
+          c.date AS date,
+          CASE vuln
+            WHEN IS NOT NULL THEN split(d.full_name, "/")[0]
+            ELSE NULL
+          END AS vuln_deps
+        WHERE c.date IS NOT NULL
+        WITH
+          version AS version,
+          date AS date,
+          commit AS sha,
+          COLLECT(DISTINCT vuln_deps) AS vulns
+        RETURN
+          date AS date,
+          sha AS sha,
+          COLLECT(version) AS versions,
+          vulns AS vulns
+        ORDER BY date
+        """,
+        action=action,
+    )
+
+    timeline = ActionTimeline()
+
+    for commit in commits:
+        timeline.add(commit["date"], commit["sha"], commit["versions"], commit["vulns"])
+
+    return timeline
+
+
 def is_dependency_fixable(dependency: str, version: str) -> datetime | None:
     res = post(
         url="https://api.osv.dev/v1/query",
@@ -1,8 +1,16 @@
+from functools import cache
+from hashlib import file_digest, sha256
+from json import load as load_json
 from os import listdir
-from os.path import join, dirname, abspath, splitext
+from os.path import join, dirname, abspath, isfile, splitext
 from pickle import load
+from typing import Any
 
-from ..models.neo import Repository
+from ..helpers.dates import count_days
+from ..models.neo import ActionTimeline, Repository
+
+# Bumped when the fields of the summaries change, so that they are recomputed
+SUMMARY_VERSION = "2"
 
 
 def get_repo_names() -> list[str]:
@@ -15,3 +23,60 @@ def get_repo_names() -> list[str]:
 def pickle2repo(file_name: str) -> Repository:
     with open(join(dirname(abspath(__file__)), f"../../data/repositories/{file_name}.pickle"), "rb") as file:
         return load(file)
+
+
+def repo_digest(file_name: str) -> str:
+    with open(join(dirname(abspath(__file__)), f"../../data/repositories/{file_name}.pickle"), "rb") as file:
+        return file_digest(file, sha256).hexdigest()
+
+
+def summarize_repo(repo: Repository, digest: str) -> dict[str, Any]:
+    workflows: dict[str, dict[str, Any]] = {}
+
+    for workflow_name, workflow in repo.workflows.items():
+        workflow.summarize()
+
+        workflows[workflow_name] = {
+            "vulnerable": workflow.vulnerable,
+            "parents": sorted(workflow.vulnerable_parents),
+            "commits": workflow.commit_count,
+            "days": {
+                day.isoformat(): count
+                for day, count in count_days(
+                    commit.date for commit in workflow.commits.values()
+                ).items()
+            },
+        }
+
+    return {"digest": digest, "version": SUMMARY_VERSION, "workflows": workflows}
+
+
+def get_summaries() -> dict[str, dict[str, Any]]:
+    filepath = join(dirname(abspath(__file__)), "../../data/summaries.json")
+
+    if not isfile(filepath):
+        return {}
+
+    with open(filepath) as file:
+        return load_json(file)
+
+
+@cache
+def get_action_timelines() -> dict[str, ActionTimeline] | None:
+    filepath = join(dirname(abspath(__file__)), "../../data/action_timelines.pickle")
+
+    if not isfile(filepath):
+        return None
+
+    with open(filepath, "rb") as file:
+        return load(file)
+
+
+def action_timelines_digest() -> str:
+    filepath = join(dirname(abspath(__file__)), "../../data/action_timelines.pickle")
+
+    if not isfile(filepath):
+        return ""
+
+    with open(filepath, "rb") as file:
+        return file_digest(file, sha256).hexdigest()
@@ -0,0 +1,169 @@
+from math import ceil
+from os.path import isfile
+from typing import Any
+
+import duckdb
+import streamlit as st
+from pandas import DataFrame
+
+from ..helpers.compute import (
+    compute_cvss_stats,
+    compute_rug_pull_vulnerabilities,
+    compute_rug_pulls,
+)
+from ..helpers.data import data_version
+from ..helpers.detect import RUG_PULLS_CSV_PATH, RUG_PULLS_PATH, VULNERABILITIES_PATH
+from ..helpers.metrics import (
+    FIXED,
+    METRICS_PATH,
+    NOT_FIXED,
+    compute_metrics,
+    load_metrics,
+    rug_pulls_digest,
+)
+
+# One row per vulnerability of every rug pull, with the category and the actor of
+# the fix in a single column
+VULNERABILITY_ROWS = """
+    SELECT
+        action,
+        dependency || '@v.' || vulns.version AS vulns_list,
+        date,
+        fix_category || ' ' || coalesce(fix_actor, '') AS fix_category,
+        coalesce(fix_actor, '') AS fix_actor,
+        vulns.version AS version,
+        dependency AS vuln,
+        subtype AS "used as",
+        CASE WHEN cve <> '' THEN cve ELSE vulnerability END AS cve,
+        cvss AS severity,
+        severity AS "group"
+    FROM rug_pull_vulnerabilities AS vulns
+    JOIN rug_pulls ON rug_pulls."#" = vulns.rug_pull
+    ORDER BY date, rug_pull
+"""
+
+# The filters of the rug pulls table, applied by the database before paging
+RUG_PULLS_FILTERS = {
+    "all": "TRUE",
+    "fixed": FIXED,
+    "not_fixed": NOT_FIXED,
+    "fixable": "fix_category = 'fixable'",
+    "dep_fixable": "fix_category = 'dep_fixable'",
+    "unfixable": "fix_category = 'unfixable'",
+}
+RUG_PULLS_PAGE_SIZE = 100
+
+
+def _literal(value: str) -> str:
+    # Views cannot be created from prepared statements
+    return "'" + value.replace("'", "''") + "'"
+
+
+def dataset_version() -> tuple[tuple[int, int], ...]:
+    return tuple(
+        data_version(filepath)
+        for filepath in [RUG_PULLS_PATH, VULNERABILITIES_PATH, RUG_PULLS_CSV_PATH]
+        if isfile(filepath)
+    )
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _get_connection(version: tuple[tuple[int, int], ...]) -> duckdb.DuckDBPyConnection:
+    connection = duckdb.connect()
+
+    # The views read the Parquet files directly, so filters and projections are
+    # pushed down to the scans
+    if isfile(RUG_PULLS_PATH) and isfile(VULNERABILITIES_PATH):
+        for view, filepath in [
+            ("rug_pulls", RUG_PULLS_PATH),
+            ("rug_pull_vulnerabilities", VULNERABILITIES_PATH),
+        ]:
+            connection.execute(
+                f"CREATE VIEW {view} AS SELECT * FROM read_parquet({_literal(filepath)})"
+            )
+    else:
+        connection.register("rug_pulls", compute_rug_pulls().reset_index())
+        connection.register(
+            "rug_pull_vulnerabilities", compute_rug_pull_vulnerabilities()
+        )
+
+    return connection
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _query(
+    sql: str, params: tuple[Any, ...], version: tuple[tuple[int, int], ...]
+) -> DataFrame:
+    # Every thread needs its own cursor on the shared connection
+    return _get_connection(version).cursor().execute(sql, list(params)).df()
+
+
+def query(sql: str, params: tuple[Any, ...] = ()) -> DataFrame:
+    return _query(sql, params, dataset_version())
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_metrics(version: tuple[tuple[int, int], ...]) -> DataFrame:
+    # The materialized metrics are only used if they match the current rug pulls
+    if isfile(METRICS_PATH) and isfile(RUG_PULLS_PATH):
+        metrics = load_metrics(METRICS_PATH, rug_pulls_digest(RUG_PULLS_PATH))
+
+        if metrics is not None:
+            return metrics
+
+    return compute_metrics(_get_connection(version).cursor())
+
+
+def _get_metrics(section: str) -> DataFrame:
+    metrics = _load_metrics(dataset_version())
+
+    return metrics[metrics["section"] == section].set_index("element")
+
+
+def get_rug_pull_counts() -> dict[str, int]:
+    return {
+        element: int(count)
+        for element, count in _get_metrics("rug_pulls")["count"].items()
+    }
+
+
+def get_group_stats() -> DataFrame:
+    return _get_metrics("groups").rename(columns={"count": "groups"})[
+        ["groups", "min", "max", "mean", "median", "stdev"]
+    ]
+
+
+def get_duration_stats() -> DataFrame:
+    return _get_metrics("durations")[
+        ["count", "min", "max", "median", "mean", "stdev"]
+    ]
+
+
+def get_vulnerability_rows() -> DataFrame:
+    return query(VULNERABILITY_ROWS)
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _get_cvss_stats(version: tuple[tuple[int, int], ...]) -> dict[str, DataFrame]:
+    return compute_cvss_stats(_query(VULNERABILITY_ROWS, (), version))
+
+
+def get_cvss_stats() -> dict[str, DataFrame]:
+    return _get_cvss_stats(dataset_version())
+
+
+def get_rug_pulls_pages(rug_pulls_filter: str) -> int:
+    condition = RUG_PULLS_FILTERS[rug_pulls_filter]
+    count = query(f"SELECT count(*) AS count FROM rug_pulls WHERE {condition}")
+
+    return max(1, ceil(count["count"].iloc[0] / RUG_PULLS_PAGE_SIZE))
+
+
+def get_rug_pulls_page(rug_pulls_filter: str, page: int) -> DataFrame:
+    condition = RUG_PULLS_FILTERS[rug_pulls_filter]
+
+    # Only the rows of the page leave the database
+    return query(
+        f'SELECT * FROM rug_pulls WHERE {condition} ORDER BY "#" LIMIT ? OFFSET ?',
+        (RUG_PULLS_PAGE_SIZE, (page - 1) * RUG_PULLS_PAGE_SIZE),
+    ).set_index("#")
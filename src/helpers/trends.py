@@ -0,0 +1,303 @@
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from itertools import islice
+from math import sqrt
+
+from scipy.special import ndtr
+from scipy.stats import kendalltau
+
+from ..models.neo import Commit, Workflow
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EMPTY_HISTORY = sha256().hexdigest()
+
+
+def _to_seconds(date: datetime) -> int:
+    # Same values as numpy's datetime64[s], which compute_dependencies uses
+    return (date - (EPOCH if date.tzinfo is None else EPOCH_UTC)) // timedelta(
+        seconds=1
+    )
+
+
+def commit_payload(sha: str, commit: Commit) -> bytes:
+    indirect_deps = commit.dependencies["indirect"].values()
+    vulnerable = sum(len(dep.vulnerabilities) > 0 for dep in indirect_deps)
+
+    # Everything a trend is computed from: the date and the dependency counts
+    return f";{sha}@{commit.date.isoformat()}:{len(indirect_deps)}:{vulnerable}".encode(
+        "utf-8"
+    )
+
+
+def extend_history(history: str, sha: str, commit: Commit) -> str:
+    # Chained, so that the history can be extended without the previous commits
+    return sha256(history.encode("utf-8") + commit_payload(sha, commit)).hexdigest()
+
+
+def history_digest(workflow: Workflow, commits: int | None = None) -> str:
+    history = EMPTY_HISTORY
+
+    for sha, commit in islice(workflow.commits.items(), commits):
+        history = extend_history(history, sha, commit)
+
+    return history
+
+
+def _permutation(size: int, inversions: int) -> list[int]:
+    # Built from its Lehmer code, the number of smaller values after each one
+    values = list(range(size))
+    permutation: list[int] = []
+
+    for i in range(size):
+        if inversions == 0:
+            permutation.extend(values)
+            break
+
+        step = min(inversions, size - 1 - i)
+        permutation.append(values.pop(step))
+        inversions -= step
+
+    return permutation
+
+
+def _tie_stats(count: int) -> tuple[int, int, int]:
+    return (
+        count * (count - 1) // 2,
+        count * (count - 1) * (count - 2),
+        count * (count - 1) * (2 * count + 5),
+    )
+
+
+class KendallTau:
+    size: int
+    tree: list[int]
+    y_counts: dict[int, int]
+    group: dict[int, int]
+    group_x: int | None
+    group_size: int
+    con_minus_dis: int
+    dis: int
+    x_ties: list[int]
+    y_ties: list[int]
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.tree = [0] * 65
+        self.y_counts = {}
+        self.group = {}
+        self.group_x = None
+        self.group_size = 0
+        self.con_minus_dis = 0
+        self.dis = 0
+        self.x_ties = [0, 0, 0]
+        self.y_ties = [0, 0, 0]
+
+    def _insert(self, y: int, count: int) -> None:
+        # Fenwick tree over the y values, for the points of the closed x groups
+        i = y + 1
+
+        while i < len(self.tree):
+            self.tree[i] += count
+            i += i & -i
+
+    def _count_below(self, y: int) -> int:
+        total = 0
+        i = min(y, len(self.tree) - 1)
+
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+
+        return total
+
+    def _grow(self, y: int) -> None:
+        size = len(self.tree) - 1
+
+        while size <= y:
+            size *= 2
+
+        self.tree = [0] * (size + 1)
+
+        for value, count in self.y_counts.items():
+            self._insert(value, count - self.group.get(value, 0))
+
+    def _close_group(self) -> None:
+        for y, count in self.group.items():
+            self._insert(y, count)
+
+        self.group = {}
+        self.group_size = 0
+
+    def add(self, x: int, y: int) -> None:
+        if self.group_x is not None and x < self.group_x:
+            raise ValueError("The points must be added in increasing x order")
+        if y < 0:
+            raise ValueError("The y values must not be negative")
+
+        if x != self.group_x:
+            self._close_group()
+            self.group_x = x
+        if y >= len(self.tree) - 1:
+            self._grow(y)
+
+        # Only the points with a smaller x are ordered with respect to the new one
+        closed = self.size - self.group_size
+        below = self._count_below(y)
+        above = closed - below - (self._count_below(y + 1) - below)
+
+        self.con_minus_dis += below - above
+        self.dis += above
+
+        for ties, count in [
+            (self.x_ties, self.group_size),
+            (self.y_ties, self.y_counts.get(y, 0)),
+        ]:
+            before = _tie_stats(count)
+            after = _tie_stats(count + 1)
+
+            for i in range(3):
+                ties[i] += after[i] - before[i]
+
+        self.size += 1
+        self.y_counts[y] = self.y_counts.get(y, 0) + 1
+        self.group[y] = self.group.get(y, 0) + 1
+        self.group_size += 1
+
+    def result(self) -> tuple[float, float]:
+        size = self.size
+
+        if size <= 1:
+            return 0.0, 0.0
+
+        total = size * (size - 1) // 2
+        xtie, x0, x1 = self.x_ties
+        ytie, y0, y1 = self.y_ties
+
+        if xtie == total or ytie == total:
+            return float("nan"), float("nan")
+
+        tau = self.con_minus_dis / sqrt(total - xtie) / sqrt(total - ytie)
+        tau = min(1.0, max(-1.0, tau))
+
+        # scipy computes an exact p-value in these cases, which only depends on
+        # the number of points and of discordant pairs, so any points without
+        # ties and with as many discordant pairs give the same one
+        if (xtie == 0 and ytie == 0) and (
+            size <= 33 or min(self.dis, total - self.dis) <= 1
+        ):
+            return tau, float(
+                kendalltau(range(size), _permutation(size, self.dis)).pvalue
+            )
+
+        m = size * (size - 1.0)
+        var = (
+            (m * (2 * size + 5) - x1 - y1) / 18
+            + (2 * xtie * ytie) / m
+            + x0 * y0 / (9 * m * (size - 2))
+        )
+
+        return tau, float(2 * ndtr(-abs(self.con_minus_dis / sqrt(var))))
+
+
+class WorkflowTrend:
+    commits: int
+    last: str | None
+    history: str
+    deps: KendallTau
+    vulns: KendallTau
+
+    def __init__(self) -> None:
+        self.commits = 0
+        self.last = None
+        self.history = EMPTY_HISTORY
+        self.deps = KendallTau()
+        self.vulns = KendallTau()
+
+    def _add(self, workflow: Workflow, shas: list[str]) -> None:
+        for sha in shas:
+            indirect_deps = workflow.commits[sha].dependencies["indirect"].values()
+
+            # Commits without any dependency do not contribute to the trends
+            if len(indirect_deps) == 0:
+                continue
+
+            x = _to_seconds(workflow.commits[sha].date)
+            self.deps.add(x, len(indirect_deps))
+            self.vulns.add(
+                x, sum(len(dep.vulnerabilities) > 0 for dep in indirect_deps)
+            )
+
+    def update(self, workflow: Workflow) -> bool:
+        shas = list(workflow.commits.keys())
+
+        # The folded commits themselves are checked by update_trend
+        if len(shas) < self.commits or (
+            self.commits > 0 and shas[self.commits - 1] != self.last
+        ):
+            return False
+
+        new_shas = [
+            sha
+            for sha in shas[self.commits :]
+            if len(workflow.commits[sha].dependencies["indirect"]) > 0
+        ]
+        previous = self.deps.group_x
+
+        # The history can only be extended with commits that are not older than
+        # the last one
+        for sha in new_shas:
+            date = _to_seconds(workflow.commits[sha].date)
+
+            if previous is not None and date < previous:
+                return False
+
+            previous = date
+
+        for sha in shas[self.commits :]:
+            self.history = extend_history(self.history, sha, workflow.commits[sha])
+
+        self._add(workflow, new_shas)
+        self.commits = len(shas)
+        self.last = shas[-1] if len(shas) > 0 else None
+
+        return True
+
+    def result(self) -> dict[str, float]:
+        deps_tau, deps_pvalue = self.deps.result()
+        vulns_tau, vulns_pvalue = self.vulns.result()
+
+        return {
+            "deps_tau": deps_tau,
+            "deps_pvalue": deps_pvalue,
+            "vulns_tau": vulns_tau,
+            "vulns_pvalue": vulns_pvalue,
+        }
+
+
+def build_trend(workflow: Workflow) -> WorkflowTrend:
+    trend = WorkflowTrend()
+    shas = list(workflow.commits.keys())
+
+    trend._add(
+        workflow, sorted(shas, key=lambda sha: _to_seconds(workflow.commits[sha].date))
+    )
+    trend.commits = len(shas)
+    trend.last = shas[-1] if len(shas) > 0 else None
+    trend.history = history_digest(workflow)
+
+    return trend
+
+
+def update_trend(workflow: Workflow, trend: WorkflowTrend | None) -> WorkflowTrend:
+    # Only the folded commits are hashed here, and update goes on from their
+    # history, so that every commit is hashed once
+    if (
+        trend is not None
+        and trend.commits <= len(workflow.commits)
+        and history_digest(workflow, trend.commits) == trend.history
+        and trend.update(workflow)
+    ):
+        return trend
+
+    return build_trend(workflow)
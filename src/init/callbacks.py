@@ -1,10 +1,16 @@
-from json import dump, load
+from json import dump
 from os.path import abspath, dirname, isfile, join
 
 import streamlit as st
 from dotenv import dotenv_values
 from tqdm import tqdm
 
+from ..helpers.data import (
+    COMMITS_PATH,
+    WORKFLOWS_PATH,
+    load_selected_commits,
+    load_selected_workflows,
+)
 from ..helpers.queries import connect, get_repository_workflows, get_workflow_commits
 
 ss = st.session_state
@@ -20,15 +26,9 @@ def options_select():
         ss["selected_repos_options"] = ["All"]
         ss["max_repo_selections"] = 1
 
-        workflows = join(dirname(abspath(__file__)), "../../data/workflows.json")
-        commits = join(dirname(abspath(__file__)), "../../data/commits.json")
-
-        if isfile(workflows):
-            with open(workflows) as file:
-                ss["selected_workflows"] = load(file)
-
-            with open(commits) as file:
-                ss["selected_commits"] = load(file)
+        if isfile(WORKFLOWS_PATH):
+            ss["selected_workflows"] = load_selected_workflows()
+            ss["selected_commits"] = load_selected_commits()
 
             return
 
@@ -54,10 +54,10 @@ def options_select():
                 
                 commit_names[workflow] = commitss
 
-        with open(workflows, "w") as file:
+        with open(WORKFLOWS_PATH, "w") as file:
             dump(workflow_names, file)
 
-        with open(commits, "w") as file:
+        with open(COMMITS_PATH, "w") as file:
             dump(commit_names, file)
     else:
         ss["max_repo_selections"] = len(ss["repo_names"])
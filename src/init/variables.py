@@ -1,9 +1,10 @@
-from json import load
-from os.path import abspath, dirname, join
-
 import streamlit as st
 
-from ..helpers.repos import get_repo_names
+from ..helpers.data import (
+    load_repo_names,
+    load_selected_commits,
+    load_selected_workflows,
+)
 
 
 def init_session_variables() -> None:
@@ -14,7 +15,7 @@ def init_session_variables() -> None:
     )
 
     if "repo_names" not in st.session_state:
-        st.session_state["repo_names"] = sorted(get_repo_names())
+        st.session_state["repo_names"] = load_repo_names()
 
     if "max_repo_selections" not in st.session_state:
         st.session_state["max_repo_selections"] = len(st.session_state["repo_names"])
@@ -34,17 +35,18 @@ def init_session_variables() -> None:
     if "rug_pulls_filter" not in st.session_state:
         st.session_state["rug_pulls_filter"] = "all"
 
+    if "active_view" not in st.session_state:
+        st.session_state["active_view"] = "Statistics"
+
     if "curr_page_timelines" not in st.session_state:
         st.session_state["curr_page_timelines"] = 1
 
     if "curr_page_gantt" not in st.session_state:
         st.session_state["curr_page_gantt"] = 1
 
-    workflows = join(dirname(abspath(__file__)), "../../data/workflows.json")
-    commits = join(dirname(abspath(__file__)), "../../data/commits.json")
-
-    with open(workflows) as file:
-        st.session_state["selected_workflows"] = load(file)
+    if "curr_page_table" not in st.session_state:
+        st.session_state["curr_page_table"] = 1
 
-    with open(commits) as file:
-        st.session_state["selected_commits"] = load(file)
+    # Only references to the process-wide data are stored in the session
+    st.session_state["selected_workflows"] = load_selected_workflows()
+    st.session_state["selected_commits"] = load_selected_commits()
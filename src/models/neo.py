@@ -1,3 +1,4 @@
+from bisect import bisect_right
 from datetime import datetime
 from neotime import DateTime
 from neo4j.graph import Node
@@ -70,11 +71,25 @@ class Commit:
 class Workflow:
     filepath: str
     commits: dict[str, Commit]
+    vulnerable: bool
+    vulnerable_parents: set[str]
+    commit_count: int
 
     def __init__(self, filepath: str, commits: dict[str, Commit]) -> None:
         self.filepath = filepath
         self.commits = commits
-        
+        self.summarize()
+
+    def summarize(self) -> None:
+        self.vulnerable_parents = {
+            dep.parent
+            for commit in self.commits.values()
+            for dep in commit.dependencies["indirect"].values()
+            if len(dep.vulnerabilities) > 0
+        }
+        self.vulnerable = len(self.vulnerable_parents) > 0
+        self.commit_count = len(self.commits)
+
 
 class Repository:
     name: str
@@ -83,3 +98,43 @@ class Repository:
     def __init__(self, name: str, workflows: dict[str, Workflow]) -> None:
         self.name = name
         self.workflows = workflows
+
+
+class ActionTimeline:
+    dates: list[datetime]
+    shas: list[str]
+    versions: list[list[str]]
+    vulnerabilities: list[set[str]]
+
+    def __init__(self) -> None:
+        self.dates = []
+        self.shas = []
+        self.versions = []
+        self.vulnerabilities = []
+
+    def add(
+        self, date: DateTime, sha: str, versions: list[str], vulnerabilities: list[str]
+    ) -> None:
+        self.dates.append(
+            datetime(
+                date.year,
+                date.month,
+                date.day,
+                date.hour,
+                date.minute,
+                date.second,
+                tzinfo=date.tzinfo,
+            )
+        )
+        self.shas.append(sha)
+        self.versions.append(versions)
+        self.vulnerabilities.append(set(vulnerabilities))
+
+    def first_fixed(
+        self, deps: list[str], date: datetime
+    ) -> tuple[datetime, list[str], str] | None:
+        for i in range(bisect_right(self.dates, date), len(self.dates)):
+            if self.vulnerabilities[i].isdisjoint(deps):
+                return self.dates[i], self.versions[i], self.shas[i]
+
+        return None
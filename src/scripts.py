@@ -1,25 +1,55 @@
-from datetime import datetime
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from json import dump as json_dump
 from os import listdir, mkdir
-from os.path import abspath, dirname, isdir, join
+from os.path import abspath, dirname, isdir, isfile, join
 from pathlib import Path
-from pickle import HIGHEST_PROTOCOL, dump
+from pickle import HIGHEST_PROTOCOL, dump, load
+from typing import Any, Callable, Iterator
 
 from dotenv import dotenv_values
 from neotime import DateTime
 from numpy import nan
-from pandas import DataFrame, read_csv
+from pandas import DataFrame
 from tqdm import tqdm
 
-from src.helpers.repos import pickle2repo
+from src.helpers.compute import (
+    TRENDS_COLUMNS,
+    TRENDS_PATH,
+    load_trends,
+    trend_digest,
+)
+from src.helpers.dataset import (
+    DATASET_DIR,
+    dataset_file,
+    new_dataset_dir,
+    publish_dataset_dir,
+    read_dataset,
+    write_dataset_rows,
+)
+from src.helpers.dates import COMMIT_DATE_COUNTS_PATH, count_days, write_date_counts
+from src.helpers.repos import (
+    SUMMARY_VERSION,
+    get_summaries,
+    pickle2repo,
+    repo_digest,
+    summarize_repo,
+)
+from src.helpers.trends import WorkflowTrend, update_trend
 
 from .helpers.queries import (
     connect,
+    get_action_timeline,
     get_all_repositories,
     get_commit_dependencies,
     get_repository_workflows,
     get_workflow_commits,
 )
-from .models.neo import Commit, Repository, Workflow
+from .models.neo import ActionTimeline, Commit, Repository, Workflow
+
+# Repositories handed to a worker process at a time
+SCAN_CHUNKSIZE = 4
 
 
 def _get_repos():
@@ -66,6 +96,8 @@ def _get_repos():
                     ),
                 )
 
+            repository_def.workflows[workflow].summarize()
+
         with open(
             join(
                 dirname(abspath(__file__)),
@@ -77,100 +109,338 @@ def _get_repos():
             file.close
 
 
-def _get_dataset():
-    df_lines: list[dict[str, str | datetime]] = []
+def _scan_corpus(
+    scan: Callable[..., Any],
+    *args: list[Any],
+    workers: int | None = None,
+    desc: str | None = None,
+) -> Iterator[Any]:
+    # Every task unpickles and converts a shard of the repositories in its own
+    # process, and the results are returned in the order of the repositories
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from tqdm(
+            executor.map(scan, *args, chunksize=SCAN_CHUNKSIZE),
+            total=len(args[0]),
+            desc=desc,
+        )
+
+
+def _get_file_names() -> list[str]:
     filepath: str = join(dirname(abspath(__file__)), "../data/repositories")
-    commit_dates: list[datetime] = []
-
-    for file in tqdm(listdir(filepath)):
-        repo: Repository = pickle2repo(file.removesuffix(".pickle"))
-
-        for workflow_name, workflow in repo.workflows.items():
-            for commit_name, commit in workflow.commits.items():
-                for action_name, action in commit.dependencies["direct"].items():
-                    dependencies = {
-                        dep_name: dep
-                        for dep_name, dep in commit.dependencies["indirect"].items()
-                        if dep.parent == action_name
-                    }
-
-                    for dep_name, dep in dependencies.items():
-                        for vulnerability in dep.vulnerabilities.keys():
-                            df_lines.append(
-                                {
-                                    "repository": repo.name,
-                                    "workflow": workflow_name,
-                                    "commit": commit_name,
-                                    "action": action_name,
-                                    "action_u": str(action.uses),
-                                    "action_v": action.version,
-                                    "action_d": action.date,
-                                    "dependency": dep_name,
-                                    "dependency_v": dep.version,
-                                    "dependency_t": dep.subtype,
-                                    "vulnerability": vulnerability,
-                                }
-                            )
-                        else:
-                            df_lines.append(
-                                {
-                                    "repository": repo.name,
-                                    "workflow": workflow_name,
-                                    "commit": commit_name,
-                                    "action": action_name,
-                                    "action_u": str(action.uses),
-                                    "action_v": action.version,
-                                    "action_d": action.date,
-                                    "dependency": dep_name,
-                                    "dependency_v": dep.version,
-                                    "dependency_t": dep.subtype,
-                                    "vulnerability": "",
-                                }
-                            )
-                else:
-                    df_lines.append(
-                        {
+
+    return [file.removesuffix(".pickle") for file in listdir(filepath)]
+
+
+def _summarize_repository(
+    file_name: str, summary: dict[str, Any] | None
+) -> dict[str, Any]:
+    digest = repo_digest(file_name)
+
+    if (
+        summary is not None
+        and summary.get("version") == SUMMARY_VERSION
+        and summary["digest"] == digest
+    ):
+        return summary
+
+    return summarize_repo(pickle2repo(file_name), digest)
+
+
+def _get_summaries(workers: int | None = None):
+    summaries = get_summaries()
+    file_names = _get_file_names()
+    repo_names = [file_name.replace("::", "/") for file_name in file_names]
+
+    for repo_name, summary in zip(
+        repo_names,
+        _scan_corpus(
+            _summarize_repository,
+            file_names,
+            [summaries.get(repo_name) for repo_name in repo_names],
+            workers=workers,
+            desc="Summarizing repositories",
+        ),
+    ):
+        summaries[repo_name] = summary
+
+    with open(join(dirname(abspath(__file__)), "../data/summaries.json"), "w") as file:
+        json_dump(summaries, file)
+
+
+def _collect_actions(file_name: str) -> set[str]:
+    repo: Repository = pickle2repo(file_name)
+    actions: set[str] = set()
+
+    for workflow in repo.workflows.values():
+        for commit in workflow.commits.values():
+            actions.update(commit.dependencies["direct"].keys())
+
+    return actions
+
+
+def _get_action_timelines(workers: int | None = None):
+    sess = connect(dotenv_values(join(dirname(abspath(__file__)), "../.env")))
+
+    # Only the Actions with vulnerable dependencies can be rug pulled
+    actions: set[str] = {
+        parent
+        for summary in get_summaries().values()
+        for workflow in summary["workflows"].values()
+        for parent in workflow["parents"]
+    }
+
+    if len(actions) == 0:
+        for repo_actions in _scan_corpus(
+            _collect_actions,
+            _get_file_names(),
+            workers=workers,
+            desc="Collecting the actions",
+        ):
+            actions.update(repo_actions)
+
+    timelines: dict[str, ActionTimeline] = {
+        action: get_action_timeline(action, sess)
+        for action in tqdm(sorted(actions), desc="Getting the action timelines")
+    }
+
+    with open(
+        join(dirname(abspath(__file__)), "../data/action_timelines.pickle"), "wb"
+    ) as file:
+        dump(timelines, file, protocol=HIGHEST_PROTOCOL)
+
+
+def _compute_repository_trends(
+    file_name: str,
+    known: dict[str, dict[str, Any]],
+    entry: dict[str, Any] | None,
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    digest = repo_digest(file_name)
+
+    # The repositories that did not change since the last run are not loaded
+    if (
+        entry is not None
+        and entry["digest"] == digest
+        and {f"{row['repo']}/{row['workflow']}" for row in known.values()}
+        == set(entry["workflows"])
+    ):
+        return [{"digest": key, **row} for key, row in known.items()], entry
+
+    repo: Repository = pickle2repo(file_name)
+    states: dict[str, WorkflowTrend] = entry["workflows"] if entry else {}
+    new_states: dict[str, WorkflowTrend] = {}
+    rows: list[dict[str, Any]] = []
+
+    for workflow_name, workflow in repo.workflows.items():
+        key = f"{repo.name}/{workflow_name}"
+
+        # Only the commits added since the last run are folded into the trend
+        new_states[key] = update_trend(workflow, states.get(key))
+        row_digest = trend_digest(repo.name, workflow_name, new_states[key].history)
+
+        if row_digest in known:
+            rows.append({"digest": row_digest, **known[row_digest]})
+            continue
+
+        rows.append(
+            {
+                "digest": row_digest,
+                "repo": repo.name,
+                "workflow": workflow_name,
+                "commits": len(workflow.commits),
+                **new_states[key].result(),
+            }
+        )
+
+    return rows, {"digest": digest, "workflows": new_states}
+
+
+def _get_trends(workers: int | None = None):
+    trends = load_trends()
+    file_names = _get_file_names()
+    states_path = join(dirname(abspath(__file__)), "../data/trend_states.pickle")
+    states: dict[str, dict[str, Any]] = {}
+    rows: list[dict[str, str | int | float]] = []
+
+    if isfile(states_path):
+        with open(states_path, "rb") as file:
+            states = load(file)
+
+    # The states pickled before the digests of the repositories were kept are
+    # rebuilt
+    if any(isinstance(entry, WorkflowTrend) for entry in states.values()):
+        states = {}
+
+    # Each task only receives the trends and the states of its own repository
+    known: dict[str, dict[str, dict[str, Any]]] = {
+        str(repo_name): group.to_dict("index")
+        for repo_name, group in trends.groupby("repo")
+    }
+    repo_names = [file_name.replace("::", "/") for file_name in file_names]
+    new_states: dict[str, dict[str, Any]] = {}
+
+    for repo_name, (repo_rows, entry) in zip(
+        repo_names,
+        _scan_corpus(
+            _compute_repository_trends,
+            file_names,
+            [known.get(repo_name, {}) for repo_name in repo_names],
+            [states.get(repo_name) for repo_name in repo_names],
+            workers=workers,
+            desc="Computing the trends",
+        ),
+    ):
+        rows.extend(repo_rows)
+        new_states[repo_name] = entry
+
+    DataFrame(rows, columns=TRENDS_COLUMNS).set_index("digest").to_csv(TRENDS_PATH)
+
+    with open(states_path, "wb") as file:
+        dump(new_states, file, protocol=HIGHEST_PROTOCOL)
+
+
+def _iter_dataset_rows(
+    repo: Repository, vulnerable: set[str] | None
+) -> Iterator[dict[str, Any]]:
+    # Missing values are nulls, as they were once the old CSV was read back
+    for workflow_name, workflow in repo.workflows.items():
+        if vulnerable is not None and workflow_name not in vulnerable:
+            continue
+
+        for commit_name, commit in workflow.commits.items():
+            for action_name, action in commit.dependencies["direct"].items():
+                dependencies = {
+                    dep_name: dep
+                    for dep_name, dep in commit.dependencies["indirect"].items()
+                    if dep.parent == action_name
+                }
+
+                for dep_name, dep in dependencies.items():
+                    for vulnerability in dep.vulnerabilities.keys():
+                        yield {
                             "repository": repo.name,
                             "workflow": workflow_name,
                             "commit": commit_name,
-                            "action": "",
-                            "action_u": "",
-                            "action_v": "",
-                            "action_d": "",
-                            "dependency": "",
-                            "dependency_v": "",
-                            "dependency_t": "",
-                            "vulnerability": "",
+                            "action": action_name,
+                            "action_u": action.uses,
+                            "action_v": action.version,
+                            "action_d": action.date,
+                            "dependency": dep_name,
+                            "dependency_v": dep.version,
+                            "dependency_t": dep.subtype,
+                            "vulnerability": vulnerability,
+                        }
+                    else:
+                        yield {
+                            "repository": repo.name,
+                            "workflow": workflow_name,
+                            "commit": commit_name,
+                            "action": action_name,
+                            "action_u": action.uses,
+                            "action_v": action.version,
+                            "action_d": action.date,
+                            "dependency": dep_name,
+                            "dependency_v": dep.version,
+                            "dependency_t": dep.subtype,
+                            "vulnerability": None,
                         }
-                    )
-                
-                commit_dates.append(commit.date)
             else:
-                df_lines.append(
-                    {
-                        "repository": repo.name,
-                        "workflow": workflow_name,
-                        "commit": "",
-                        "action": "",
-                        "action_u": "",
-                        "action_v": "",
-                        "action_d": "",
-                        "dependency": "",
-                        "dependency_v": "",
-                        "dependency_t": "",
-                        "vulnerability": "",
-                    }
-                )
+                yield {
+                    "repository": repo.name,
+                    "workflow": workflow_name,
+                    "commit": commit_name,
+                    "action": None,
+                    "action_u": None,
+                    "action_v": None,
+                    "action_d": None,
+                    "dependency": None,
+                    "dependency_v": None,
+                    "dependency_t": None,
+                    "vulnerability": None,
+                }
+        else:
+            yield {
+                "repository": repo.name,
+                "workflow": workflow_name,
+                "commit": None,
+                "action": None,
+                "action_u": None,
+                "action_v": None,
+                "action_d": None,
+                "dependency": None,
+                "dependency_v": None,
+                "dependency_t": None,
+                "vulnerability": None,
+            }
 
-    print("Saving...")
-    DataFrame(df_lines).to_csv(join(dirname(abspath(__file__)), "../data/dataset.csv"))
-    DataFrame(commit_dates).to_csv(join(dirname(abspath(__file__)), "../data/commit_dates.csv"))
-    print("DONE")
+
+def _write_repository_dataset(
+    file_name: str, summary: dict[str, Any] | None, dataset_dir: str
+) -> tuple[int, Counter[date]]:
+    vulnerable: set[str] | None = None
+
+    if (
+        summary
+        and summary.get("version") == SUMMARY_VERSION
+        and summary["digest"] == repo_digest(file_name)
+    ):
+        vulnerable = {
+            name
+            for name, workflow in summary["workflows"].items()
+            if workflow["vulnerable"]
+        }
+
+        # The commits of every workflow are counted, not only those in the
+        # dataset, and those of the summary spare loading the repository
+        if len(vulnerable) == 0:
+            commit_days: Counter[date] = Counter()
+
+            for workflow in summary["workflows"].values():
+                for day, count in workflow["days"].items():
+                    commit_days[date.fromisoformat(day)] += count
+
+            return 0, commit_days
+
+    repo: Repository = pickle2repo(file_name)
+    commit_days = count_days(
+        commit.date
+        for workflow in repo.workflows.values()
+        for commit in workflow.commits.values()
+    )
+
+    # Each repository is streamed to its own file of the dataset
+    rows = write_dataset_rows(
+        _iter_dataset_rows(repo, vulnerable), dataset_file(dataset_dir, file_name)
+    )
+
+    return rows, commit_days
+
+
+def _get_dataset(vulnerable_only: bool = False, workers: int | None = None):
+    file_names = _get_file_names()
+    commit_days: Counter[date] = Counter()
+    summaries = get_summaries() if vulnerable_only else {}
+    dataset_dir = new_dataset_dir()
+    rows = 0
+
+    for repo_rows, repo_days in _scan_corpus(
+        _write_repository_dataset,
+        file_names,
+        [summaries.get(file_name.replace("::", "/")) for file_name in file_names],
+        [dataset_dir for _ in file_names],
+        workers=workers,
+    ):
+        rows += repo_rows
+        commit_days.update(repo_days)
+
+    publish_dataset_dir(dataset_dir)
+    # Only the per-day counts are kept, so their size does not grow with the corpus
+    write_date_counts(commit_days, COMMIT_DATE_COUNTS_PATH)
+    print(f"{rows} rows -> {DATASET_DIR}")
 
 
 def _precompute_dataset_metrics():
-    print("Loading CSV...")
-    df: DataFrame = read_csv(join(dirname(abspath(__file__)), "../data/dataset.csv"))
+    print("Loading the dataset...")
+    df: DataFrame = read_dataset().rename(columns={"repository": "repo"})
     print("DONE\n")
 
     df_lines: list[dict[str, str | float | int]] = []
@@ -300,5 +570,8 @@ def _precompute_dataset_metrics():
 
 if __name__ == "__main__":
     # _get_repos()
+    # _get_summaries()
+    # _get_action_timelines()
+    # _get_trends()
     _get_dataset()
     # _precompute_dataset_metrics()
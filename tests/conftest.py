@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from random import Random
+
+from src.models.neo import Commit, Dependency, Workflow
+
+
+def make_workflow(
+    commits: int, actions: int, dependencies: int, seed: int = 0
+) -> Workflow:
+    rand = Random(seed)
+    start = datetime(2020, 1, 1)
+    subtypes = ["direct", "direct_dev", "direct_opt", "indirect"]
+    workflow = Workflow("", {})
+    direct: dict[str, Dependency] = {}
+    indirect: dict[str, Dependency] = {}
+
+    def make_dependency(action: str) -> Dependency:
+        dep = Dependency(action, "", 1, "1.0.0", "", rand.choice(subtypes), None, [])
+
+        if rand.random() < 0.05:
+            dep.vulnerabilities = {"GHSA": {"id": "GHSA", "cve": "", "cvss": 5.0}}
+
+        return dep
+
+    for a in range(actions):
+        action = f"owner{a}/action{a}"
+        direct[action] = Dependency("", "", 1, "v1", "tag", "action", start, [])
+
+        for d in range(dependencies):
+            indirect[f"dep{a}-{d}"] = make_dependency(action)
+
+    # Consecutive commits share most of their dependencies, as in the crawled data
+    for i in range(commits):
+        for key in rand.sample(list(indirect.keys()), k=max(1, len(indirect) // 100)):
+            indirect[key] = make_dependency(indirect[key].parent)
+
+        workflow.commits[f"{i:040x}"] = Commit(
+            start + timedelta(hours=i),
+            {"direct": dict(direct), "indirect": dict(indirect)},
+        )
+
+    workflow.summarize()
+
+    return workflow
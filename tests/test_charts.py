@@ -0,0 +1,47 @@
+from pandas import DataFrame, Timestamp, to_timedelta
+
+from src.helpers.charts import GANTT_OTHERS, merge_intervals
+
+
+def _intervals(keys: int, per_key: int) -> DataFrame:
+    starts = [
+        Timestamp("2024-01-01") + to_timedelta(10 * i + k, unit="D")
+        for k in range(keys)
+        for i in range(per_key + k)
+    ]
+    names = [f"action{k}" for k in range(keys) for _ in range(per_key + k)]
+
+    return DataFrame(
+        {
+            "action": names,
+            "date": starts,
+            "end": [start + to_timedelta(2, unit="D") for start in starts],
+            "unfixed": 1,
+        }
+    )
+
+
+def test_merge_keeps_every_interval():
+    df = _intervals(3, 40)
+    merged = merge_intervals(df, "action", "date", "end", ["unfixed"], 10)
+
+    assert len(merged) <= 10
+    assert merged["count"].sum() == len(df)
+    assert merged["unfixed"].sum() == len(df)
+    assert set(merged["action"]) == set(df["action"])
+
+
+def test_merge_folds_the_smallest_keys():
+    df = _intervals(12, 2)
+    merged = merge_intervals(df, "action", "date", "end", ["unfixed"], 5)
+
+    assert len(merged) == 5
+    assert merged["count"].sum() == len(df)
+    # The keys with the most intervals are kept, the others share a single row
+    assert set(merged["action"]) == {
+        "action11",
+        "action10",
+        "action9",
+        "action8",
+        GANTT_OTHERS,
+    }
@@ -0,0 +1,24 @@
+from pandas import DataFrame
+
+from src.helpers.compute import _split_vulnerabilities
+
+
+def test_split_vulnerabilities_only_keeps_cves():
+    rug_pulls = DataFrame(
+        {
+            "vulns_list": [["dep@v.1.0.0 - npm", "other@v.2.0.0 - npm"]],
+            "vulns_severities": [
+                ["dep // CVE-2024-12345 // 7.5", "other // GHSA-xxxx-yyyy-zzzz // 0.0"]
+            ],
+        },
+        index=[1],
+    )
+
+    vulnerabilities = _split_vulnerabilities(rug_pulls)
+
+    assert vulnerabilities["vulnerability"].tolist() == [
+        "CVE-2024-12345",
+        "GHSA-xxxx-yyyy-zzzz",
+    ]
+    assert vulnerabilities["cve"].tolist() == ["CVE-2024-12345", ""]
+    assert vulnerabilities["version"].tolist() == ["1.0.0", "2.0.0"]
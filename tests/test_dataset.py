@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+from pandas import DataFrame
+
+from src.helpers.dataset import read_dataset, write_dataset_rows
+
+ROW = {
+    "repository": "a/one",
+    "workflow": "ci.yml",
+    "commit": "sha1",
+    "action": "owner/action",
+    "action_u": 1,
+    "action_v": "v1",
+    "action_d": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    "dependency": "dep",
+    "dependency_v": "1.0.0",
+    "dependency_t": "npm",
+    "vulnerability": "GHSA-1",
+}
+
+
+def test_read_written_dataset(tmp_path):
+    directory = tmp_path / "dataset"
+    directory.mkdir()
+
+    assert write_dataset_rows([ROW, ROW], str(directory / "a::one.parquet")) == 2
+
+    df = read_dataset(str(directory), str(tmp_path / "dataset.csv"))
+    assert df["repository"].astype(str).tolist() == ["a/one", "a/one"]
+
+
+def test_read_exported_csv_without_dataset(tmp_path):
+    DataFrame([ROW, {**ROW, "dependency_v": "2.0"}]).to_csv(tmp_path / "dataset.csv")
+
+    df = read_dataset(str(tmp_path / "dataset"), str(tmp_path / "dataset.csv"))
+    assert df.columns.tolist() == list(ROW)
+    assert df["repository"].tolist() == ["a/one", "a/one"]
+    assert df["dependency_v"].tolist() == ["1.0.0", "2.0"]
@@ -0,0 +1,416 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from json import load
+from multiprocessing import get_context
+from os.path import isfile, join
+from time import sleep
+from types import SimpleNamespace
+
+import pytest
+from pandas import read_csv, read_parquet
+
+import src.helpers.detect as detect
+from src.helpers.detect import (
+    RUG_PULLS_SCHEMA,
+    VULNERABILITIES_SCHEMA,
+    _compute_rug_pulled_dependencies,
+    _encode_vulnerable_deps,
+    chunk_file,
+    compact_rug_pulls,
+    detect_rug_pulls,
+    vulnerabilities_chunk,
+    write_chunk,
+)
+from src.models.neo import ActionTimeline, Commit, Dependency, Workflow
+from src.models.rugs import ActualFix, PotentialFix
+from tests.conftest import make_workflow
+
+SELECTION = {"a/one": ["ci.yml"], "b/two": ["ci.yml", "cd.yml"]}
+
+
+def _rug_pull_row(index: int, repo: str) -> dict:
+    return {
+        "#": index,
+        "action": "owner/action",
+        "version": "v1",
+        "version_type": "tag",
+        "version_used": 1,
+        "date": datetime(2024, 1, index),
+        "repo": repo,
+        "workflow": "ci.yml",
+        "hash": f"sha{index}",
+        "vulns_list": ["dep@v.1.0.0 - npm"],
+        "vulns_severities": ["dep // CVE-1 // 7.5"],
+        "last": datetime(2024, 6, 1),
+        "elapsed": 100,
+        "fix_category": "unfixable",
+        "fix_date": None,
+        "fix_actor": None,
+        "fix_version": [],
+        "fix_v_type": None,
+        "fix_hash": None,
+        "ttx": None,
+        "ttpf": None,
+    }
+
+
+def _vulnerability_row(rug_pull: int) -> dict:
+    return {
+        "rug_pull": rug_pull,
+        "dependency": "dep",
+        "version": "1.0.0",
+        "subtype": "npm",
+        "vulnerability": "GHSA-1",
+        "cve": "CVE-1",
+        "cvss": 7.5,
+        "severity": "high",
+    }
+
+
+def _write_chunks(directory, chunks: dict[str, list[int]]) -> list[str]:
+    paths = []
+
+    for name, indexes in chunks.items():
+        path = join(directory, f"{name}.parquet")
+        repo = name.replace("::", "/")
+        write_chunk(
+            [_rug_pull_row(index, repo) for index in indexes], RUG_PULLS_SCHEMA, path
+        )
+        write_chunk(
+            [_vulnerability_row(index) for index in indexes],
+            VULNERABILITIES_SCHEMA,
+            vulnerabilities_chunk(path),
+        )
+        paths.append(path)
+
+    return paths
+
+
+def _compact(tmp_path, chunks: list[str]) -> tuple[str, str, str]:
+    paths = (
+        join(tmp_path, "rug_pulls.parquet"),
+        join(tmp_path, "vulnerabilities.parquet"),
+        join(tmp_path, "date_counts.csv"),
+    )
+    compact_rug_pulls(
+        chunks, paths[0], paths[1], join(tmp_path, "metrics.parquet"), paths[2]
+    )
+
+    return paths
+
+
+def test_compact_chunks_without_fixed_rug_pulls(tmp_path):
+    chunks = _write_chunks(tmp_path, {"a::one": [1, 2], "b::two": [1, 2, 3]})
+    rug_pulls_path, vulnerabilities_path, date_counts_path = _compact(tmp_path, chunks)
+
+    rug_pulls = read_parquet(rug_pulls_path)
+    assert rug_pulls["#"].tolist() == [1, 2, 3, 4, 5]
+    assert rug_pulls["repo"].tolist() == ["a/one"] * 2 + ["b/two"] * 3
+    assert rug_pulls["fix_date"].isna().all()
+    assert rug_pulls["fix_date"].dtype.kind == "M"
+
+    vulnerabilities = read_parquet(vulnerabilities_path)
+    assert vulnerabilities["rug_pull"].tolist() == [1, 2, 3, 4, 5]
+
+    counts = read_csv(date_counts_path)
+    assert counts[counts["frequency"] == "day"]["count"].sum() == 5
+
+
+def test_compact_empty_chunk(tmp_path):
+    chunks = _write_chunks(tmp_path, {"a::one": [], "b::two": [1]})
+    rug_pulls_path, vulnerabilities_path, _ = _compact(tmp_path, chunks)
+
+    rug_pulls = read_parquet(rug_pulls_path)
+    assert rug_pulls["#"].tolist() == [1]
+    assert rug_pulls["repo"].tolist() == ["b/two"]
+    assert read_parquet(vulnerabilities_path)["rug_pull"].tolist() == [1]
+
+
+def test_compact_only_empty_chunks(tmp_path):
+    chunks = _write_chunks(tmp_path, {"a::one": []})
+    rug_pulls_path, vulnerabilities_path, _ = _compact(tmp_path, chunks)
+
+    assert len(read_parquet(rug_pulls_path)) == 0
+    assert len(read_parquet(vulnerabilities_path)) == 0
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    loaded: list[str] = []
+
+    def pickle2repo(file_name: str) -> SimpleNamespace:
+        loaded.append(file_name)
+
+        return SimpleNamespace(workflows={})
+
+    def connect(_):
+        raise AssertionError("the database is not needed without workflows")
+
+    # The repositories are stubbed, and the workers run in this process
+    monkeypatch.setattr(detect, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(detect, "get_summaries", lambda: {})
+    monkeypatch.setattr(detect, "action_timelines_digest", lambda: "timelines")
+    monkeypatch.setattr(detect, "repo_digest", lambda file_name: f"{file_name}@1")
+    monkeypatch.setattr(detect, "pickle2repo", pickle2repo)
+    monkeypatch.setattr(detect, "connect", connect)
+
+    return loaded
+
+
+def test_detect_writes_empty_chunks_without_workflows(tmp_path, loaded):
+    results = list(detect_rug_pulls(SELECTION, str(tmp_path)))
+
+    assert [chunk for chunk, _ in results] == [
+        chunk_file(str(tmp_path), repo_name) for repo_name in SELECTION
+    ]
+    assert loaded == ["a::one", "b::two"]
+
+    for chunk, commits in results:
+        assert commits == 0
+        assert len(read_parquet(chunk)) == 0
+        assert isfile(vulnerabilities_chunk(chunk))
+
+
+def test_detect_resumes_from_manifest(tmp_path, loaded, monkeypatch):
+    list(detect_rug_pulls(SELECTION, str(tmp_path)))
+
+    with open(join(tmp_path, "manifest.json")) as file:
+        manifest = load(file)
+
+    assert manifest["b/two"]["workflows"] == ["cd.yml", "ci.yml"]
+
+    # Only the repository whose digest changed is loaded again
+    monkeypatch.setattr(
+        detect,
+        "repo_digest",
+        lambda file_name: f"{file_name}@{2 if file_name == "b::two" else 1}",
+    )
+    loaded.clear()
+    chunks = [chunk for chunk, _ in detect_rug_pulls(SELECTION, str(tmp_path))]
+
+    assert loaded == ["b::two"]
+    assert len(chunks) == 2
+
+
+def test_detect_refresh_keeps_other_chunks(tmp_path, loaded):
+    list(detect_rug_pulls(SELECTION, str(tmp_path)))
+
+    loaded.clear()
+    chunks = [
+        chunk
+        for chunk, _ in detect_rug_pulls(SELECTION, str(tmp_path), refresh={"b/two"})
+    ]
+
+    assert loaded == []
+    assert chunks == [chunk_file(str(tmp_path), repo_name) for repo_name in SELECTION]
+
+
+def test_detect_keeps_manifest_when_interrupted(tmp_path, loaded):
+    results = detect_rug_pulls(SELECTION, str(tmp_path))
+    next(results)
+    results.close()
+
+    with open(join(tmp_path, "manifest.json")) as file:
+        assert list(load(file)) == ["a/one"]
+
+
+def _slow_digest(file_name: str) -> str:
+    sleep(0.2)
+
+    return f"{file_name}@1"
+
+
+@pytest.mark.filterwarnings("ignore:.*use of fork:DeprecationWarning")
+def test_detect_cancels_pending_repositories_when_closed(tmp_path, loaded, monkeypatch):
+    selection = {f"owner/repo{index}": ["ci.yml"] for index in range(20)}
+
+    # The forked workers inherit the stubs of this process
+    monkeypatch.setattr(
+        detect,
+        "ProcessPoolExecutor",
+        partial(ProcessPoolExecutor, mp_context=get_context("fork")),
+    )
+    monkeypatch.setattr(detect, "repo_digest", _slow_digest)
+
+    results = detect_rug_pulls(selection, str(tmp_path))
+    next(results)
+    results.close()
+
+    computed = [
+        repo_name
+        for repo_name in selection
+        if isfile(chunk_file(str(tmp_path), repo_name))
+    ]
+    # Only the repositories already handed to the worker are computed
+    assert len(computed) < len(selection) // 2
+
+    with open(join(tmp_path, "manifest.json")) as file:
+        assert list(load(file)) == ["owner/repo0"]
+
+
+def test_compact_detected_chunks(tmp_path, loaded):
+    chunks = [chunk for chunk, _ in detect_rug_pulls(SELECTION, str(tmp_path))]
+    rug_pulls_path, vulnerabilities_path, _ = _compact(tmp_path, chunks)
+
+    assert len(read_parquet(rug_pulls_path)) == 0
+    assert len(read_parquet(vulnerabilities_path)) == 0
+
+
+def _day(day: int) -> datetime:
+    return datetime(2024, 1, day)
+
+
+def _commit(day: int, tagged: int, vulnerable: bool) -> Commit:
+    action = Dependency("", "hash", 1, "v1", "tag", "", _day(tagged), [])
+    dep = Dependency(
+        "owner/action",
+        "hash",
+        1,
+        "1.0.0",
+        "",
+        "npm",
+        None,
+        [{"id": "GHSA-1", "cve": "", "cvss": 7.5}] if vulnerable else [],
+    )
+
+    return Commit(
+        _day(day), {"direct": {"owner/action": action}, "indirect": {"dep": dep}}
+    )
+
+
+def _timeline() -> ActionTimeline:
+    timeline = ActionTimeline()
+    timeline.add(_day(4), "same", ["v1"], [])
+    # The versions of a commit are grouped by their vulnerable dependencies
+    timeline.add(_day(10), "later", ["v1"], ["dep"])
+    timeline.add(_day(10), "later", ["v2"], [])
+
+    return timeline
+
+
+# The tag of the Action is moved on day 4 to a commit with a vulnerable dependency,
+# which the workflow still uses on its last commit
+RETAGGED = {
+    "ci.yml": Workflow(
+        ".github/workflows/ci.yml",
+        {
+            "c1": _commit(1, 1, False),
+            "c2": _commit(2, 1, False),
+            "c3": _commit(5, 4, True),
+            "c4": _commit(20, 4, True),
+        },
+    )
+}
+
+
+def test_first_fixed_is_strictly_after_the_date():
+    timeline = _timeline()
+
+    assert timeline.first_fixed(["dep"], _day(3)) == (_day(4), ["v1"], "same")
+    assert timeline.first_fixed(["dep"], _day(4)) == (_day(10), ["v2"], "later")
+    assert timeline.first_fixed(["dep"], _day(10)) is None
+
+
+def test_first_fixed_per_version_and_commit():
+    timeline = _timeline()
+
+    assert timeline.first_fixed(["other"], _day(4)) == (_day(10), ["v1"], "later")
+    assert timeline.first_fixed(["dep", "other"], _day(4)) == (
+        _day(10),
+        ["v2"],
+        "later",
+    )
+
+
+def test_rug_pull_fixed_by_another_version(monkeypatch):
+    monkeypatch.setattr(
+        detect, "get_action_timelines", lambda: {"owner/action": _timeline()}
+    )
+
+    rug_pulls = _compute_rug_pulled_dependencies("a/one", RETAGGED)
+
+    assert len(rug_pulls) == 1
+    assert rug_pulls[0].location == "a/one/ci.yml/c3"
+    assert rug_pulls[0].introduced == _day(4)
+    assert list(rug_pulls[0].vulnerabilities) == ["dep"]
+    assert type(rug_pulls[0].fix) is PotentialFix
+    assert (rug_pulls[0].fix.sha, rug_pulls[0].fix.versions) == ("later", ["v2"])
+
+
+def test_rug_pull_fix_from_the_database_without_timelines(monkeypatch):
+    calls: list[dict] = []
+
+    def get_first_fixed_commit(**kwargs):
+        calls.append(kwargs)
+
+        return _day(10), ["v1"], "later"
+
+    monkeypatch.setattr(detect, "get_action_timelines", lambda: None)
+    monkeypatch.setattr(detect, "connect", lambda _: "session")
+    monkeypatch.setattr(detect, "get_first_fixed_commit", get_first_fixed_commit)
+
+    rug_pulls = _compute_rug_pulled_dependencies("a/one", RETAGGED)
+
+    assert calls == [
+        {
+            "action": "owner/action",
+            "deps": ["dep"],
+            "date": _day(4),
+            "session": "session",
+        }
+    ]
+    assert type(rug_pulls[0].fix) is ActualFix
+    assert (rug_pulls[0].fix.sha, rug_pulls[0].fix.who) == ("later", "Action")
+    assert rug_pulls[0].fix.date == _day(10)
+
+
+def _decode(mask: int, ids: dict[str, int]) -> set[str]:
+    return {key for key, index in ids.items() if mask >> index & 1}
+
+
+def test_encode_vulnerable_deps():
+    vulnerable = [{"id": "GHSA-1", "cve": "", "cvss": 7.5}]
+    ids = {"known": 0}
+    masks = _encode_vulnerable_deps(
+        {
+            "safe": Dependency("a", "", 1, "1.0.0", "", "npm", None, []),
+            "first": Dependency("a", "", 1, "1.0.0", "", "npm", None, vulnerable),
+            "known": Dependency("b", "", 1, "1.0.0", "", "npm", None, vulnerable),
+            "second": Dependency("a", "", 1, "1.0.0", "", "npm", None, vulnerable),
+        },
+        ids,
+    )
+
+    # Only the vulnerable dependencies get an id, the known ones keep theirs
+    assert ids == {"known": 0, "first": 1, "second": 2}
+    assert masks == {"a": 0b110, "b": 0b1}
+
+
+def test_new_vulnerable_deps_match_sets():
+    workflow = make_workflow(200, 4, 30, seed=1)
+    ids: dict[str, int] = {}
+    previous: dict[str, set[str]] = {}
+    previous_masks: dict[str, int] = {}
+    compared = 0
+
+    for commit in workflow.commits.values():
+        indirect = commit.dependencies["indirect"]
+        masks = _encode_vulnerable_deps(indirect, ids)
+        current: dict[str, set[str]] = {}
+
+        for key, dep in indirect.items():
+            if len(dep.vulnerabilities) > 0:
+                current.setdefault(dep.parent, set()).add(key)
+
+        for action in commit.dependencies["direct"]:
+            new_mask = masks.get(action, 0) & ~previous_masks.get(action, 0)
+            new = current.get(action, set()) - previous.get(action, set())
+
+            assert _decode(new_mask, ids) == new
+            compared += len(new) > 0
+
+        previous = current
+        previous_masks = masks
+
+    assert compared > 0
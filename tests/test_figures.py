@@ -0,0 +1,33 @@
+from os import listdir, utime
+from os.path import join
+
+from plotly.graph_objects import Figure
+
+from src.helpers.figures import FigureCache, figure_from_json
+
+
+def _figure(value: int) -> Figure:
+    return Figure(data=[{"type": "bar", "x": ["a"], "y": [value]}])
+
+
+def test_cached_spec_round_trips():
+    cache = FigureCache()
+    spec = cache.get_or_build("key", lambda: _figure(1))
+
+    assert figure_from_json(spec).to_dict() == _figure(1).to_dict()
+    assert cache.get_or_build("key", lambda: _figure(2)) == spec
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = FigureCache(max_entries=1, directory=str(tmp_path), max_disk_entries=2)
+
+    for index, key in enumerate(["a", "b"]):
+        cache.put(key, _figure(index).to_json())
+        utime(join(tmp_path, f"{key}.json"), (index, index))
+
+    # Reading "a" makes "b" the least recently used file
+    assert FigureCache(directory=str(tmp_path)).get("a") is not None
+    cache.put("c", _figure(2).to_json())
+
+    assert sorted(listdir(tmp_path)) == ["a.json", "c.json"]
+    assert FigureCache(directory=str(tmp_path)).get("b") is None
@@ -0,0 +1,84 @@
+from copy import copy
+
+import pytest
+from scipy.stats import kendalltau
+
+from src.helpers.compute import _compute_workflow_trends, workflow_digest
+from src.helpers.trends import KendallTau, build_trend, update_trend
+from src.models.neo import Commit, Workflow
+from tests.conftest import make_workflow
+
+
+def _prefix(workflow: Workflow, commits: int) -> Workflow:
+    shas = list(workflow.commits.keys())[:commits]
+
+    return Workflow("", {sha: workflow.commits[sha] for sha in shas})
+
+
+def _vulnerable_commit(workflow: Workflow, index: int) -> Workflow:
+    shas = list(workflow.commits.keys())
+    commits = dict(workflow.commits)
+    commit = commits[shas[index]]
+    indirect = dict(commit.dependencies["indirect"])
+    key, dep = next(
+        (key, dep) for key, dep in indirect.items() if len(dep.vulnerabilities) == 0
+    )
+    vulnerable = copy(dep)
+    vulnerable.vulnerabilities = {"GHSA": {"id": "GHSA", "cve": "", "cvss": 9.0}}
+    indirect[key] = vulnerable
+    commits[shas[index]] = Commit(
+        commit.date, {**commit.dependencies, "indirect": indirect}
+    )
+
+    return Workflow("", commits)
+
+
+def test_update_matches_scratch():
+    workflow = make_workflow(300, 3, 20)
+    trend = build_trend(_prefix(workflow, 250))
+
+    assert trend.update(workflow)
+    assert trend.result() == pytest.approx(build_trend(workflow).result(), nan_ok=True)
+
+
+def test_digest_changes_with_dependencies():
+    workflow = make_workflow(50, 2, 20)
+    changed = _vulnerable_commit(workflow, 10)
+
+    assert workflow_digest("a/one", "ci.yml", workflow) != workflow_digest(
+        "a/one", "ci.yml", changed
+    )
+
+
+def test_update_rebuilds_when_a_folded_commit_changes():
+    workflow = make_workflow(300, 3, 20)
+    trend = build_trend(_prefix(workflow, 250))
+    changed = _vulnerable_commit(workflow, 10)
+
+    assert update_trend(changed, trend) is not trend
+    assert update_trend(changed, trend).result() == pytest.approx(
+        build_trend(changed).result(), nan_ok=True
+    )
+    assert build_trend(changed).result() == pytest.approx(
+        _compute_workflow_trends(changed), nan_ok=True
+    )
+
+
+@pytest.mark.parametrize(
+    "ys",
+    [
+        [3, 1, 4, 0, 5, 9, 2, 6, 8, 7],
+        list(range(100)),
+        [1, 0] + list(range(2, 100)),
+        list(range(100, 0, -1)),
+    ],
+)
+def test_exact_pvalue_matches_scipy(ys):
+    tau = KendallTau()
+
+    for x, y in enumerate(ys):
+        tau.add(x, y)
+
+    assert tau.result() == pytest.approx(
+        tuple(kendalltau(range(len(ys)), ys)), nan_ok=True
+    )